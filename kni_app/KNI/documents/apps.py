@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class DocumentsConfig(AppConfig):
+    default_auto_field: str = "django.db.models.AutoField"
+    name = "KNI.documents"
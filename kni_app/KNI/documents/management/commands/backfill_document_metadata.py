@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from wagtail.documents import get_document_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the file size and hash of documents uploaded without them, so "
+        "document links can show their size without a storage request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute the metadata of all documents.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, **options):
+        documents = get_document_model().objects.order_by("pk")
+        if not options["force"]:
+            documents = documents.filter(Q(file_size__isnull=True) | Q(file_hash=""))
+
+        updated = failed = 0
+        for document in documents.iterator(chunk_size=options["batch_size"]):
+            try:
+                document._set_document_file_metadata()
+                document.file.close()
+            except Exception as e:  # noqa: BLE001
+                # A missing file shouldn't stop the run
+                failed += 1
+                self.stderr.write(f"Document {document.pk} ({document.file.name}): {e}")
+                continue
+            document.save(update_fields=["file_size", "file_hash"])
+            updated += 1
+
+        self.stdout.write(f"Updated {updated} document(s), {failed} failed.")
@@ -0,0 +1,98 @@
+from django.core.management.color import no_style
+from django.db import migrations
+
+# Codenames of the wagtaildocs.Document permissions, and their equivalents
+PERMISSIONS = {
+    "add_document": ("add_customdocument", "Can add document"),
+    "change_document": ("change_customdocument", "Can change document"),
+    "delete_document": ("delete_customdocument", "Can delete document"),
+    "view_document": ("view_customdocument", "Can view document"),
+    "choose_document": ("choose_document", "Can choose document"),
+}
+
+
+def copy_documents(apps, schema_editor):
+    """
+    Copy the documents uploaded before the custom document model was set up,
+    keeping their IDs so links in content still point at them, along with
+    their tags, permissions and reference index entries.
+    """
+    ContentType = apps.get_model("contenttypes.ContentType")
+    Permission = apps.get_model("auth.Permission")
+    Group = apps.get_model("auth.Group")
+    GroupCollectionPermission = apps.get_model("wagtailcore.GroupCollectionPermission")
+    TaggedItem = apps.get_model("taggit.TaggedItem")
+    ReferenceIndex = apps.get_model("wagtailcore.ReferenceIndex")
+    Document = apps.get_model("wagtaildocs.Document")
+    CustomDocument = apps.get_model("documents.CustomDocument")
+
+    old_content_type, _ = ContentType.objects.get_or_create(
+        app_label="wagtaildocs", model="document"
+    )
+    new_content_type, _ = ContentType.objects.get_or_create(
+        app_label="documents", model="customdocument"
+    )
+
+    CustomDocument.objects.bulk_create(
+        CustomDocument(
+            pk=document.pk,
+            title=document.title,
+            file=document.file.name,
+            created_at=document.created_at,
+            uploaded_by_user_id=document.uploaded_by_user_id,
+            collection_id=document.collection_id,
+            file_size=document.file_size,
+            file_hash=document.file_hash,
+        )
+        for document in Document.objects.order_by("pk")
+    )
+    if CustomDocument.objects.exists():
+        # Rows were inserted with explicit IDs, so move the sequence past them
+        with schema_editor.connection.cursor() as cursor:
+            for sql in schema_editor.connection.ops.sequence_reset_sql(
+                no_style(), [CustomDocument]
+            ):
+                cursor.execute(sql)
+
+    TaggedItem.objects.filter(content_type=old_content_type).update(
+        content_type=new_content_type
+    )
+    ReferenceIndex.objects.filter(to_content_type=old_content_type).update(
+        to_content_type=new_content_type
+    )
+    ReferenceIndex.objects.filter(content_type=old_content_type).update(
+        content_type=new_content_type, base_content_type=new_content_type
+    )
+
+    for old_codename, (codename, name) in PERMISSIONS.items():
+        old_permission = Permission.objects.filter(
+            content_type=old_content_type, codename=old_codename
+        ).first()
+        if old_permission is None:
+            continue
+        permission, _ = Permission.objects.get_or_create(
+            content_type=new_content_type, codename=codename, defaults={"name": name}
+        )
+        for group in Group.objects.filter(permissions=old_permission):
+            group.permissions.add(permission)
+        for collection_permission in GroupCollectionPermission.objects.filter(
+            permission=old_permission
+        ):
+            GroupCollectionPermission.objects.get_or_create(
+                group_id=collection_permission.group_id,
+                collection_id=collection_permission.collection_id,
+                permission=permission,
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("documents", "0001_initial"),
+        ("wagtailcore", "0094_alter_page_locale"),
+        ("wagtaildocs", "0014_alter_document_file_size"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_documents, migrations.RunPython.noop),
+    ]
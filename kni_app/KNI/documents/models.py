@@ -0,0 +1,18 @@
+from wagtail.documents.models import AbstractDocument, Document
+
+
+class CustomDocument(AbstractDocument):
+    admin_form_fields = Document.admin_form_fields
+
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # A new file has been uploaded. Store its size and hash now, so
+            # rendering a link to it never has to ask the storage backend.
+            # The admin forms do this already, other code paths don't.
+            self._set_document_file_metadata()
+        super().save(*args, **kwargs)
+
+    class Meta(AbstractDocument.Meta):
+        permissions = [
+            ("choose_document", "Can choose document"),
+        ]
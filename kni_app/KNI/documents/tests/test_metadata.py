@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from KNI.documents.models import CustomDocument
+from KNI.utils.struct_values import LinkStructValue
+
+
+class DocumentMetadataTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def get_link(self, document):
+        return LinkStructValue(None, [("document", document)])
+
+    def test_upload_stores_metadata(self):
+        document = CustomDocument.objects.create(
+            title="Report", file=ContentFile(b"x" * 2048, name="report.pdf")
+        )
+
+        document.refresh_from_db()
+        self.assertEqual(document.file_size, 2048)
+        self.assertEqual(len(document.file_hash), 40)
+
+    def test_link_uses_stored_metadata(self):
+        document = CustomDocument.objects.create(
+            title="Report", file=ContentFile(b"x" * 2048, name="report.pdf")
+        )
+        # The file is never checked, only the stored values
+        document.file.storage.delete(document.file.name)
+
+        link = self.get_link(document)
+
+        self.assertEqual(link.get_file_size(), "2.0\xa0KB")
+        self.assertEqual(link.get_extension_type(), "PDF")
+
+    def test_backfill(self):
+        document = CustomDocument.objects.create(
+            title="Report", file=ContentFile(b"x" * 2048, name="report.pdf")
+        )
+        CustomDocument.objects.filter(pk=document.pk).update(file_size=None, file_hash="")
+        document.refresh_from_db()
+        self.assertEqual(self.get_link(document).get_file_size(), "")
+
+        call_command("backfill_document_metadata", stdout=StringIO())
+
+        document.refresh_from_db()
+        self.assertEqual(document.file_size, 2048)
+        self.assertEqual(len(document.file_hash), 40)
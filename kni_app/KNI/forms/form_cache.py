@@ -0,0 +1,68 @@
+"""
+Form pages' fields, cached per live revision: as a compact spec in the
+shared cache, so workers don't read the FormField rows, and along with the
+form class built from them in each process, so requests don't rebuild it.
+
+A page's fields only change in the database when it's published, which
+gives it a new live revision and so new cache keys. Fields changed any
+other way (e.g. in a shell) show once the page is next published.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+FORM_FIELD_ATTRIBUTES = (
+    "sort_order",
+    "clean_name",
+    "label",
+    "field_type",
+    "required",
+    "choices",
+    "default_value",
+    "help_text",
+)
+
+# Page ID -> (live revision ID, fields, form class or None), for this process
+_forms = {}
+
+
+def is_cacheable(page):
+    # Pages restored from a revision, as for previews, carry their fields in
+    # memory, and pages never published have no revision to key them on
+    return bool(page.pk and page.live_revision_id) and "form_fields" not in getattr(
+        page, "_cluster_related_objects", {}
+    )
+
+
+def get_cache_key(page):
+    return f"form-fields:{page.pk}:{page.live_revision_id}"
+
+
+def get_form_fields(page):
+    """
+    The page's form fields, as unsaved instances of its form field model.
+    """
+    if (entry := _forms.get(page.pk)) and entry[0] == page.live_revision_id:
+        return entry[1]
+
+    key = get_cache_key(page)
+    field_model = page.form_fields.model
+    specs = cache.get(key)
+    if specs is None:
+        specs = list(page.form_fields.values(*FORM_FIELD_ATTRIBUTES))
+        cache.set(key, specs, settings.FORM_FIELDS_CACHE_TIMEOUT)
+    fields = [field_model(**spec) for spec in specs]
+    _forms[page.pk] = (page.live_revision_id, fields, None)
+    return fields
+
+
+def get_form_class(page, build):
+    """
+    The page's form class, built by `build(fields)` once per live revision.
+    """
+    get_form_fields(page)  # Fills in this process's entry
+    revision_id, fields, form_class = _forms[page.pk]
+    if form_class is None:
+        form_class = build(fields)
+        _forms[page.pk] = (revision_id, fields, form_class)
+    return form_class
@@ -0,0 +1,106 @@
+import os
+import resource
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.contrib.forms.views import SubmissionsListView
+from wagtail.models import Page
+
+from KNI.forms.models import FormField, FormPage
+from KNI.forms.views import StreamingSubmissionsListView
+
+
+class Rollback(Exception):
+    pass
+
+
+def get_rss():
+    """
+    This process's resident memory in bytes, or its peak where the current
+    figure isn't available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Export a form with many submissions, created in a transaction that "
+        "is rolled back, and report the process's memory while the export "
+        "streams. Use --compare to also run Wagtail's own export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submissions", type=int, default=100_000)
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--compare", action="store_true")
+
+    def create_submissions(self, count):
+        page = Page.get_first_root_node().add_child(
+            instance=FormPage(title="Export benchmark", slug="export-benchmark", live=False)
+        )
+        for label in ("Name", "Email", "Message"):
+            FormField.objects.create(page=page, label=label, field_type="singleline")
+        FormSubmission.objects.bulk_create(
+            (
+                FormSubmission(
+                    page=page,
+                    form_data={
+                        "name": f"Person {i}",
+                        "email": f"person{i}@example.com",
+                        "message": "Lorem ipsum dolor sit amet " * 8,
+                    },
+                )
+                for i in range(count)
+            ),
+            batch_size=5000,
+        )
+        return page
+
+    def run_export(self, page, view_class, export_format, use_gzip):
+        request = RequestFactory().get(
+            "/", {"export": export_format, **({"gzip": "1"} if use_gzip else {})}
+        )
+        request.user = get_user_model()(is_superuser=True, is_active=True)
+        view = view_class.as_view()
+
+        rss_before = get_rss()
+        started = time.monotonic()
+        response = view(request, form_page=page)
+        samples = []
+        size = 0
+        for i, chunk in enumerate(response.streaming_content):
+            size += len(chunk)
+            if i % 5000 == 0:
+                samples.append(get_rss())
+        samples.append(get_rss())
+
+        megabyte = 1024 * 1024
+        self.stdout.write(
+            f"{view_class.__name__}: {size / megabyte:.1f} MB exported in "
+            f"{time.monotonic() - started:.1f}s. RSS before {rss_before / megabyte:.0f} MB, "
+            f"while streaming {min(samples) / megabyte:.0f}-{max(samples) / megabyte:.0f} MB, "
+            f"growth {(max(samples) - rss_before) / megabyte:.0f} MB."
+        )
+
+    def handle(self, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Creating {options['submissions']} submissions...")
+                page = self.create_submissions(options["submissions"])
+                self.run_export(
+                    page, StreamingSubmissionsListView, options["format"], options["gzip"]
+                )
+                if options["compare"] and options["format"] == "csv" and not options["gzip"]:
+                    self.run_export(page, SubmissionsListView, "csv", False)
+                raise Rollback
+        except Rollback:
+            pass
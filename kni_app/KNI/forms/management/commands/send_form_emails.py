@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from KNI.forms.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the form submission emails waiting in the outbox, retrying "
+        "failed ones with backoff. Use --loop to keep running as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, checking for new emails every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=float, default=5)
+
+    def handle(self, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} email(s), {failed} failed.")
+            elif options["loop"]:
+                time.sleep(options["interval"])
+            else:
+                break
+
+        self.stdout.write(f"Sent {total_sent} email(s) in total, {total_failed} failed.")
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formpage',
+            name='plain_introduction',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django_tasks.backends.immediate import ImmediateBackend
 from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import (
     FieldPanel, FieldRowPanel,
@@ -8,6 +9,9 @@ from wagtail.fields import RichTextField
 from wagtail.contrib.forms.models import AbstractEmailForm, AbstractFormField
 from wagtail.contrib.forms.panels import FormSubmissionsPanel
 
+from KNI.forms import form_cache
+from KNI.forms.outbox import queue_email
+from KNI.forms.tasks import send_form_emails_task
 from KNI.utils.models import BasePage
 
 
@@ -38,3 +42,65 @@ class FormPage(AbstractEmailForm, BasePage):
             FieldPanel('subject'),
         ], "Email"),
     ]
+
+    def get_form_fields(self):
+        if form_cache.is_cacheable(self):
+            return form_cache.get_form_fields(self)
+        return super().get_form_fields()
+
+    def get_form_class(self):
+        if form_cache.is_cacheable(self):
+            return form_cache.get_form_class(
+                self, lambda fields: self.form_builder(fields).get_form_class()
+            )
+        return super().get_form_class()
+
+    def get_submissions_list_view_class(self):
+        from KNI.forms.views import StreamingSubmissionsListView
+
+        return StreamingSubmissionsListView
+
+    def send_mail(self, form):
+        # Queued rather than sent, so slow mail servers don't hold up the
+        # response; see KNI.forms.outbox
+        queue_email(
+            self.subject,
+            self.render_email(form),
+            [address.strip() for address in self.to_address.split(",")],
+            self.from_address,
+        )
+        # Without a background worker the task would send it in the request,
+        # so it's left to `send_form_emails --loop`
+        if not isinstance(send_form_emails_task.get_backend(), ImmediateBackend):
+            send_form_emails_task.enqueue()
+
+
+class FormEmail(models.Model):
+    """
+    A form submission email waiting to be sent, or sent, by
+    `send_form_emails_task` or the `send_form_emails` command.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When the next attempt is due. Pushed back while a worker is sending it,
+    # and after each failure
+    next_attempt_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(sent_at__isnull=True),
+                name="formemail_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)}"
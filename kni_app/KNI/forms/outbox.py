@@ -0,0 +1,139 @@
+"""
+Form submission emails go through an outbox table: the form page only
+stores them, and the `send_form_emails` command sends them in batches over
+one connection, retrying failures with exponential backoff.
+
+Each email is claimed by pushing its `next_attempt_at` back by
+FORM_EMAIL_LEASE seconds before sending, only if it's unchanged since it was
+read, so several workers can run without sending an email twice, and emails
+claimed by a worker that died are picked up again once the lease is over.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_attempts():
+    return getattr(settings, "FORM_EMAIL_MAX_ATTEMPTS", 8)
+
+
+def get_retry_delay(attempts):
+    """
+    How long to wait after the `attempts`th failure: FORM_EMAIL_RETRY_DELAY
+    seconds, doubled each time, up to a day.
+    """
+    delay = getattr(settings, "FORM_EMAIL_RETRY_DELAY", 60) * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, 86400))
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    from KNI.forms.models import FormEmail
+
+    return FormEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipients=recipients,
+        # As wagtail.admin.mail.send_mail does
+        from_email=from_email
+        or getattr(settings, "WAGTAILADMIN_NOTIFICATION_FROM_EMAIL", settings.DEFAULT_FROM_EMAIL),
+        next_attempt_at=timezone.now(),
+    )
+
+
+def claim(email, lease_expires_at):
+    """
+    Lease `email` to this worker, unless another worker did first.
+    """
+    from KNI.forms.models import FormEmail
+
+    if not FormEmail.objects.filter(
+        pk=email.pk,
+        sent_at__isnull=True,
+        next_attempt_at=email.next_attempt_at,
+        attempts=email.attempts,
+    ).update(next_attempt_at=lease_expires_at):
+        return False
+    email.next_attempt_at = lease_expires_at
+    return True
+
+
+def claim_batch(batch_size):
+    """
+    The next due emails, up to `batch_size`, leased to this worker.
+    """
+    from KNI.forms.models import FormEmail
+
+    now = timezone.now()
+    lease_expires_at = now + timedelta(seconds=getattr(settings, "FORM_EMAIL_LEASE", 300))
+    emails = FormEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=now,
+        attempts__lt=get_max_attempts(),
+    ).order_by("next_attempt_at")[:batch_size]
+    # One commit for all the claims
+    with transaction.atomic():
+        return [email for email in emails if claim(email, lease_expires_at)]
+
+
+def get_message(email, connection):
+    return EmailMessage(
+        email.subject,
+        email.body,
+        email.from_email,
+        email.recipients,
+        connection=connection,
+        headers={"Auto-Submitted": "auto-generated"},
+    )
+
+
+def send_batch(batch_size=50):
+    """
+    Send the next due emails. Returns how many were sent and how many
+    failed.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing can be sent, so every email in the batch failed
+        for email in emails:
+            record_failure(email, e)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                get_message(email, connection).send()
+            except Exception as e:
+                record_failure(email, e)
+                failed += 1
+            else:
+                email.sent_at = timezone.now()
+                email.save(update_fields=["sent_at"])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+    if email.attempts >= get_max_attempts():
+        logger.error("Giving up on form email %s: %r", email.pk, error)
+    else:
+        logger.warning("Form email %s failed, attempt %s: %r", email.pk, email.attempts, error)
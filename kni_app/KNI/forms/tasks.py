@@ -0,0 +1,22 @@
+from django.db.models import Min
+from django_tasks import task
+
+from KNI.forms.outbox import get_max_attempts, send_batch
+
+
+@task()
+def send_form_emails_task():
+    """
+    Send the form submission emails that are due, then run again when the
+    next retry is due.
+    """
+    from KNI.forms.models import FormEmail
+
+    while any(send_batch()):
+        pass
+
+    next_attempt_at = FormEmail.objects.filter(
+        sent_at__isnull=True, attempts__lt=get_max_attempts()
+    ).aggregate(Min("next_attempt_at"))["next_attempt_at__min"]
+    if next_attempt_at and send_form_emails_task.get_backend().supports_defer:
+        send_form_emails_task.using(run_after=next_attempt_at).enqueue()
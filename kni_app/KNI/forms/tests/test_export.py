@@ -0,0 +1,51 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Site
+
+from KNI.forms.models import FormField, FormPage
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.page = Site.objects.get(is_default_site=True).root_page.add_child(
+            instance=FormPage(title="Contact")
+        )
+        FormField.objects.create(page=self.page, label="Name", field_type="singleline")
+        for day, name in ((1, "Ada"), (15, "Grace")):
+            submission = FormSubmission.objects.create(page=self.page, form_data={"name": name})
+            FormSubmission.objects.filter(pk=submission.pk).update(
+                submit_time=datetime(2026, 3, day, 12, tzinfo=timezone.utc)
+            )
+        user = get_user_model().objects.create_superuser("admin", password="password")
+        self.client.force_login(user)
+
+    def export(self, **params):
+        response = self.client.get(
+            reverse("wagtailforms:list_submissions", args=[self.page.pk]), params
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        if params.get("gzip"):
+            self.assertEqual(response["Content-Type"], "application/gzip")
+            content = gzip.decompress(content)
+        return response, content.decode()
+
+    def test_csv(self):
+        response, content = self.export(export="csv")
+
+        self.assertIn('filename="contact-export-', response["Content-Disposition"])
+        lines = content.splitlines()
+        self.assertEqual(lines[0], "Submission date,Name")
+        self.assertEqual([line.rsplit(",", 1)[1] for line in lines[1:]], ["Ada", "Grace"])
+
+    def test_json_lines_for_a_date_range(self):
+        _, content = self.export(export="jsonl", date_from="2026-03-10", gzip="1")
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows, [{"submit_time": "2026-03-15T12:00:00Z", "name": "Grace"}])
@@ -0,0 +1,55 @@
+from django.test import TestCase, override_settings
+from wagtail.models import Site
+
+from KNI.forms import form_cache
+from KNI.forms.models import FormField, FormPage
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class FormCacheTests(TestCase):
+    def setUp(self):
+        form_cache._forms.clear()
+        page = Site.objects.get(is_default_site=True).root_page.add_child(
+            instance=FormPage(title="Contact")
+        )
+        page.form_fields = [FormField(label="Name", field_type="singleline")]
+        page.save_revision().publish()
+        self.page_pk = page.pk
+
+    def get_page(self):
+        return FormPage.objects.get(pk=self.page_pk)
+
+    def test_form_class_reused(self):
+        form_class = self.get_page().get_form_class()
+        page = self.get_page()
+
+        with self.assertNumQueries(0):
+            self.assertIs(page.get_form_class(), form_class)
+            self.assertEqual([field.label for field in page.get_form_fields()], ["Name"])
+
+        # Other processes build their own from the shared cache
+        form_cache._forms.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(page.get_form_class().base_fields), ["name"])
+
+    def test_publishing_changes_the_form(self):
+        self.get_page().get_form_class()
+
+        page = self.get_page()
+        page.form_fields = [
+            FormField(label="Name", field_type="singleline"),
+            FormField(label="Email", field_type="email"),
+        ]
+        page.save_revision().publish()
+
+        self.assertEqual(list(self.get_page().get_form_class().base_fields), ["name", "email"])
+
+    def test_previews_use_their_own_fields(self):
+        self.get_page().get_form_class()
+
+        page = self.get_page()
+        page.form_fields = [FormField(label="Draft field", field_type="singleline")]
+
+        self.assertEqual(list(page.get_form_class().base_fields), ["draft_field"])
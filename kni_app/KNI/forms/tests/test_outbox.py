@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Site
+
+from KNI.forms.models import FormEmail, FormField, FormPage
+from KNI.forms import outbox
+from KNI.forms.outbox import queue_email, send_batch
+from KNI.forms.tasks import send_form_emails_task
+from KNI.tasks.models import QueuedTask
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class FormEmailOutboxTests(TestCase):
+    def test_submission_queues_email(self):
+        page = Site.objects.get(is_default_site=True).root_page.add_child(
+            instance=FormPage(
+                title="Contact",
+                to_address="one@example.com, two@example.com",
+                from_address="form@example.com",
+                subject="New message",
+            )
+        )
+        FormField.objects.create(page=page, label="Name", field_type="singleline")
+
+        # The test settings run tasks immediately, so none is queued
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/contact/", {"name": "Ada"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(FormSubmission.objects.filter(page=page).exists())
+        self.assertEqual(mail.outbox, [])
+        email = FormEmail.objects.get()
+        self.assertEqual(email.recipients, ["one@example.com", "two@example.com"])
+        self.assertEqual(email.body, "Name: Ada")
+
+        self.assertEqual(send_batch(), (1, 0))
+
+        self.assertEqual(mail.outbox[0].to, ["one@example.com", "two@example.com"])
+        self.assertEqual(mail.outbox[0].extra_headers["Auto-Submitted"], "auto-generated")
+        self.assertIsNotNone(FormEmail.objects.get().sent_at)
+        self.assertEqual(send_batch(), (0, 0))
+
+    def test_overlapping_claims_are_disjoint(self):
+        emails = [queue_email("Subject", "Body", ["one@example.com"]) for _ in range(3)]
+        original_claim = outbox.claim
+        other_claimed = None
+
+        def claim(email, lease_expires_at):
+            nonlocal other_claimed
+            # Another worker claims the first two once this one has read them
+            if other_claimed is None:
+                other_claimed = []
+                other_claimed = outbox.claim_batch(2)
+            return original_claim(email, lease_expires_at)
+
+        with patch("KNI.forms.outbox.claim", side_effect=claim):
+            claimed = outbox.claim_batch(3)
+
+        self.assertEqual(other_claimed, emails[:2])
+        self.assertEqual(claimed, emails[2:])
+        self.assertEqual(outbox.claim_batch(3), [])
+
+    @override_settings(FORM_EMAIL_MAX_ATTEMPTS=2, FORM_EMAIL_RETRY_DELAY=60)
+    def test_failures_are_retried_with_backoff(self):
+        email = queue_email("Subject", "Body", ["one@example.com"])
+
+        with patch("django.core.mail.EmailMessage.send", side_effect=SMTPException("Down")):
+            self.assertEqual(send_batch(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("Down", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # Not due yet
+        self.assertEqual(send_batch(), (0, 0))
+
+        FormEmail.objects.update(next_attempt_at=timezone.now())
+        with patch("django.core.mail.EmailMessage.send", side_effect=SMTPException("Down")):
+            self.assertEqual(send_batch(), (0, 1))
+
+        # Given up on
+        FormEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_batch(), (0, 0))
+
+    def test_command(self):
+        for _ in range(3):
+            queue_email("Subject", "Body", ["one@example.com"])
+        stdout = StringIO()
+
+        call_command("send_form_emails", batch_size=2, stdout=stdout)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("Sent 3 email(s) in total", stdout.getvalue())
+
+    @override_settings(TASKS={"default": {"BACKEND": "KNI.tasks.backend.DatabaseBackend"}})
+    def test_task_runs_again_when_retry_due(self):
+        sent = queue_email("Subject", "Body", ["one@example.com"])
+        failing = queue_email("Subject", "Body", ["two@example.com"])
+
+        def send(message):
+            if message.to == failing.recipients:
+                raise SMTPException("Down")
+            mail.outbox.append(message)
+
+        with (
+            patch("django.core.mail.EmailMessage.send", autospec=True, side_effect=send),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            send_form_emails_task.call()
+
+        self.assertIsNotNone(FormEmail.objects.get(pk=sent.pk).sent_at)
+        failing.refresh_from_db()
+        self.assertEqual(
+            QueuedTask.objects.get(task_path=send_form_emails_task.module_path).available_at,
+            failing.next_attempt_at,
+        )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ImagesConfig(AppConfig):
     default_auto_field: str = "django.db.models.AutoField"
     name = "KNI.images"
+
+    def ready(self):
+        from KNI.images.formats import check_image_formats
+        from KNI.images.signal_handlers import register_signal_handlers
+
+        check_image_formats()
+        register_signal_handlers()
@@ -0,0 +1,72 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.template.response import SimpleTemplateResponse
+from django.urls import reverse
+from wagtail.images.utils import generate_signature
+
+_renditions_deferred = ContextVar("renditions_deferred", default=False)
+
+
+def renditions_deferred() -> bool:
+    return _renditions_deferred.get()
+
+
+@contextmanager
+def defer_renditions():
+    """
+    Within this block, missing renditions aren't generated. `get_rendition()`
+    and `get_renditions()` return unsaved stand-ins whose URL points at the
+    rendition serving view, which generates them on first fetch.
+    """
+    token = _renditions_deferred.set(True)
+    try:
+        yield
+    finally:
+        _renditions_deferred.reset(token)
+
+
+def defer_renditions_on_render(view_func):
+    """
+    View decorator deferring rendition generation while the view's response
+    is rendered, when `IMAGE_DEFER_RENDITIONS` is on. Template responses are
+    rendered within the view for this, rather than later by the handler.
+    """
+
+    @wraps(view_func)
+    def _wrapped_view(*args, **kwargs):
+        if not getattr(settings, "IMAGE_DEFER_RENDITIONS", False):
+            return view_func(*args, **kwargs)
+
+        with defer_renditions():
+            response = view_func(*args, **kwargs)
+            if isinstance(response, SimpleTemplateResponse):
+                response.render()
+        return response
+
+    return _wrapped_view
+
+
+def get_rendition_version(image, filter) -> str:
+    """
+    Changes whenever the rendition `filter` would produce for `image` does,
+    i.e. when the file is replaced or the focal point moves.
+    """
+    key = f"{image.file.name}:{filter.get_cache_key(image)}"
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+def get_rendition_serve_url(image, filter) -> str:
+    """
+    The signed, deterministic URL the rendition serving view generates this
+    rendition at. The version makes it safe to cache as immutable.
+    """
+    # As `wagtail.images.views.serve.generate_image_url()`, which can't be
+    # imported before the image model is loaded
+    signature = generate_signature(image.id, filter.spec)
+    url = reverse("wagtailimages_serve", args=(signature, image.id, filter.spec))
+    url += image.file.name[len("original_images/") :]
+    return f"{url}?v={get_rendition_version(image, filter)}"
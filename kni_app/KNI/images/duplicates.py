@@ -0,0 +1,176 @@
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Count, TextField
+from django.db.models.functions import Cast
+from wagtail.fields import RichTextField, StreamField
+from wagtail.models import ReferenceIndex, Revision
+
+
+def find_duplicate_hashes(queryset):
+    """
+    The file hashes shared by more than one image in `queryset`.
+    """
+    return (
+        queryset.exclude(file_hash="")
+        .values_list("file_hash", flat=True)
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+
+
+def get_blocking_relations(image):
+    """
+    Foreign keys pointing at `image`, counted directly rather than through the
+    reference index, so a stale index can't lead to a still-used image being
+    deleted (and the reference nulled).
+    """
+    blocking = []
+    for relation in image._meta.get_fields(include_hidden=True):
+        if not (relation.one_to_many and relation.auto_created and not relation.concrete):
+            continue
+        if relation.related_model is image.get_rendition_model():
+            continue
+        if relation.related_model._default_manager.filter(
+            **{relation.field.name: image.pk}
+        ).exists():
+            blocking.append(relation.related_model._meta.label)
+    return blocking
+
+
+def get_revisions_using(image):
+    """
+    Revisions (drafts, scheduled or past ones) using `image`. The reference
+    index only covers live content, and isn't updated by repointing it, so
+    restoring or publishing these after `image` is deleted would lose it.
+
+    Revisions mentioning its ID are checked by extracting references from
+    the revision's object, as the reference index does for live content.
+    Relies on Wagtail's `ReferenceIndex._extract_references_from_object()`:
+    check it still exists when upgrading Wagtail.
+    """
+    content_type_id = ContentType.objects.get_for_model(image).pk
+    candidates = Revision.objects.alias(text=Cast("content", TextField())).filter(
+        text__regex=rf"(^|[^0-9]){image.pk}([^0-9]|$)"
+    )
+    for revision in candidates.iterator():
+        try:
+            obj = revision.as_object()
+        except Exception:  # noqa: BLE001
+            # Its model is gone, or its content no longer loads
+            continue
+        for to_content_type_id, to_object_id, *_ in ReferenceIndex._extract_references_from_object(
+            obj
+        ):
+            if (to_content_type_id, to_object_id) == (content_type_id, str(image.pk)):
+                yield revision
+                break
+
+
+def replace_image_in_rich_text(html, old_pk, new_pk):
+    return re.sub(
+        rf'(<embed\b[^>]*\bid="){old_pk}(")',
+        lambda match: f"{match[1]}{new_pk}{match[2]}"
+        if 'embedtype="image"' in match[0]
+        else match[0],
+        html,
+    )
+
+
+def replace_in_stream_data(data, path, old_pk, new_pk):
+    """
+    Replace the image `old_pk` at the `content_path` segments `path` in raw
+    StreamField data. Returns the new data.
+    """
+    if not path:
+        if isinstance(data, str):
+            return replace_image_in_rich_text(data, old_pk, new_pk)
+        if isinstance(data, dict) and data.get("image") == old_pk:
+            # An ImageBlock value
+            return {**data, "image": new_pk}
+        return new_pk if data == old_pk else data
+
+    segment, rest = path[0], path[1:]
+    if isinstance(data, list):
+        # Stream and list block children are addressed by their ID
+        return [
+            {**item, "value": replace_in_stream_data(item["value"], rest, old_pk, new_pk)}
+            if isinstance(item, dict) and item.get("id") == segment
+            else item
+            for item in data
+        ]
+    if isinstance(data, dict) and segment in data:
+        return {**data, segment: replace_in_stream_data(data[segment], rest, old_pk, new_pk)}
+    return data
+
+
+def repoint_reference(reference, old_pk, new_pk):
+    """
+    Point the reference index entry `reference` to the image `old_pk` at the
+    image `new_pk` instead. Returns whether it could.
+
+    Writes with `QuerySet.update()`, so no revisions are created and live
+    content changes in place.
+    """
+    model = reference.content_type.model_class()
+    path = reference.content_path.split(".")
+    target_model, target_pk = model, reference.object_id
+
+    # References through an inline panel: "<relation>.<child id>.<field>..."
+    field = model._meta.get_field(path[0])
+    if isinstance(field, models.ForeignObjectRel):
+        target_model, target_pk, path = field.related_model, path[1], path[2:]
+        field = target_model._meta.get_field(path[0])
+
+    queryset = target_model._default_manager.filter(pk=target_pk)
+    if field.many_to_one:
+        return bool(queryset.filter(**{field.attname: old_pk}).update(**{field.attname: new_pk}))
+
+    value = queryset.values_list(field.attname, flat=True).first()
+    if value is None:
+        return False
+    if isinstance(field, StreamField):
+        data = value.get_prep_value()
+        new_data = replace_in_stream_data(data, path[1:], old_pk, new_pk)
+    elif isinstance(field, RichTextField):
+        data = value
+        new_data = replace_image_in_rich_text(data, old_pk, new_pk)
+    else:
+        return False
+
+    if new_data == data:
+        return False
+    queryset.update(**{field.attname: new_data})
+    return True
+
+
+def merge_images(original, duplicate):
+    """
+    Point everything using `duplicate` at `original`, and delete `duplicate`
+    (with its file and renditions) if nothing uses it any more. Revisions
+    aren't rewritten: a duplicate they use is kept. Returns the reasons it
+    couldn't be deleted, if any.
+    """
+    problems = []
+    with transaction.atomic():
+        for reference in list(ReferenceIndex.get_references_to(duplicate)):
+            if not repoint_reference(reference, duplicate.pk, original.pk):
+                problems.append(
+                    f"{reference.content_type.model_class()._meta.label} "
+                    f"{reference.object_id} ({reference.content_path})"
+                )
+                continue
+            source = reference.content_type.get_object_for_this_type(pk=reference.object_id)
+            ReferenceIndex.create_or_update_for_object(source)
+
+        problems += get_blocking_relations(duplicate)
+        problems += [
+            f"{revision.content_type.model_class()._meta.label} {revision.object_id} "
+            f"(revision {revision.pk})"
+            for revision in get_revisions_using(duplicate)
+        ]
+        if not problems:
+            duplicate.delete()
+    return problems
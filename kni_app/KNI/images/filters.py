@@ -0,0 +1,397 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from PIL import Image as PILImage
+from PIL import ImageOps
+from wagtail.images.exceptions import UnknownOutputImageFormatError
+from wagtail.images.image_operations import (
+    AvifQualityOperation,
+    DoNothingOperation,
+    FormatOperation,
+    JPEGQualityOperation,
+    WebPQualityOperation,
+)
+from wagtail.images.models import Filter
+from wagtail.images.rect import Rect
+from willow.image import AvifImageFile
+from willow.plugins.pillow import PillowImage
+
+from KNI.images.formats import avif_supported, get_avif_fallback_format
+
+logger = logging.getLogger(__name__)
+
+# Maps Pillow format names and file extensions to Willow format names
+PILLOW_FORMATS = {
+    "JPEG": "jpeg",
+    "MPO": "jpeg",
+    "PNG": "png",
+    "GIF": "gif",
+    "WEBP": "webp",
+    "AVIF": "avif",
+    "HEIF": "heic",
+    "BMP": "bmp",
+    "TIFF": "tiff",
+    "ICO": "ico",
+}
+EXTENSION_FORMATS = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".gif": "gif",
+    ".webp": "webp",
+    ".avif": "avif",
+    ".heic": "heic",
+    ".heif": "heic",
+    ".bmp": "bmp",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".ico": "ico",
+}
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Filter operations that only set encoder options in `env`, leaving pixels
+# alone. Operations can also opt in with an `env_only = True` attribute.
+ENV_OPERATIONS = (
+    AvifQualityOperation,
+    DoNothingOperation,
+    FormatOperation,
+    JPEGQualityOperation,
+    WebPQualityOperation,
+)
+
+
+class RenditionFilter(Filter):
+    """
+    The `Filter` used to generate all `CustomImage` renditions.
+
+    On top of Wagtail's behaviour this:
+
+    - Reads from the image's bounded-size working copy when it has one,
+      mapping the crop (computed against the original's dimensions, where
+      focal points live) onto the smaller source.
+    - Runs the spec as a single planned pipeline: decode (in JPEG draft
+      mode, so the decoder only produces as many pixels as the rendition
+      needs), orient, convert, then crop and resize in one resampling pass.
+      Operations that only change the colour mode, such as `gray`, are
+      folded into the decode or convert step instead of making another
+      full-image pass. Per-step timings are kept in `timings`.
+    - Swaps `format-avif` for `IMAGE_AVIF_FALLBACK_FORMAT` when the
+      Pillow build cannot encode AVIF, so templates keep working.
+    - Honours the encoder speed set by `avifspeed-N` (or the
+      `IMAGE_AVIF_SPEED` setting) when saving AVIF output.
+    """
+
+    @classmethod
+    def from_filter(cls, filter: Filter | str) -> "RenditionFilter":
+        if isinstance(filter, cls):
+            return filter
+        if isinstance(filter, Filter):
+            return cls(spec=filter.spec)
+        return cls(spec=filter)
+
+    @cached_property
+    def operations(self):
+        operations = super().operations
+        if avif_supported():
+            return operations
+
+        fallback = get_avif_fallback_format()
+        return [
+            FormatOperation("format", fallback, *operation.options)
+            if isinstance(operation, FormatOperation) and operation.format == "avif"
+            else operation
+            for operation in operations
+        ]
+
+    @contextmanager
+    def open_source(self, image, source=None):
+        """
+        Yield the file to generate the rendition from, and whether it is
+        the original (as opposed to the image's working copy).
+        """
+        if source is not None:
+            source.seek(0)
+            yield source, True
+        elif hasattr(image, "open_rendition_source"):
+            with image.open_rendition_source() as opened:
+                yield opened
+        else:
+            with image.open_file() as original_file:
+                yield original_file, True
+
+    def get_original_format(self, image, pillow_image, is_original):
+        if not is_original:
+            extension = os.path.splitext(image.file.name)[1].lower()
+            if extension in EXTENSION_FORMATS:
+                return EXTENSION_FORMATS[extension]
+        return PILLOW_FORMATS.get(pillow_image.format, (pillow_image.format or "").lower())
+
+    def get_source_size(self, image, size):
+        """
+        The size `size` (of the file being decoded, after orientation) would
+        have at the original's full resolution, and the scale between them.
+        """
+        scale = max(image.width, image.height) / max(size)
+        if scale <= 1:
+            return size, 1.0
+        return (round(size[0] * scale), round(size[1] * scale)), scale
+
+    def plan_operations(self):
+        """
+        Split the filter operations into the colour mode the image can be
+        decoded or converted to up front, and the operations left to run.
+
+        An operation declaring an `output_mode` is folded into the decode
+        when only `env`-setting operations come before it, as changing the
+        mode before cropping and resizing then gives the same pixels.
+        """
+        operations = list(self.filter_operations)
+        for index, operation in enumerate(operations):
+            if getattr(operation, "output_mode", None):
+                return operation.output_mode, operations[:index] + operations[index + 1 :]
+            if not (
+                isinstance(operation, ENV_OPERATIONS)
+                or getattr(operation, "env_only", False)
+            ):
+                break
+        return None, operations
+
+    def draft(self, pillow_image, transform, scale, mode=None):
+        """
+        Let the JPEG decoder skip work the rendition doesn't need: decoding
+        at 1/2, 1/4 or 1/8 scale where the output is small enough, and
+        decoding only the luminance channel when `mode` is "L".
+        """
+        if pillow_image.format not in ("JPEG", "MPO"):
+            return
+
+        crop_rect = transform.get_rect()
+        reduction = max(
+            transform.size[0] / crop_rect.width,
+            transform.size[1] / crop_rect.height,
+        ) * scale
+        if reduction >= 1 and mode != "L":
+            return
+
+        # Pillow picks the largest scale that keeps the image at least this
+        # size (or decodes at full size when it can't reduce by half). It
+        # only honours the first call, so mode and size are set together.
+        reduction = min(reduction, 1)
+        pillow_image.draft(
+            mode or pillow_image.mode,
+            (
+                max(int(pillow_image.width * reduction), 1),
+                max(int(pillow_image.height * reduction), 1),
+            ),
+        )
+
+    def convert(self, pillow_image, mode=None):
+        """
+        Convert the decoded image to `mode`, or palette and bilevel images
+        to RGB(A) so they are antialiased when resized (as Willow does).
+        """
+        if mode is None and pillow_image.mode in ("1", "P"):
+            mode = "RGBA" if PillowImage(pillow_image).has_alpha() else "RGB"
+        if mode is not None and pillow_image.mode != mode:
+            pillow_image = pillow_image.convert(mode)
+        if mode == "L":
+            # Also reached when decoded as grayscale: a colour profile
+            # doesn't describe grayscale pixels
+            pillow_image.info.pop("icc_profile", None)
+        return pillow_image
+
+    def crop_and_resize(self, pillow_image, crop_rect, size):
+        """
+        Crop to `crop_rect` (which may have fractional edges) and resize to
+        `size` in a single pass, without materialising the cropped image.
+        """
+        # Scaling the crop back down can overshoot the edges by a fraction
+        width, height = pillow_image.size
+        crop_box = (
+            max(crop_rect.left, 0),
+            max(crop_rect.top, 0),
+            min(crop_rect.right, width),
+            min(crop_rect.bottom, height),
+        )
+        crop_rect = Rect(*crop_box)
+        if crop_box == (0, 0, *pillow_image.size) and size == pillow_image.size:
+            return pillow_image
+
+        if (crop_rect.width, crop_rect.height) == size and all(
+            edge == int(edge) for edge in crop_box
+        ):
+            return pillow_image.crop(tuple(int(edge) for edge in crop_box))
+
+        return pillow_image.resize(size, PILImage.Resampling.LANCZOS, box=crop_box)
+
+    @contextmanager
+    def timed(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = self.timings.get(step, 0) + (
+                time.perf_counter() - start
+            ) * 1000
+
+    def run(self, image, output, source=None):
+        self.timings = {}
+        if image.is_svg():
+            with self.timed("wagtail"):
+                return super().run(image, output, source=source)
+
+        with self.open_source(image, source) as (source_file, is_original):
+            with self.timed("decode"):
+                pillow_image = PILImage.open(source_file)
+            original_format = self.get_original_format(image, pillow_image, is_original)
+
+            if getattr(pillow_image, "is_animated", False):
+                # Animated images keep Wagtail's handling, which preserves frames
+                source_file.seek(0)
+                with self.timed("wagtail"):
+                    return super().run(image, output, source=source_file)
+
+            # Plan the crop from the header alone, before any pixels are decoded
+            width, height = pillow_image.size
+            if pillow_image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            full_size, scale = self.get_source_size(image, (width, height))
+            transform = self.get_transform(image, full_size)
+            mode, operations = self.plan_operations()
+
+            with self.timed("decode"):
+                self.draft(pillow_image, transform, scale, mode)
+                pillow_image.load()
+            with self.timed("orient"):
+                ImageOps.exif_transpose(pillow_image, in_place=True)
+            with self.timed("convert"):
+                pillow_image = self.convert(pillow_image, mode)
+
+            # The decoded image may be smaller than the original, either
+            # through draft mode or because it is the working copy
+            _, scale = self.get_source_size(image, pillow_image.size)
+            crop_rect = transform.get_rect()
+            with self.timed("resize"):
+                pillow_image = self.crop_and_resize(
+                    pillow_image,
+                    Rect(
+                        crop_rect.left / scale,
+                        crop_rect.top / scale,
+                        crop_rect.right / scale,
+                        crop_rect.bottom / scale,
+                    ),
+                    transform.size,
+                )
+
+            willow = PillowImage(pillow_image)
+            env = {"original-format": original_format}
+            for operation in operations:
+                with self.timed(operation.method):
+                    willow = operation.run(willow, image, env) or willow
+
+            with self.timed("encode"):
+                result = self.save(willow, output, env)
+
+        logger.debug(
+            "Generated rendition '%s' of image %s: %s",
+            self.spec,
+            image.pk,
+            ", ".join(f"{step} {ms:.1f}ms" for step, ms in self.timings.items()),
+        )
+        return result
+
+    def get_output_format(self, env):
+        if "output-format" in env:
+            return env["output-format"]
+
+        # Convert avif, bmp, webp and (unanimated) gif to png, and heic to
+        # jpg, by default
+        default_conversions = {
+            "avif": "png",
+            "bmp": "png",
+            "webp": "png",
+            "heic": "jpeg",
+            "gif": "png",
+        }
+        default_conversions.update(
+            getattr(settings, "WAGTAILIMAGES_FORMAT_CONVERSIONS", {})
+        )
+        return default_conversions.get(env["original-format"], env["original-format"])
+
+    def save(self, willow, output, env):
+        output_format = self.get_output_format(env)
+        lossless = "lossless" in env.get("output-format-options", ())
+
+        if output_format == "jpeg":
+            # If the image has an alpha channel, give it a white background
+            if willow.has_alpha():
+                willow = willow.set_background_color_rgb((255, 255, 255))
+            return willow.save_as_jpeg(
+                output,
+                quality=env.get(
+                    "jpeg-quality", getattr(settings, "WAGTAILIMAGES_JPEG_QUALITY", 85)
+                ),
+                progressive=True,
+                optimize=True,
+            )
+        elif output_format == "png":
+            return willow.save_as_png(output, optimize=True)
+        elif output_format == "gif":
+            return willow.save_as_gif(output)
+        elif output_format == "webp":
+            if lossless:
+                return willow.save_as_webp(output, lossless=True)
+            return willow.save_as_webp(
+                output,
+                quality=env.get(
+                    "webp-quality", getattr(settings, "WAGTAILIMAGES_WEBP_QUALITY", 80)
+                ),
+            )
+        elif output_format == "avif":
+            return self.save_as_avif(willow, output, env)
+        elif output_format == "heic":
+            if lossless:
+                return willow.save_as_heic(output, lossless=True)
+            return willow.save_as_heic(
+                output,
+                quality=env.get(
+                    "heic-quality", getattr(settings, "WAGTAILIMAGES_HEIC_QUALITY", 80)
+                ),
+            )
+        elif output_format == "ico":
+            return willow.save_as_ico(output)
+
+        raise UnknownOutputImageFormatError(
+            f"Unknown output image format '{output_format}'"
+        )
+
+    def save_as_avif(self, willow, output, env):
+        lossless = "lossless" in env.get("output-format-options", ())
+        kwargs = {
+            "speed": env.get("avif-speed", getattr(settings, "IMAGE_AVIF_SPEED", 6)),
+        }
+        if lossless:
+            # Quality of 100 implies lossless (according to libavif documentation)
+            kwargs.update(quality=100, subsampling="4:4:4")
+        else:
+            kwargs["quality"] = env.get(
+                "avif-quality", getattr(settings, "WAGTAILIMAGES_AVIF_QUALITY", 80)
+            )
+
+        pillow_image = willow.image
+        if pillow_image.mode in ("RGB", "RGBA"):
+            if icc_profile := pillow_image.info.get("icc_profile"):
+                kwargs["icc_profile"] = icc_profile
+        else:
+            # Grayscale, palette and CMYK sources are encoded as RGB(A). Any
+            # embedded profile no longer describes the pixels, so it is dropped.
+            pillow_image = pillow_image.convert("RGBA" if willow.has_alpha() else "RGB")
+
+        pillow_image.save(output, "AVIF", **kwargs)
+        return AvifImageFile(output)
@@ -0,0 +1,55 @@
+import logging
+from functools import cache
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image as PILImage
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def avif_supported() -> bool:
+    """
+    Return whether the installed Pillow build can encode AVIF.
+
+    A single pixel is encoded rather than trusting `PIL.features`, as some
+    builds register the plugin without a working encoder.
+    """
+    try:
+        PILImage.new("RGB", (1, 1)).save(BytesIO(), "AVIF")
+    except (KeyError, OSError, ValueError):
+        return False
+    return True
+
+
+def get_avif_fallback_format() -> str:
+    """
+    The output format used in place of AVIF when the encoder is unavailable.
+    """
+    return getattr(settings, "IMAGE_AVIF_FALLBACK_FORMAT", "webp")
+
+
+def check_image_formats():
+    """
+    Warn when this Pillow build cannot encode AVIF. Called once at startup
+    so the fallback is visible in the deploy logs.
+    """
+    if not avif_supported():
+        logger.warning(
+            "AVIF encoding unavailable in this Pillow build, "
+            "'format-avif' renditions will be served as '%s'",
+            get_avif_fallback_format(),
+        )
+
+
+def get_pregenerate_rendition_specs() -> list[str]:
+    """
+    The `IMAGE_PREGENERATE_RENDITIONS` filter specs this build can produce.
+    AVIF specs are dropped when the encoder is unavailable, as they would
+    only duplicate the fallback format renditions.
+    """
+    specs = getattr(settings, "IMAGE_PREGENERATE_RENDITIONS", [])
+    if avif_supported():
+        return list(specs)
+    return [spec for spec in specs if "format-avif" not in spec.split("|")]
@@ -0,0 +1,59 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PILImage
+from PIL import ImageOps
+
+
+def get_working_max_edge() -> int:
+    return getattr(settings, "IMAGE_WORKING_MAX_EDGE", 4000)
+
+
+def make_working_image(f, file_name):
+    """
+    Return a `ContentFile` holding a copy of the image in `f` scaled down so
+    its longest edge is at most `IMAGE_WORKING_MAX_EDGE`, or None when the
+    image is already small enough (or can't be safely re-encoded).
+
+    The copy is orientation-corrected and stored as JPEG, or PNG when it has
+    transparency, so renditions can be decoded from it in draft mode.
+    """
+    max_edge = get_working_max_edge()
+    pillow_image = PILImage.open(f)
+
+    if getattr(pillow_image, "is_animated", False) or max(pillow_image.size) <= max_edge:
+        return None
+
+    # Ask the JPEG decoder for the smallest scale still at least max_edge
+    # wide, so the full-size original never needs to be held in memory
+    ratio = max_edge / max(pillow_image.size)
+    pillow_image.draft(
+        pillow_image.mode,
+        (round(pillow_image.width * ratio), round(pillow_image.height * ratio)),
+    )
+    icc_profile = pillow_image.info.get("icc_profile")
+    pillow_image = ImageOps.exif_transpose(pillow_image)
+    pillow_image.thumbnail((max_edge, max_edge), PILImage.Resampling.LANCZOS)
+
+    has_alpha = pillow_image.mode in ("RGBA", "LA", "PA") or (
+        pillow_image.mode == "P" and "transparency" in pillow_image.info
+    )
+    kwargs = {}
+    if has_alpha:
+        image_format, extension = "PNG", ".png"
+        pillow_image = pillow_image.convert("RGBA")
+    else:
+        image_format, extension = "JPEG", ".jpg"
+        kwargs.update(quality=95, subsampling=0)
+        if pillow_image.mode not in ("RGB", "L"):
+            pillow_image = pillow_image.convert("RGB")
+            icc_profile = None
+    if icc_profile:
+        kwargs["icc_profile"] = icc_profile
+
+    output = BytesIO()
+    pillow_image.save(output, image_format, **kwargs)
+    name = os.path.splitext(os.path.basename(file_name))[0] + extension
+    return ContentFile(output.getvalue(), name=name)
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_lock_cache():
+    return caches[getattr(settings, "IMAGE_RENDITION_LOCK_CACHE", "default")]
+
+
+def get_rendition_lock_key(image, filter) -> str:
+    return f"rendition-lock:{image.pk}:{filter.spec}:{filter.get_cache_key(image)}"
+
+
+@contextmanager
+def rendition_lock(key):
+    """
+    Try to take the lock `key` in the shared cache, without waiting, and
+    yield whether it was acquired.
+
+    `cache.add()` only sets missing keys, atomically on every backend we
+    use, so one process wins. The lock expires after
+    `IMAGE_RENDITION_LOCK_TIMEOUT` seconds in case its holder dies.
+    """
+    cache = get_lock_cache()
+    token = uuid4().hex
+    acquired = cache.add(
+        key, token, timeout=getattr(settings, "IMAGE_RENDITION_LOCK_TIMEOUT", 60)
+    )
+    try:
+        yield acquired
+    finally:
+        # Don't release a lock that expired and was taken by someone else
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
@@ -0,0 +1,123 @@
+import os
+import statistics
+import time
+from io import BytesIO
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from PIL import Image as PILImage
+from PIL import ImageChops, ImageStat
+from wagtail.images.models import Filter
+
+from KNI.images.filters import RenditionFilter
+from KNI.images.management.commands.benchmark_renditions import (
+    collect_image_files,
+    default_benchmark_paths,
+)
+from KNI.images.models import CustomImage
+
+# The specs the templates request
+DEFAULT_SPECS = [
+    "fill-60x60|format-webp|gray",
+    "fill-800x600|format-webp",
+    "fill-1600x1200|format-jpeg",
+    "width-1000|format-webp",
+    "width-2000|format-jpeg",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the fused rendition pipeline (RenditionFilter) with "
+        "Wagtail's operation-by-operation Willow chain on a set of images. "
+        "No database access; results are printed as a table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Image files or directories. Defaults to the fixture images "
+            "and the images in MEDIA_ROOT/original_images.",
+        )
+        parser.add_argument(
+            "--spec",
+            action="append",
+            dest="specs",
+            help="Filter spec to benchmark, e.g. 'fill-60x60|gray'. Can be repeated.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def time_filter(self, filter, image, source_bytes, repeat):
+        timings = []
+        for _ in range(repeat):
+            output = BytesIO()
+            start = time.perf_counter()
+            filter.run(image, output, source=File(BytesIO(source_bytes), name=image.file.name))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), output.getvalue()
+
+    def get_difference(self, willow_bytes, fused_bytes):
+        """
+        Mean absolute difference per channel (0-255) between two renditions.
+        """
+        with PILImage.open(BytesIO(willow_bytes)) as a, PILImage.open(BytesIO(fused_bytes)) as b:
+            if a.size != b.size:
+                return None
+            mode = "L" if a.mode == b.mode == "L" else "RGB"
+            difference = ImageChops.difference(a.convert(mode), b.convert(mode))
+            return statistics.mean(ImageStat.Stat(difference).mean)
+
+    def handle(self, **options):
+        specs = options["specs"] or DEFAULT_SPECS
+        files = list(collect_image_files(options["paths"] or default_benchmark_paths()))
+        if not files:
+            self.stderr.write("No images found.")
+            return
+
+        totals = {"willow": 0.0, "fused": 0.0}
+        step_totals = {}
+        self.stdout.write(
+            f"{'image':<28} {'spec':<30} {'willow ms':>10} {'fused ms':>9} "
+            f"{'speedup':>8} {'diff':>6}  fused steps"
+        )
+        for path in files:
+            with open(path, "rb") as f:
+                source_bytes = f.read()
+            with PILImage.open(BytesIO(source_bytes)) as pillow_image:
+                width, height = pillow_image.size
+            # Unsaved, so no database is needed
+            image = CustomImage(
+                file=os.path.basename(path), width=width, height=height, collection_id=None
+            )
+
+            for spec in specs:
+                willow_ms, willow_bytes = self.time_filter(
+                    Filter(spec=spec), image, source_bytes, options["repeat"]
+                )
+                fused = RenditionFilter(spec=spec)
+                fused_ms, fused_bytes = self.time_filter(
+                    fused, image, source_bytes, options["repeat"]
+                )
+                totals["willow"] += willow_ms
+                totals["fused"] += fused_ms
+                for step, ms in fused.timings.items():
+                    step_totals[step] = step_totals.get(step, 0) + ms
+
+                difference = self.get_difference(willow_bytes, fused_bytes)
+                steps = ", ".join(f"{step} {ms:.1f}" for step, ms in fused.timings.items())
+                self.stdout.write(
+                    f"{os.path.basename(path)[:28]:<28} {spec[:30]:<30} {willow_ms:>10.1f} "
+                    f"{fused_ms:>9.1f} {willow_ms / fused_ms:>7.1f}x "
+                    f"{'-' if difference is None else f'{difference:.2f}':>6}  {steps}"
+                )
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"total: willow {totals['willow']:.1f}ms, fused {totals['fused']:.1f}ms "
+            f"({totals['willow'] / totals['fused']:.1f}x)"
+        )
+        self.stdout.write(
+            "fused steps (last run of each): "
+            + ", ".join(f"{step} {ms:.1f}ms" for step, ms in step_totals.items())
+        )
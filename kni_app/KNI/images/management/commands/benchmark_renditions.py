@@ -0,0 +1,130 @@
+import os
+import statistics
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from PIL import Image as PILImage
+
+from KNI.images.filters import RenditionFilter
+from KNI.images.formats import avif_supported
+from KNI.images.models import CustomImage
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif")
+
+
+def default_benchmark_paths():
+    return [
+        path
+        for path in (
+            os.path.join(settings.BASE_DIR, "fixtures", "media", "original_images"),
+            os.path.join(settings.MEDIA_ROOT, "original_images"),
+            os.path.join(settings.BASE_DIR, "static_src", "images"),
+        )
+        if os.path.isdir(path)
+    ]
+
+
+def collect_image_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for file_name in sorted(os.listdir(path)):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(path, file_name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare encode time and output size of rendition formats on a set "
+        "of images. No database access; results are printed as a table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Image files or directories. Defaults to the fixture images "
+            "and the images in MEDIA_ROOT/original_images.",
+        )
+        parser.add_argument(
+            "--size",
+            action="append",
+            dest="sizes",
+            help="Resize operation to benchmark, e.g. 'fill-800x600'. Can be repeated.",
+        )
+        parser.add_argument(
+            "--avif-speed",
+            action="append",
+            dest="avif_speeds",
+            type=int,
+            help="AVIF encoder speed to benchmark. Can be repeated.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def get_format_specs(self, avif_speeds):
+        specs = [
+            ("jpeg", "format-jpeg"),
+            ("webp", "format-webp"),
+        ]
+        if avif_supported():
+            specs += [
+                (f"avif s{speed}", f"format-avif|avifspeed-{speed}")
+                for speed in avif_speeds
+            ]
+        else:
+            self.stderr.write("AVIF encoding unavailable, skipping AVIF.")
+        return specs
+
+    def time_rendition(self, image, source_bytes, spec, repeat):
+        filter = RenditionFilter(spec=spec)
+        timings = []
+        for _ in range(repeat):
+            output = BytesIO()
+            start = time.perf_counter()
+            filter.run(image, output, source=File(BytesIO(source_bytes), name=image.file.name))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), output.getbuffer().nbytes
+
+    def handle(self, **options):
+        sizes = options["sizes"] or ["fill-800x600", "fill-1600x1200"]
+        format_specs = self.get_format_specs(options["avif_speeds"] or [4, 6, 8])
+        files = list(collect_image_files(options["paths"] or default_benchmark_paths()))
+        if not files:
+            self.stderr.write("No images found.")
+            return
+
+        totals = {label: [0.0, 0] for label, _ in format_specs}
+        self.stdout.write(f"{'image':<32} {'size':<16} {'format':<10} {'ms':>9} {'bytes':>10}")
+        for path in files:
+            with open(path, "rb") as f:
+                source_bytes = f.read()
+            with PILImage.open(BytesIO(source_bytes)) as pillow_image:
+                width, height = pillow_image.size
+            # Unsaved, so no database is needed
+            image = CustomImage(
+                file=os.path.basename(path), width=width, height=height, collection_id=None
+            )
+
+            for size in sizes:
+                for label, format_spec in format_specs:
+                    ms, nbytes = self.time_rendition(
+                        image, source_bytes, f"{size}|{format_spec}", options["repeat"]
+                    )
+                    totals[label][0] += ms
+                    totals[label][1] += nbytes
+                    self.stdout.write(
+                        f"{os.path.basename(path)[:32]:<32} {size:<16} {label:<10} {ms:>9.1f} {nbytes:>10}"
+                    )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'format':<10} {'total ms':>10} {'total bytes':>12} {'vs jpeg':>8} {'vs webp':>8}")
+        jpeg_bytes, webp_bytes = totals["jpeg"][1], totals["webp"][1]
+        for label, (ms, nbytes) in totals.items():
+            self.stdout.write(
+                f"{label:<10} {ms:>10.1f} {nbytes:>12} "
+                f"{(1 - nbytes / jpeg_bytes) * 100:>7.1f}% {(1 - nbytes / webp_bytes) * 100:>7.1f}%"
+            )
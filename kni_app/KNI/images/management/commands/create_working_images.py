@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Greatest
+from wagtail.images import get_image_model
+
+from KNI.images.ingest import get_working_max_edge
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the bounded-size working copies renditions are generated from, "
+        "for existing images larger than IMAGE_WORKING_MAX_EDGE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recreate working copies that already exist.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, **options):
+        images = (
+            get_image_model()
+            .objects.alias(max_edge=Greatest("width", "height"))
+            .filter(max_edge__gt=get_working_max_edge())
+            .order_by("pk")
+        )
+        if not options["force"]:
+            images = images.filter(working_file="")
+
+        created = failed = 0
+        for image in images.iterator(chunk_size=options["batch_size"]):
+            if image.is_svg():
+                continue
+            try:
+                image.update_working_file()
+                image.save(update_fields=["working_file"])
+            except Exception as e:  # noqa: BLE001
+                # A missing or corrupt original shouldn't stop the run
+                failed += 1
+                self.stderr.write(f"Image {image.pk} ({image.file.name}): {e}")
+            else:
+                created += 1
+
+        self.stdout.write(f"Created {created} working image(s), {failed} failed.")
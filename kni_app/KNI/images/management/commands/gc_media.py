@@ -0,0 +1,217 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.images.exceptions import InvalidFilterSpecError
+from wagtail.images.models import Filter
+
+from KNI.images.specs import get_rendition_specs_in_use, normalize_spec
+from KNI.utils.storage import walk_storage
+
+
+def get_upload_dir(model, field_name):
+    """
+    The storage folder `model.field_name` uploads files to.
+    """
+    field = model._meta.get_field(field_name)
+    return field.generate_filename(model(), "x").rpartition("/")[0]
+
+
+def iterate_in_batches(queryset, batch_size):
+    """
+    Yield lists of rows from a `values()` queryset in primary key order,
+    without holding a cursor open between batches.
+    """
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]["pk"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete renditions that can no longer be served (stale focal point, "
+        "unused filter spec or missing file) and media files no database row "
+        "refers to. Safe to run while the site is serving: files younger than "
+        "--min-age are left alone, as they may belong to a row being created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything.",
+        )
+        parser.add_argument(
+            "--unused-specs",
+            action="store_true",
+            help="Also delete renditions whose filter spec no template, rich text "
+            "format or setting requests (see KNI.images.specs). They are "
+            "regenerated if requested again.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Only delete orphaned files older than this many seconds.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Parallel file deletions."
+        )
+
+    def handle(self, **options):
+        self.dry_run = options["dry_run"]
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+
+        self.collect_renditions(options["unused_specs"])
+
+        Image = get_image_model()
+        cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+        for model, field_name in (
+            (Image.get_rendition_model(), "file"),
+            (Image, "file"),
+            (Image, "working_file"),
+            (get_document_model(), "file"),
+        ):
+            self.collect_orphaned_files(model, field_name, cutoff)
+
+        self.report_missing_originals(Image)
+
+    def get_rendition_problem(self, rendition, image, specs_in_use, file_names, storage):
+        # Renditions created since the listing aren't in it, so check again
+        if rendition["file"] not in file_names and not storage.exists(rendition["file"]):
+            return "missing file"
+        try:
+            focal_point_key = Filter(spec=rendition["filter_spec"]).get_cache_key(image)
+        except InvalidFilterSpecError:
+            return "invalid spec"
+        if focal_point_key != rendition["focal_point_key"]:
+            return "stale focal point"
+        if specs_in_use is not None and (
+            normalize_spec(rendition["filter_spec"]) not in specs_in_use
+        ):
+            return "unused spec"
+        return None
+
+    def collect_renditions(self, unused_specs):
+        Image = get_image_model()
+        Rendition = Image.get_rendition_model()
+        storage = Rendition._meta.get_field("file").storage
+        specs_in_use = get_rendition_specs_in_use() if unused_specs else None
+
+        # Listed up front, so checking each row costs no storage requests
+        file_names = set(walk_storage(storage, get_upload_dir(Rendition, "file")))
+
+        counts = {}
+        renditions = Rendition.objects.values("pk", "image_id", "filter_spec", "focal_point_key", "file")
+        for batch in iterate_in_batches(renditions, self.batch_size):
+            images = Image.objects.only(
+                "width",
+                "height",
+                "focal_point_x",
+                "focal_point_y",
+                "focal_point_width",
+                "focal_point_height",
+            ).in_bulk({rendition["image_id"] for rendition in batch})
+
+            to_delete = []
+            for rendition in batch:
+                image = images.get(rendition["image_id"])
+                if image is None:
+                    # Deleted since the batch was fetched, along with its renditions
+                    continue
+                problem = self.get_rendition_problem(
+                    rendition, image, specs_in_use, file_names, storage
+                )
+                if problem:
+                    counts[problem] = counts.get(problem, 0) + 1
+                    to_delete.append(rendition["pk"])
+
+            if to_delete and not self.dry_run:
+                # Deleting through the ORM purges them from the rendition cache
+                # and deletes their files once committed
+                with transaction.atomic():
+                    Rendition.objects.filter(pk__in=to_delete).delete()
+
+        verb = "Would delete" if self.dry_run else "Deleted"
+        for problem, count in sorted(counts.items()):
+            self.stdout.write(f"{verb} {count} rendition(s): {problem}")
+        if not counts:
+            self.stdout.write("No renditions to delete.")
+
+    def collect_orphaned_files(self, model, field_name, cutoff):
+        storage = model._meta.get_field(field_name).storage
+        upload_dir = get_upload_dir(model, field_name)
+        if not upload_dir:
+            return
+
+        candidates = set(walk_storage(storage, upload_dir))
+        for batch in iterate_in_batches(
+            model.objects.exclude(**{field_name: ""}).values("pk", field_name),
+            self.batch_size * 10,
+        ):
+            candidates.difference_update(row[field_name] for row in batch)
+
+        orphans = []
+        total_size = 0
+        for name in sorted(candidates):
+            try:
+                if storage.get_modified_time(name) > cutoff:
+                    continue
+                total_size += storage.size(name)
+            except (NotImplementedError, FileNotFoundError):
+                continue
+            orphans.append(name)
+
+        deleted = 0
+        if orphans and not self.dry_run:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for start in range(0, len(orphans), self.batch_size):
+                    batch = orphans[start : start + self.batch_size]
+                    # A row may have been saved since the files were listed
+                    claimed = set(
+                        model.objects.filter(**{f"{field_name}__in": batch}).values_list(
+                            field_name, flat=True
+                        )
+                    )
+                    batch = [name for name in batch if name not in claimed]
+                    deleted += len(batch)
+                    list(executor.map(storage.delete, batch))
+
+        label = f"{model._meta.label}.{field_name}"
+        if self.dry_run:
+            self.stdout.write(
+                f"Would delete {len(orphans)} orphaned file(s) in {upload_dir}/ "
+                f"({label}), {total_size / 1024 / 1024:.1f} MB"
+            )
+        else:
+            self.stdout.write(
+                f"Deleted {deleted} orphaned file(s) in {upload_dir}/ ({label})"
+            )
+
+    def report_missing_originals(self, Image):
+        storage = Image._meta.get_field("file").storage
+        missing = 0
+        file_names = set(walk_storage(storage, get_upload_dir(Image, "file")))
+        for batch in iterate_in_batches(Image.objects.values("pk", "file"), self.batch_size):
+            for image in batch:
+                if image["file"] not in file_names:
+                    missing += 1
+                    self.stderr.write(f"Image {image['pk']} is missing its original {image['file']}")
+        if missing:
+            self.stderr.write(
+                f"{missing} image(s) have no original file. They are reported, "
+                "not deleted, as pages may still use them."
+            )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from KNI.images.formats import get_pregenerate_rendition_specs
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate renditions ahead of time, so slow formats such as AVIF "
+        "are never encoded while a page is being rendered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--spec",
+            action="append",
+            dest="specs",
+            help="Filter spec to generate, e.g. 'format-avif|fill-800x600'. "
+            "Can be repeated. Defaults to IMAGE_PREGENERATE_RENDITIONS.",
+        )
+        parser.add_argument(
+            "--image",
+            action="append",
+            dest="image_ids",
+            type=int,
+            help="Only generate renditions for this image ID. Can be repeated.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, **options):
+        specs = options["specs"] or get_pregenerate_rendition_specs()
+        if not specs:
+            self.stdout.write("No rendition specs to generate.")
+            return
+
+        images = get_image_model().objects.order_by("pk")
+        if options["image_ids"]:
+            images = images.filter(pk__in=options["image_ids"])
+
+        generated = failed = 0
+        for image in images.iterator(chunk_size=options["batch_size"]):
+            if image.is_svg():
+                continue
+            try:
+                image.get_renditions(*specs)
+            except Exception as e:  # noqa: BLE001
+                # A missing or corrupt original shouldn't stop the run
+                failed += 1
+                self.stderr.write(f"Image {image.pk} ({image.file.name}): {e}")
+            else:
+                generated += 1
+
+        self.stdout.write(
+            f"Generated {len(specs)} rendition(s) for {generated} image(s), "
+            f"{failed} failed."
+        )
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from wagtail.images import get_image_model
+
+from KNI.images.duplicates import find_duplicate_hashes, merge_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Find images with identical file contents and merge each set into the "
+        "oldest: pages, snippets and rich text using a duplicate are pointed "
+        "at the kept image, then the duplicate, its file and its renditions "
+        "are deleted, unless drafts or past revisions still use it. Run "
+        "`rebuild_references_index` first if the reference index may be out "
+        "of date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the duplicates without merging them. Missing file "
+            "hashes are still recorded.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def backfill_file_hashes(self, Image, batch_size):
+        """
+        Hash images uploaded before hashes were recorded, reading each file
+        in chunks.
+        """
+        hashed = 0
+        for image in Image.objects.filter(file_hash="").iterator(chunk_size=batch_size):
+            try:
+                image._set_file_hash()
+            except OSError as e:
+                self.stderr.write(f"Image {image.pk} ({image.file.name}): {e}")
+                continue
+            Image.objects.filter(pk=image.pk).update(file_hash=image.file_hash)
+            hashed += 1
+        if hashed:
+            self.stdout.write(f"Hashed {hashed} image(s).")
+
+    def handle(self, **options):
+        Image = get_image_model()
+        self.backfill_file_hashes(Image, options["batch_size"])
+
+        merged = kept = 0
+        for file_hash in find_duplicate_hashes(Image.objects.all()).iterator():
+            original, *duplicates = Image.objects.filter(file_hash=file_hash).order_by("pk")
+            for duplicate in duplicates:
+                self.stdout.write(
+                    f"Image {duplicate.pk} '{duplicate.title}' duplicates "
+                    f"{original.pk} '{original.title}'"
+                )
+                if options["dry_run"]:
+                    continue
+
+                problems = merge_images(original, duplicate)
+                if problems:
+                    kept += 1
+                    self.stderr.write(
+                        f"  Kept image {duplicate.pk}, still used by: {', '.join(problems)}"
+                    )
+                else:
+                    merged += 1
+
+        if options["dry_run"]:
+            return
+        self.stdout.write(f"Merged {merged} duplicate image(s), {kept} still in use.")
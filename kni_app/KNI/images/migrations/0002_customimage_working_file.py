@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:32
+
+import KNI.images.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customimage',
+            name='working_file',
+            field=models.FileField(blank=True, editable=False, upload_to=KNI.images.models.get_working_upload_to),
+        ),
+    ]
@@ -1,25 +1,270 @@
+import logging
+import posixpath
+import time
+from contextlib import ExitStack, contextmanager
+
 from PIL import ImageOps
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from wagtail import hooks
 from wagtail.search import index
-from wagtail.images.models import AbstractImage, AbstractRendition, Image
+from wagtail.images.models import AbstractImage, AbstractRendition, Filter, Image
 from wagtail.images.image_operations import FilterOperation
+from wagtail.tasks import delete_file_from_storage_task
+from wagtail.utils.file import hash_filelike
+
+from KNI.images.deferred import get_rendition_serve_url, renditions_deferred
+from KNI.images.filters import RenditionFilter
+from KNI.images.ingest import make_working_image
+from KNI.images.locks import get_rendition_lock_key, rendition_lock
+
+logger = logging.getLogger(__name__)
+
+
+def get_working_upload_to(instance, filename):
+    return instance.get_working_upload_to(filename)
 
 
 class CustomImage(AbstractImage):
     admin_form_fields = Image.admin_form_fields
 
+    # A copy of oversized originals, scaled to IMAGE_WORKING_MAX_EDGE, that
+    # renditions are generated from. The original file is never modified.
+    working_file = models.FileField(
+        upload_to=get_working_upload_to, blank=True, editable=False
+    )
+
     search_fields = AbstractImage.search_fields + [index.SearchField("description")]
 
+    def save(self, *args, **kwargs):
+        previous_working_file = None
+        if self.file and not self.file._committed:
+            # A new file has been uploaded. Hash it (streaming) for duplicate
+            # detection: the admin forms do this already, other code paths
+            # creating images don't.
+            self._set_image_file_metadata()
+
+            # Make its working copy from the upload itself, so both are
+            # stored before any rendition is made
+            previous_working_file = self.working_file.name
+            self.update_working_file()
+            self.file.seek(0)
+
+        super().save(*args, **kwargs)
+
+        if previous_working_file and previous_working_file != self.working_file.name:
+            storage = self.working_file.storage
+            transaction.on_commit(
+                lambda: delete_file_from_storage_task.enqueue(
+                    storage.deconstruct(), previous_working_file
+                )
+            )
+
+    @classmethod
+    def get_or_create_for_file(cls, file, **kwargs):
+        """
+        Return an existing image with the same contents as `file`, or create
+        one from it with the given field values. Returns (image, created).
+        """
+        existing = cls.objects.filter(file_hash=hash_filelike(file)).order_by("pk").first()
+        if existing is not None:
+            return existing, False
+        return cls.objects.create(file=file, **kwargs), True
+
+    def find_duplicates(self):
+        """
+        Other images with the same file contents.
+        """
+        return type(self).objects.exclude(pk=self.pk).filter(file_hash=self.get_file_hash())
+
+    def get_working_upload_to(self, filename):
+        return posixpath.join("working_images", filename)
+
+    def update_working_file(self):
+        """
+        Create the working copy of the current file if it is oversized, or
+        clear it if not. The instance is not saved.
+        """
+        with self.open_file() as f:
+            working_file = make_working_image(f, self.file.name)
+
+        if working_file is None:
+            self.working_file = None
+        else:
+            self.working_file = working_file
+
+    @contextmanager
+    def open_rendition_source(self):
+        """
+        Open the file renditions should be generated from: the working copy
+        when there is one, otherwise the original. Yields the file and
+        whether it is the original.
+        """
+        if self.working_file:
+            try:
+                working_file = self.working_file.storage.open(self.working_file.name, "rb")
+            except OSError:
+                logger.warning(
+                    "Working copy %s of image %s is missing, using the original",
+                    self.working_file.name,
+                    self.pk,
+                )
+            else:
+                with working_file:
+                    yield working_file, False
+                return
+
+        with self.open_file() as original_file:
+            yield original_file, True
+
+    def generate_rendition_file(self, filter, *, source=None):
+        if self.working_file:
+            # `source` is always the original's contents, skip it for the
+            # (much smaller) working copy
+            source = None
+        return super().generate_rendition_file(
+            RenditionFilter.from_filter(filter), source=source
+        )
+
+    def get_rendition(self, filter):
+        if isinstance(filter, str):
+            filter = Filter(spec=filter)
+
+        rendition = super().get_rendition(filter)
+        if rendition.pk is None:
+            # An unsaved stand-in (see `get_stand_in_rendition()`): let the
+            # next request pick up the real rendition once it exists
+            Rendition = self.get_rendition_model()
+            Rendition.cache_backend.delete(
+                Rendition.construct_cache_key(
+                    self, filter.get_cache_key(self), filter.spec
+                )
+            )
+        return rendition
+
+    def create_rendition(self, filter):
+        """
+        Create the rendition while holding its lock, so concurrent requests
+        for the same missing rendition (e.g. right after a publish) only
+        generate it once. Requests that don't get the lock wait up to
+        `IMAGE_RENDITION_LOCK_WAIT` seconds for it to appear, then fall back
+        to the original image.
+        """
+        if renditions_deferred():
+            return self.get_deferred_rendition(filter)
+
+        Rendition = self.get_rendition_model()
+        lock_key = get_rendition_lock_key(self, filter)
+        lookup = {
+            "filter_spec": filter.spec,
+            "focal_point_key": filter.get_cache_key(self),
+        }
+        deadline = time.monotonic() + getattr(settings, "IMAGE_RENDITION_LOCK_WAIT", 10)
+        while True:
+            with rendition_lock(lock_key) as acquired:
+                if acquired:
+                    # It may have been created while this request waited
+                    try:
+                        return self.renditions.get(**lookup)
+                    except Rendition.DoesNotExist:
+                        return super().create_rendition(filter)
+
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(getattr(settings, "IMAGE_RENDITION_LOCK_POLL_INTERVAL", 0.2))
+            try:
+                return self.renditions.get(**lookup)
+            except Rendition.DoesNotExist:
+                pass
+
+        logger.warning(
+            "Timed out waiting for rendition '%s' of image %s, using the original",
+            filter.spec,
+            self.pk,
+        )
+        return self.get_fallback_rendition(filter)
+
+    def create_renditions(self, *filters):
+        if renditions_deferred():
+            return {filter: self.get_deferred_rendition(filter) for filter in filters}
+        if len(filters) <= 1:
+            return super().create_renditions(*filters)
+
+        renditions = {}
+        with ExitStack() as stack:
+            locked = [
+                filter
+                for filter in filters
+                if stack.enter_context(
+                    rendition_lock(get_rendition_lock_key(self, filter))
+                )
+            ]
+            if len(locked) == 1:
+                # `super().create_renditions()` would hand a single filter to
+                # `self.create_rendition()`, which can't take the held lock
+                renditions[locked[0]] = super().create_rendition(locked[0])
+            elif locked:
+                renditions.update(super().create_renditions(*locked))
+
+        # Wait for those being generated elsewhere
+        for filter in filters:
+            if filter not in renditions:
+                renditions[filter] = self.create_rendition(filter)
+        return renditions
+
+    def get_stand_in_rendition(self, filter):
+        """
+        An unsaved rendition pointing at the original file, sized as the
+        rendition `filter` would produce. It is never cached.
+        """
+        width, height = filter.get_transform(self).size
+        rendition = self.get_rendition_model()(
+            image=self,
+            filter_spec=filter.spec,
+            focal_point_key=filter.get_cache_key(self),
+            file=self.file.name,
+            width=width,
+            height=height,
+        )
+        # Stops `get_renditions()` caching it
+        rendition._from_cache = True
+        return rendition
+
+    def get_fallback_rendition(self, filter):
+        """
+        Used in place of a rendition when generating it timed out.
+        """
+        rendition = self.get_stand_in_rendition(filter)
+        rendition.is_fallback = True
+        return rendition
+
+    def get_deferred_rendition(self, filter):
+        """
+        Used in place of a missing rendition while generation is deferred,
+        its URL pointing at the view that generates it.
+        """
+        rendition = self.get_stand_in_rendition(filter)
+        rendition.deferred_url = get_rendition_serve_url(self, filter)
+        return rendition
+
 
 class Rendition(AbstractRendition):
     image = models.ForeignKey(
         "CustomImage", related_name="renditions", on_delete=models.CASCADE
     )
 
+    # Set on the unsaved stand-ins returned by `CustomImage.get_fallback_rendition()`
+    # and `CustomImage.get_deferred_rendition()`
+    is_fallback = False
+    deferred_url = None
+
     class Meta:
         unique_together = (("image", "filter_spec", "focal_point_key"),)
 
+    @property
+    def url(self):
+        return self.deferred_url or super().url
+
     @property
     def object_position_style(self):
         """
@@ -38,16 +283,39 @@ class Rendition(AbstractRendition):
 
 
 class GrayscaleOperation(FilterOperation):
+    # Lets `RenditionFilter` decode straight to grayscale
+    output_mode = "L"
+
     def construct(self):
         pass
 
     def run(self, willow, image, env):
-        willow.image = ImageOps.grayscale(willow.image)
+        if willow.image.mode != "L":
+            willow.image = ImageOps.grayscale(willow.image)
         return willow
 
 
+class AvifSpeedOperation(FilterOperation):
+    """
+    Sets the AVIF encoder speed, from 0 (slowest, smallest files) to 10
+    (fastest), e.g. `format-avif avifspeed-8`.
+    """
+
+    env_only = True
+
+    def construct(self, speed):
+        self.speed = int(speed)
+
+        if not 0 <= self.speed <= 10:
+            raise ValueError("AVIF speed must be between 0 and 10")
+
+    def run(self, willow, image, env):
+        env["avif-speed"] = self.speed
+
+
 @hooks.register("register_image_operations")
 def register_image_operations():
     return [
         ("gray", GrayscaleOperation),
+        ("avifspeed", AvifSpeedOperation),
     ]
@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django_tasks.backends.immediate import ImmediateBackend
+from wagtail.images import get_image_model
+from wagtail.tasks import delete_file_from_storage_task
+
+from KNI.images.formats import get_pregenerate_rendition_specs
+from KNI.images.tasks import generate_renditions_task
+
+# Saving any of these fields invalidates existing renditions
+RENDITION_SOURCE_FIELDS = {
+    "file",
+    "focal_point_x",
+    "focal_point_y",
+    "focal_point_width",
+    "focal_point_height",
+}
+
+
+def pregenerate_renditions(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+
+    if update_fields is not None and not RENDITION_SOURCE_FIELDS & set(update_fields):
+        return
+
+    # Only with a background worker: encoding them would otherwise hold up
+    # the upload request, so they're left to the `generate_renditions`
+    # command
+    if isinstance(generate_renditions_task.get_backend(), ImmediateBackend):
+        return
+
+    if specs := get_pregenerate_rendition_specs():
+        # Once committed, so the worker finds the image and its new file
+        transaction.on_commit(lambda: generate_renditions_task.enqueue(instance.pk, specs))
+
+
+def post_delete_working_file_cleanup(instance, **kwargs):
+    if instance.working_file:
+        transaction.on_commit(
+            lambda: delete_file_from_storage_task.enqueue(
+                instance.working_file.storage.deconstruct(), instance.working_file.name
+            )
+        )
+
+
+def register_signal_handlers():
+    Image = get_image_model()
+
+    post_save.connect(pregenerate_renditions, sender=Image)
+    post_delete.connect(post_delete_working_file_cleanup, sender=Image)
@@ -0,0 +1,72 @@
+import os
+import re
+import shlex
+from functools import cache
+
+from django.conf import settings
+from django.template.utils import get_app_template_dirs
+from wagtail.images.formats import get_image_formats
+from wagtail.images.models import Filter
+
+# Renditions the Wagtail admin requests from Python code rather than templates
+ADMIN_RENDITION_SPECS = ["original", "max-165x165", "max-400x400", "max-800x600"]
+
+IMAGE_TAG_RE = re.compile(r"{%\s*(image|picture|srcset_image|avif_rendition)\s+(.*?)\s*%}")
+SPEC_TOKEN_RE = re.compile(r"^[a-z]+(-[\w.,{}]+)*$")
+
+
+def normalize_spec(spec: str) -> str:
+    """
+    Filter specs name the same rendition whatever order their operations
+    are listed in, as far as finding unused ones is concerned.
+    """
+    return "|".join(sorted(spec.split("|")))
+
+
+def get_template_dirs():
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(engine.get("DIRS", []))
+    return dirs + list(get_app_template_dirs("templates"))
+
+
+def get_template_specs(source):
+    """
+    The filter specs requested by the image tags in a template's source.
+    """
+    for tag, bits in IMAGE_TAG_RE.findall(source):
+        try:
+            bits = shlex.split(bits)
+        except ValueError:
+            continue
+        if "as" in bits:
+            bits = bits[: bits.index("as")]
+        # Drop the image variable and any HTML attributes
+        tokens = [bit for bit in bits[1:] if "=" not in bit and SPEC_TOKEN_RE.match(bit)]
+        if tag == "avif_rendition":
+            tokens.insert(0, "format-avif")
+        if tokens:
+            yield from Filter.expand_spec("|".join(tokens))
+
+
+@cache
+def get_rendition_specs_in_use() -> frozenset[str]:
+    """
+    Normalized filter specs that templates, rich text image formats,
+    pregeneration and the Wagtail admin may request. Specs built at runtime
+    have to be listed in `IMAGE_RENDITION_SPECS_IN_USE`.
+    """
+    specs = [
+        *ADMIN_RENDITION_SPECS,
+        *getattr(settings, "IMAGE_PREGENERATE_RENDITIONS", []),
+        *getattr(settings, "IMAGE_RENDITION_SPECS_IN_USE", []),
+        *(image_format.filter_spec for image_format in get_image_formats()),
+    ]
+    for template_dir in get_template_dirs():
+        for root, _, file_names in os.walk(template_dir):
+            for file_name in file_names:
+                if not file_name.endswith((".html", ".txt")):
+                    continue
+                with open(os.path.join(root, file_name), encoding="utf-8", errors="ignore") as f:
+                    specs.extend(get_template_specs(f.read()))
+    return frozenset(normalize_spec(spec) for spec in specs)
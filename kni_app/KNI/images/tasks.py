@@ -0,0 +1,17 @@
+from django_tasks import task
+from wagtail.images import get_image_model
+
+
+@task()
+def generate_renditions_task(image_id, filter_specs):
+    """
+    Generate the given renditions for an image, outside of the request
+    that triggered them.
+    """
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+    except get_image_model().DoesNotExist:
+        return
+
+    if filter_specs and not image.is_svg():
+        image.get_renditions(*filter_specs)
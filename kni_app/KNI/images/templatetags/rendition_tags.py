@@ -0,0 +1,37 @@
+from django import template
+from wagtail.images.models import Filter
+
+from KNI.images.formats import avif_supported
+
+register = template.Library()
+
+
+def get_existing_rendition(image, filter_spec):
+    """
+    Return the rendition of `image` for `filter_spec` if it has already
+    been generated, otherwise None. Never generates the rendition itself.
+    """
+    if not image:
+        return None
+
+    Rendition = image.get_rendition_model()
+    try:
+        return image.find_existing_rendition(Filter(spec=filter_spec))
+    except Rendition.DoesNotExist:
+        return None
+
+
+@register.simple_tag
+def avif_rendition(image, *filter_specs):
+    """
+    Return the AVIF rendition of `image` for the given filter specs, if it
+    exists. AVIF is slow to encode, so these renditions are only ever
+    generated off-request (see `IMAGE_PREGENERATE_RENDITIONS`); templates
+    should treat a missing value as "serve the other formats for now".
+
+    Usage:
+        {% avif_rendition page.listing_image "fill-800x600" as card_image_1x_avif %}
+    """
+    if not avif_supported():
+        return None
+    return get_existing_rendition(image, "|".join(("format-avif",) + filter_specs))
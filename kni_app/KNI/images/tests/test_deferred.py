@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from KNI.images.deferred import defer_renditions
+from KNI.images.models import CustomImage
+from KNI.images.tests.test_working_file import get_upload
+
+
+@override_settings(IMAGE_PREGENERATE_RENDITIONS=[])
+class DeferredRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.image = CustomImage.objects.create(title="Photo", file=get_upload(120, 90))
+
+    def test_deferred_rendition_is_not_generated(self):
+        with defer_renditions():
+            rendition = self.image.get_rendition("fill-40x30")
+
+        self.assertIsNone(rendition.pk)
+        self.assertTrue(rendition.url.startswith("/images/"))
+        self.assertEqual((rendition.width, rendition.height), (40, 30))
+        self.assertFalse(self.image.renditions.exists())
+
+    def test_existing_rendition_is_used(self):
+        existing = self.image.get_rendition("fill-40x30")
+
+        with defer_renditions():
+            rendition = CustomImage.objects.get(pk=self.image.pk).get_rendition("fill-40x30")
+
+        self.assertEqual(rendition.pk, existing.pk)
+        self.assertEqual(rendition.url, existing.file.url)
+
+    def test_serve_view_generates_rendition(self):
+        with defer_renditions():
+            renditions = self.image.get_renditions("fill-40x30", "width-60")
+
+        response = self.client.get(renditions["fill-40x30"].url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(
+            list(self.image.renditions.values_list("filter_spec", flat=True)),
+            ["fill-40x30"],
+        )
+
+    def test_serve_view_rejects_bad_signature(self):
+        with defer_renditions():
+            url = self.image.get_rendition("fill-40x30").url
+
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(url.replace("/images/", "/images/x", 1))
+
+        self.assertEqual(response.status_code, 403)
+
+
+
+@override_settings(IMAGE_PREGENERATE_RENDITIONS=["fill-40x30|format-webp"])
+class PregenerateRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    @mock.patch("KNI.images.signal_handlers.generate_renditions_task")
+    def test_renditions_queued_once_committed(self, generate_renditions_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = CustomImage.objects.create(title="Photo", file=get_upload(120, 90))
+            generate_renditions_task.enqueue.assert_not_called()
+
+        generate_renditions_task.enqueue.assert_called_once_with(
+            image.pk, ["fill-40x30|format-webp"]
+        )
+
+    def test_renditions_not_generated_in_the_request_without_a_worker(self):
+        # The test settings run tasks immediately
+        with self.captureOnCommitCallbacks(execute=True):
+            image = CustomImage.objects.create(title="Photo", file=get_upload(120, 90))
+
+        self.assertFalse(image.renditions.exists())
@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from wagtail.models import Page, ReferenceIndex
+from wagtail.rich_text import RichText
+
+from KNI.images.duplicates import merge_images
+from KNI.images.models import CustomImage
+from KNI.images.tests.test_working_file import get_upload
+from KNI.standardpages.models import StandardPage
+from KNI.utils.models import AuthorSnippet
+
+
+@override_settings(IMAGE_PREGENERATE_RENDITIONS=[])
+class DuplicateImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.original = CustomImage.objects.create(title="Original", file=get_upload(120, 90))
+        self.duplicate = CustomImage.objects.create(title="Copy", file=get_upload(120, 90, "copy.jpg"))
+
+    def test_uploads_are_hashed(self):
+        self.assertTrue(self.original.file_hash)
+        self.assertEqual(list(self.duplicate.find_duplicates()), [self.original])
+
+    def test_get_or_create_for_file_reuses_identical_image(self):
+        image, created = CustomImage.get_or_create_for_file(get_upload(120, 90), title="Again")
+
+        self.assertFalse(created)
+        self.assertEqual(image, self.original)
+
+    def test_merge_repoints_references(self):
+        embed = f'<embed embedtype="image" id="{self.duplicate.pk}" format="fullwidth" alt=""/>'
+        page = Page.objects.get(depth=1).add_child(
+            instance=StandardPage(
+                title="Page",
+                listing_image=self.duplicate,
+                body=[
+                    (
+                        "section",
+                        {"heading": "Heading", "content": [("paragraph", RichText(embed))]},
+                    )
+                ],
+            )
+        )
+        author = AuthorSnippet.objects.create(title="Author", image=self.duplicate)
+        ReferenceIndex.create_or_update_for_object(page)
+        ReferenceIndex.create_or_update_for_object(author)
+
+        problems = merge_images(self.original, self.duplicate)
+
+        self.assertEqual(problems, [])
+        self.assertFalse(CustomImage.objects.filter(pk=self.duplicate.pk).exists())
+        page = StandardPage.objects.get(pk=page.pk)
+        self.assertEqual(page.listing_image, self.original)
+        paragraph = page.body[0].value["content"][0].value.source
+        self.assertIn(f'id="{self.original.pk}"', paragraph)
+        author.refresh_from_db()
+        self.assertEqual(author.image, self.original)
+
+    def test_merge_keeps_image_with_unindexed_foreign_key(self):
+        AuthorSnippet.objects.create(title="Author", image=self.duplicate)
+
+        problems = merge_images(self.original, self.duplicate)
+
+        self.assertEqual(problems, ["utils.AuthorSnippet"])
+        self.assertTrue(CustomImage.objects.filter(pk=self.duplicate.pk).exists())
+
+    def test_merge_keeps_image_used_by_revisions(self):
+        page = Page.objects.get(depth=1).add_child(
+            instance=StandardPage(title="Page", listing_image=self.duplicate, body=[])
+        )
+        revision = page.save_revision()
+        page.listing_image = None
+        page.save_revision().publish()
+        ReferenceIndex.create_or_update_for_object(page)
+
+        problems = merge_images(self.original, self.duplicate)
+
+        self.assertEqual(
+            problems, [f"standardpages.StandardPage {page.pk} (revision {revision.pk})"]
+        )
+        self.assertTrue(CustomImage.objects.filter(pk=self.duplicate.pk).exists())
@@ -0,0 +1,65 @@
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.core.files import File
+from django.test import SimpleTestCase
+from PIL import Image as PILImage
+
+from KNI.images.filters import RenditionFilter
+from KNI.images.formats import avif_supported
+from KNI.images.models import CustomImage
+
+
+def get_test_image(width=64, height=48):
+    source = BytesIO()
+    PILImage.new("RGB", (width, height), "teal").save(source, "JPEG")
+    image = CustomImage(
+        file="original_images/test.jpg", width=width, height=height, collection_id=None
+    )
+    return image, source.getvalue()
+
+
+class RenditionFilterTests(SimpleTestCase):
+    def run_filter(self, spec):
+        image, source_bytes = get_test_image()
+        return RenditionFilter(spec=spec).run(
+            image, BytesIO(), source=File(BytesIO(source_bytes), name="test.jpg")
+        )
+
+    @mock.patch("KNI.images.filters.avif_supported", return_value=True)
+    def test_avif_output(self, _avif_supported):
+        generated = self.run_filter("fill-32x24|format-avif|avifspeed-10")
+        self.assertEqual(generated.format_name, "avif")
+
+    @mock.patch("KNI.images.filters.avif_supported", return_value=False)
+    def test_avif_falls_back_when_unsupported(self, _avif_supported):
+        generated = self.run_filter("fill-32x24|format-avif")
+        self.assertEqual(generated.format_name, "webp")
+
+    @skipUnless(avif_supported(), "AVIF encoding unavailable in this Pillow build")
+    def test_avif_of_grayscale_rendition(self):
+        generated = self.run_filter("fill-32x24|gray|format-avif|avifspeed-10")
+        self.assertEqual(generated.format_name, "avif")
+
+    def test_other_formats_unchanged(self):
+        generated = self.run_filter("fill-32x24|format-jpeg")
+        self.assertEqual(generated.format_name, "jpeg")
+
+    def test_gray_is_folded_into_decode(self):
+        filter = RenditionFilter(spec="fill-32x24|format-png|gray")
+        mode, operations = filter.plan_operations()
+        self.assertEqual(mode, "L")
+        self.assertEqual([operation.method for operation in operations], ["format"])
+
+        image, source_bytes = get_test_image()
+        output = BytesIO()
+        filter.run(image, output, source=File(BytesIO(source_bytes), name="test.jpg"))
+        self.assertNotIn("gray", filter.timings)
+        with PILImage.open(output) as rendition:
+            self.assertEqual(rendition.mode, "L")
+            self.assertEqual(rendition.size, (32, 24))
+
+    def test_gray_after_pixel_operation_is_not_folded(self):
+        mode, operations = RenditionFilter(spec="fill-32x24|bgcolor-fff|gray").plan_operations()
+        self.assertIsNone(mode)
+        self.assertEqual([operation.method for operation in operations], ["bgcolor", "gray"])
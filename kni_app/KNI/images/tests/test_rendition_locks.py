@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from wagtail.images.models import Filter
+
+from KNI.images.locks import get_lock_cache, get_rendition_lock_key
+from KNI.images.models import CustomImage, Rendition
+from KNI.images.tests.test_working_file import get_upload
+
+
+@override_settings(IMAGE_PREGENERATE_RENDITIONS=[], IMAGE_RENDITION_LOCK_WAIT=0)
+class RenditionLockTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.image = CustomImage.objects.create(title="Photo", file=get_upload(120, 90))
+
+    def hold_lock(self, spec):
+        key = get_rendition_lock_key(self.image, Filter(spec=spec))
+        get_lock_cache().add(key, "another-process")
+        self.addCleanup(get_lock_cache().delete, key)
+
+    def test_creates_rendition_and_releases_lock(self):
+        rendition = self.image.get_rendition("fill-40x30")
+
+        self.assertFalse(rendition.is_fallback)
+        self.assertTrue(Rendition.objects.filter(pk=rendition.pk).exists())
+        key = get_rendition_lock_key(self.image, Filter(spec="fill-40x30"))
+        self.assertIsNone(get_lock_cache().get(key))
+
+    def test_falls_back_to_original_while_locked(self):
+        self.hold_lock("fill-40x30")
+
+        with self.assertLogs("KNI.images.models", "WARNING"):
+            rendition = self.image.get_rendition("fill-40x30")
+
+        self.assertTrue(rendition.is_fallback)
+        self.assertEqual(rendition.url, self.image.file.url)
+        self.assertEqual((rendition.width, rendition.height), (40, 30))
+        self.assertFalse(self.image.renditions.exists())
+
+        # The fallback isn't cached, so the rendition is made once unlocked
+        get_lock_cache().clear()
+        image = CustomImage.objects.get(pk=self.image.pk)
+        self.assertFalse(image.get_rendition("fill-40x30").is_fallback)
+
+    def test_get_renditions_only_waits_for_locked_specs(self):
+        self.hold_lock("fill-40x30")
+
+        with self.assertLogs("KNI.images.models", "WARNING"):
+            renditions = self.image.get_renditions("fill-40x30", "width-60", "width-30")
+
+        self.assertTrue(renditions["fill-40x30"].is_fallback)
+        self.assertFalse(renditions["width-60"].is_fallback)
+        self.assertFalse(renditions["width-30"].is_fallback)
+        self.assertEqual(
+            set(self.image.renditions.values_list("filter_spec", flat=True)),
+            {"width-60", "width-30"},
+        )
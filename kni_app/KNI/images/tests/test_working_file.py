@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+
+from KNI.images.models import CustomImage
+
+
+def get_upload(width, height, name="photo.jpg"):
+    f = BytesIO()
+    # Left half red, right half blue, so crops can be checked
+    pillow_image = PILImage.new("RGB", (width, height), "red")
+    pillow_image.paste("blue", (width // 2, 0, width, height))
+    pillow_image.save(f, "JPEG", quality=95)
+    return SimpleUploadedFile(name, f.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(IMAGE_WORKING_MAX_EDGE=400, IMAGE_PREGENERATE_RENDITIONS=[])
+class WorkingFileTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def test_oversized_upload_gets_working_file(self):
+        image = CustomImage.objects.create(title="Big", file=get_upload(1600, 800))
+
+        self.assertEqual((image.width, image.height), (1600, 800))
+        self.assertTrue(image.working_file.name.startswith("working_images/"))
+        with image.working_file.open() as f:
+            self.assertEqual(PILImage.open(f).size, (400, 200))
+
+    def test_small_upload_has_no_working_file(self):
+        image = CustomImage.objects.create(title="Small", file=get_upload(300, 200))
+
+        self.assertFalse(image.working_file)
+
+    def test_rendition_crop_matches_original_coordinates(self):
+        image = CustomImage.objects.create(title="Big", file=get_upload(1600, 800))
+        # Focal point over the blue (right) half of the original
+        image.focal_point_x, image.focal_point_y = 1400, 400
+        image.focal_point_width, image.focal_point_height = 100, 100
+        image.save()
+
+        rendition = image.get_rendition("fill-50x50")
+
+        self.assertEqual((rendition.width, rendition.height), (50, 50))
+        with rendition.file.open() as f:
+            red, green, blue = PILImage.open(f).convert("RGB").getpixel((25, 25))
+        self.assertGreater(blue, red)
@@ -0,0 +1,72 @@
+import mimetypes
+
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from wagtail.images.exceptions import InvalidFilterSpecError
+from wagtail.images.models import Filter, SourceImageIOError
+from wagtail.images.utils import verify_signature
+from wagtail.images.views.serve import ServeView
+
+from KNI.images.deferred import get_rendition_version
+
+
+class RenditionServeView(ServeView):
+    """
+    Serves the signed rendition URLs emitted while rendition generation is
+    deferred, generating the rendition on first fetch.
+
+    Responses for the current version of a rendition are cacheable forever;
+    anything else (e.g. a link made before the focal point moved) for an hour.
+    """
+
+    def get(self, request, signature, image_id, filter_spec, filename=None):
+        if not verify_signature(signature.encode(), image_id, filter_spec, key=self.key):
+            raise PermissionDenied
+
+        image = get_object_or_404(self.model, id=image_id)
+
+        try:
+            filter = Filter(spec=filter_spec)
+            rendition = image.get_rendition(filter)
+        except SourceImageIOError:
+            return HttpResponse(
+                "Source image file not found", content_type="text/plain", status=410
+            )
+        except InvalidFilterSpecError:
+            return HttpResponse(
+                "Invalid filter spec: " + filter_spec,
+                content_type="text/plain",
+                status=400,
+            )
+
+        if rendition.is_fallback:
+            # Generating it timed out: point at the original for now
+            response = redirect(rendition.url)
+            add_never_cache_headers(response)
+            return response
+
+        response = getattr(self, self.action)(rendition)
+        if request.GET.get("v") == get_rendition_version(image, filter):
+            patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=3600)
+        return response
+
+    def serve(self, rendition):
+        # The rendition's extension always matches its format, so there's
+        # no need to open it with Willow to find the type
+        content_type, _ = mimetypes.guess_type(rendition.file.name)
+        response = FileResponse(
+            rendition.file.open("rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+
+        # Add a CSP header to prevent inline execution
+        response["Content-Security-Policy"] = "default-src 'none'"
+
+        # Prevent browsers from auto-detecting the content-type of a document
+        response["X-Content-Type-Options"] = "nosniff"
+
+        return response
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NavigationConfig(AppConfig):
     default_auto_field: str = "django.db.models.AutoField"
     name = "KNI.navigation"
+
+    def ready(self):
+        from KNI.navigation.signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
@@ -0,0 +1,48 @@
+from typing import NamedTuple
+
+from wagtail.models import Page, Site
+
+from KNI.utils.cache import ProcessCache
+
+
+class Breadcrumb(NamedTuple):
+    title: str
+    listing_title: str
+    url: str
+
+
+# (site ID, treebeard path) -> Breadcrumb. Cleared whenever any page's title,
+# URL or place in the tree may have changed
+breadcrumb_cache = ProcessCache("breadcrumbs-generation")
+
+
+def invalidate_breadcrumbs():
+    breadcrumb_cache.invalidate()
+
+
+def get_ancestor_paths(path):
+    """
+    The treebeard paths of the ancestors of the page at `path`, from the
+    site's home page down, without the root page.
+    """
+    steplen = Page.steplen
+    return [path[:length] for length in range(2 * steplen, len(path), steplen)]
+
+
+def get_breadcrumbs(page, request=None) -> list[Breadcrumb]:
+    breadcrumbs = breadcrumb_cache.get_data()
+    site = Site.find_for_request(request) if request else None
+    site_id = site.pk if site else None
+
+    paths = get_ancestor_paths(page.path or "")
+    missing = [path for path in paths if (site_id, path) not in breadcrumbs]
+    if missing:
+        for ancestor in Page.objects.filter(path__in=missing).specific():
+            breadcrumbs[(site_id, ancestor.path)] = Breadcrumb(
+                ancestor.title,
+                getattr(ancestor, "listing_title", ""),
+                ancestor.get_url(request) or "",
+            )
+    return [
+        breadcrumbs[(site_id, path)] for path in paths if (site_id, path) in breadcrumbs
+    ]
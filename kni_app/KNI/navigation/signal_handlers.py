@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete
+from wagtail.models import Page
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from KNI.navigation.breadcrumbs import invalidate_breadcrumbs
+
+
+def invalidate_breadcrumbs_for_page(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        invalidate_breadcrumbs()
+
+
+def register_signal_handlers():
+    # Publishing covers renames, as a page's live title only changes then
+    for signal in (page_published, page_unpublished, page_slug_changed, post_page_move):
+        signal.connect(invalidate_breadcrumbs_for_page)
+    post_delete.connect(invalidate_breadcrumbs_for_page)
@@ -0,0 +1,17 @@
+from django import template
+
+from KNI.navigation.breadcrumbs import get_breadcrumbs
+
+register = template.Library()
+
+
+@register.inclusion_tag("navigation/breadcrumbs.html", takes_context=True)
+def breadcrumbs(context):
+    """
+    The current page's ancestors, from a per-process cache of their titles
+    and URLs.
+    """
+    page = context.get("page")
+    return {
+        "breadcrumbs": get_breadcrumbs(page, context.get("request")) if page else [],
+    }
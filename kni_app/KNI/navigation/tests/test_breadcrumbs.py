@@ -0,0 +1,55 @@
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.models import Page, Site
+
+from KNI.navigation.breadcrumbs import invalidate_breadcrumbs
+from KNI.standardpages.models import IndexPage, StandardPage
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PROCESS_CACHE_CHECK_INTERVAL=3600,
+)
+class BreadcrumbsTests(TestCase):
+    template = engines["django"].from_string("{% load navigation_tags %}{% breadcrumbs %}")
+
+    def setUp(self):
+        invalidate_breadcrumbs()
+        self.home = Site.objects.get(is_default_site=True).root_page
+        self.section = self.home.add_child(
+            instance=IndexPage(title="Section", listing_title="Our section")
+        )
+        self.page = self.section.add_child(instance=StandardPage(title="Page"))
+        self.request = RequestFactory().get("/")
+
+    def render(self):
+        return self.template.render({"page": self.page, "request": self.request})
+
+    def test_rendered_from_cache(self):
+        html = self.render()
+
+        self.assertIn("Our section", html)
+        self.assertIn(f'href="{self.section.url}"', html)
+        self.assertEqual(html.count("<li"), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(), html)
+
+    def test_invalidated_on_publish(self):
+        self.render()
+
+        section = self.section.specific
+        section.listing_title = "Renamed"
+        section.save_revision().publish()
+
+        self.assertIn("Renamed", self.render())
+
+    def test_invalidated_on_move(self):
+        self.render()
+
+        other = self.home.add_child(instance=IndexPage(title="Other"))
+        self.page.move(other, pos="last-child")
+        self.page = Page.objects.get(pk=self.page.pk).specific
+
+        html = self.render()
+        self.assertIn("Other", html)
+        self.assertNotIn("Our section", html)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field: str = "django.db.models.AutoField"
     name = "KNI.news"
+
+    def ready(self):
+        from KNI.news.signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
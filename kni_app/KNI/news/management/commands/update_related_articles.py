@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from KNI.news.recommendations import rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related articles shown on articles without editor-chosen "
+        "related pages. Publishing updates them incrementally; run this "
+        "periodically (e.g. nightly) to refresh all scores."
+    )
+
+    def handle(self, **options):
+        started = time.monotonic()
+        count = rebuild_recommendations()
+        self.stdout.write(
+            f"Updated related articles for {count} article(s) "
+            f"in {time.monotonic() - started:.1f}s."
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_articlepage_plain_introduction_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleRecommendation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('page', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='news.articlepage')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.articlepage')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['page', 'rank'], name='news_articl_page_id_5a4b4c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_articlerecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('weight', models.FloatField()),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.articlepage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='news_articl_term_9fcd46_idx')],
+                'constraints': [models.UniqueConstraint(fields=('page', 'term'), name='articleterm_unique_page_term')],
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 from django.db.models.functions import Coalesce
 from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from wagtail.admin.panels import FieldPanel, HelpPanel, InlinePanel, MultiFieldPanel
 from wagtail.fields import RichTextField
 from wagtail.search import index
@@ -9,6 +10,7 @@ from wagtail.search import index
 from wagtail.fields import StreamField
 from KNI.utils.models import BasePage, ArticleTopic
 from KNI.utils.blocks import CaptionedImageBlock, StoryBlock, FeaturedArticleBlock
+from KNI.utils.query import get_pages_in_order, prefetch_listing_images
 
 
 class ArticlePage(BasePage):
@@ -76,6 +78,60 @@ class ArticlePage(BasePage):
         elif self.first_published_at:
             return self.first_published_at.strftime("%d %b %Y")
 
+    @cached_property
+    def related_pages(self) -> list:
+        """
+        The pages editors chose, or else the most similar articles, as
+        worked out by `KNI.news.recommendations`.
+        """
+        if pages := super().related_pages:
+            return pages
+
+        related_ids = list(self.recommendations.values_list("related_id", flat=True))
+        pages = get_pages_in_order(ArticlePage.objects.live().public(), related_ids)
+        pages = pages[: getattr(settings, "RELATED_ARTICLES_COUNT", 3)]
+        prefetch_listing_images(pages)
+        return pages
+
+
+class ArticleRecommendation(models.Model):
+    """
+    An article similar to `page`, for its related pages.
+    """
+
+    page = models.ForeignKey(
+        ArticlePage,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        # Covered by the index below
+        db_index=False,
+    )
+    related = models.ForeignKey(ArticlePage, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["rank"]
+        indexes = [models.Index(fields=["page", "rank"])]
+
+
+class ArticleTerm(models.Model):
+    """
+    A term of a live article, with its TF-IDF weight in the article's
+    vector: the stored corpus updates compare a newly published article
+    against, through the `term` index.
+    """
+
+    page = models.ForeignKey(ArticlePage, on_delete=models.CASCADE, related_name="+")
+    term = models.CharField(max_length=100)
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["page", "term"], name="articleterm_unique_page_term")
+        ]
+        indexes = [models.Index(fields=["term"])]
+
 
 class NewsListingPage(BasePage):
     template = "pages/news_listing_page.html"
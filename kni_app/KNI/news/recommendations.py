@@ -0,0 +1,234 @@
+"""
+Content-based "related articles": TF-IDF vectors of each live article's
+text, compared by cosine similarity.
+
+Vectors are sparse dicts, and similarities are accumulated through an
+inverted index, so only articles sharing a term are ever compared, and no
+numeric libraries are needed. All of this runs in tasks and management
+commands: pages only read the stored results.
+
+Each live article's vector is stored as ArticleTerm rows, so publishing an
+article only tokenizes that article: document frequencies are counted for
+its terms, and its neighbours are found through the term index, with the
+weights they were stored with.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+WORD_RE = re.compile(r"[^\W\d_]{3,}")
+
+# As stored in ArticleTerm; longer words aren't worth matching on
+MAX_TERM_LENGTH = 100
+
+STOP_WORDS = frozenset(
+    """
+    about above after again against all also and any are because been before
+    being below between both but can could did does doing down during each few
+    for from further had has have having her here hers herself him himself his
+    how into its itself just more most not now off once only other our ours
+    ourselves out over own same she should some such than that the their theirs
+    them themselves then there these they this those through too under until very
+    was were what when where which while who whom why will with would you your
+    yours yourself yourselves
+    """.split()
+)
+
+
+def get_stored_count():
+    # Extra recommendations are stored, to fill in for unpublished ones
+    return getattr(settings, "RELATED_ARTICLES_COUNT", 3) * 2
+
+
+def tokenize(text):
+    return [
+        word
+        for word in WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH
+    ]
+
+
+def get_article_text(page):
+    """
+    The text an article is compared on. The title and topic are repeated, to
+    weigh more than any one body sentence.
+    """
+    parts = [page.title, page.title, page.topic.title, page.topic.title, page.introduction]
+    parts.extend(page.body.stream_block.get_searchable_content(page.body))
+    return " ".join(str(part) for part in parts if part)
+
+
+def get_idf(document_frequencies, count):
+    """
+    {term: inverse document frequency}, for the {term: number of documents}
+    of a corpus of `count` documents.
+    """
+    return {
+        term: math.log((1 + count) / (1 + frequency)) + 1
+        for term, frequency in document_frequencies.items()
+    }
+
+
+def get_vector(counts, idf):
+    vector = {term: (1 + math.log(n)) * idf[term] for term, n in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def get_vectors(documents):
+    """
+    L2-normalised TF-IDF vectors, as {term: weight} dicts, for a
+    {key: text} dict of documents.
+    """
+    term_counts = {key: Counter(tokenize(text)) for key, text in documents.items()}
+    document_frequencies = Counter(term for counts in term_counts.values() for term in counts)
+    idf = get_idf(document_frequencies, len(documents))
+    return {key: get_vector(counts, idf) for key, counts in term_counts.items()}
+
+
+def get_inverted_index(vectors):
+    index = defaultdict(list)
+    for key, vector in vectors.items():
+        for term, weight in vector.items():
+            index[term].append((key, weight))
+    return index
+
+
+def get_similarities(vector, index, exclude=None):
+    """
+    {key: cosine similarity} to `vector` for the documents in `index`
+    sharing at least one term with it.
+    """
+    scores = defaultdict(float)
+    for term, weight in vector.items():
+        for key, other_weight in index.get(term, ()):
+            scores[key] += weight * other_weight
+    scores.pop(exclude, None)
+    return scores
+
+
+def get_top(scores, count):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:count]
+
+
+def get_live_articles():
+    from KNI.news.models import ArticlePage
+
+    return ArticlePage.objects.live().public().select_related("topic")
+
+
+def store_recommendations(page_id, top):
+    from KNI.news.models import ArticleRecommendation
+
+    ArticleRecommendation.objects.filter(page_id=page_id).delete()
+    ArticleRecommendation.objects.bulk_create(
+        ArticleRecommendation(page_id=page_id, related_id=related_id, rank=rank, score=score)
+        for rank, (related_id, score) in enumerate(top)
+    )
+
+
+def store_terms(vectors):
+    """
+    Store the {page_id: vector} vectors as ArticleTerm rows.
+    """
+    from KNI.news.models import ArticleTerm
+
+    ArticleTerm.objects.bulk_create(
+        (
+            ArticleTerm(page_id=page_id, term=term, weight=weight)
+            for page_id, vector in vectors.items()
+            for term, weight in vector.items()
+        ),
+        batch_size=1000,
+    )
+
+
+def rebuild_recommendations():
+    """
+    Recompute the vector and recommendations of every live article. Returns
+    how many articles there are.
+    """
+    from KNI.news.models import ArticleRecommendation, ArticleTerm
+
+    vectors = get_vectors({page.pk: get_article_text(page) for page in get_live_articles()})
+    index = get_inverted_index(vectors)
+    count = get_stored_count()
+    with transaction.atomic():
+        ArticleTerm.objects.all().delete()
+        store_terms(vectors)
+        ArticleRecommendation.objects.exclude(page_id__in=vectors.keys()).delete()
+        for page_id, vector in vectors.items():
+            store_recommendations(page_id, get_top(get_similarities(vector, index, page_id), count))
+    return len(vectors)
+
+
+def update_recommendations(page_id):
+    """
+    Recompute the vector and recommendations of the article `page_id`, and
+    add it to those of other articles it now belongs in. Other articles'
+    vectors and scores aren't otherwise refreshed: term weights drift slowly
+    as articles are added, which the periodic full rebuild catches up with.
+    """
+    from KNI.news.models import ArticleRecommendation, ArticleTerm
+
+    if not ArticleTerm.objects.exists():
+        # No stored vectors yet, e.g. just after deploying
+        rebuild_recommendations()
+        return
+
+    page = get_live_articles().filter(pk=page_id).first()
+    count = get_stored_count()
+    with transaction.atomic():
+        ArticleTerm.objects.filter(page_id=page_id).delete()
+        if page is None:
+            # Unpublished, or made private
+            ArticleRecommendation.objects.filter(page_id=page_id).delete()
+            ArticleRecommendation.objects.filter(related_id=page_id).delete()
+            return
+
+        counts = Counter(tokenize(get_article_text(page)))
+        # Counting this article in
+        document_frequencies = Counter(counts.keys())
+        document_frequencies.update(
+            dict(
+                ArticleTerm.objects.filter(term__in=counts)
+                .values_list("term")
+                .annotate(Count("page"))
+            )
+        )
+        vector = get_vector(counts, get_idf(document_frequencies, get_live_articles().count()))
+        store_terms({page_id: vector})
+
+        scores = defaultdict(float)
+        for other_id, term, weight in (
+            ArticleTerm.objects.filter(term__in=vector)
+            .exclude(page_id=page_id)
+            .values_list("page_id", "term", "weight")
+        ):
+            scores[other_id] += vector[term] * weight
+        store_recommendations(page_id, get_top(scores, count))
+
+        # Articles it may now belong to, or drop out of
+        affected = set(scores) | set(
+            ArticleRecommendation.objects.filter(related_id=page_id).values_list(
+                "page_id", flat=True
+            )
+        )
+        stored = defaultdict(dict)
+        for recommendation in ArticleRecommendation.objects.filter(page_id__in=affected):
+            stored[recommendation.page_id][recommendation.related_id] = recommendation.score
+        live_ids = set(
+            ArticleTerm.objects.filter(page_id__in=affected).values_list("page_id", flat=True)
+        )
+        for other_id in affected & live_ids:
+            current = {key: score for key, score in stored[other_id].items() if key != page_id}
+            if other_id in scores:
+                current[page_id] = scores[other_id]
+            top = get_top(current, count)
+            if top != get_top(stored[other_id], count):
+                store_recommendations(other_id, top)
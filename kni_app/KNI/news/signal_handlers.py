@@ -0,0 +1,13 @@
+from wagtail.signals import page_published, page_unpublished
+
+from KNI.news.models import ArticlePage
+from KNI.news.tasks import update_related_articles_task
+
+
+def update_related_articles(sender, instance, **kwargs):
+    update_related_articles_task.enqueue(instance.pk)
+
+
+def register_signal_handlers():
+    page_published.connect(update_related_articles, sender=ArticlePage)
+    page_unpublished.connect(update_related_articles, sender=ArticlePage)
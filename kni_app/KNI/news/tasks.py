@@ -0,0 +1,12 @@
+from django_tasks import task
+
+from KNI.news.recommendations import update_recommendations
+
+
+@task()
+def update_related_articles_task(page_id):
+    """
+    Update the related articles of a newly (un)published article, and of
+    the articles it is similar to.
+    """
+    update_recommendations(page_id)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.test import TestCase
+from wagtail.models import Page
+
+from KNI.news import recommendations
+from KNI.news.models import ArticlePage, ArticleRecommendation, ArticleTerm, NewsListingPage
+from KNI.news.recommendations import (
+    get_inverted_index,
+    get_similarities,
+    get_vectors,
+    rebuild_recommendations,
+    update_recommendations,
+)
+from KNI.utils.models import ArticleTopic, AuthorSnippet, PageRelatedPage
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.listing = Page.objects.get(depth=1).add_child(instance=NewsListingPage(title="News"))
+        self.author = AuthorSnippet.objects.create(title="Author")
+        self.topic = ArticleTopic.objects.create(title="Research", slug="research")
+
+    def add_article(self, title, introduction, topic=None):
+        return self.listing.add_child(
+            instance=ArticlePage(
+                title=title,
+                introduction=introduction,
+                author=self.author,
+                topic=topic or self.topic,
+                body=[],
+            )
+        )
+
+    def test_similarities(self):
+        vectors = get_vectors(
+            {
+                "a": "salmon fishing rivers",
+                "b": "salmon rivers in spring",
+                "c": "tax policy",
+            }
+        )
+
+        scores = get_similarities(vectors["a"], get_inverted_index(vectors), "a")
+
+        self.assertEqual(set(scores), {"b"})
+        self.assertGreater(scores["b"], 0)
+
+    def test_related_pages_fall_back_to_recommendations(self):
+        salmon = self.add_article("Salmon rivers", "Salmon return to the rivers")
+        trout = self.add_article("Trout rivers", "Trout and salmon in rivers")
+        self.add_article(
+            "Budget",
+            "The annual budget and taxes",
+            ArticleTopic.objects.create(title="Politics", slug="politics"),
+        )
+
+        rebuild_recommendations()
+
+        self.assertEqual(ArticlePage.objects.get(pk=salmon.pk).related_pages, [trout])
+
+        # Editors' choices come first
+        budget = ArticlePage.objects.get(title="Budget")
+        PageRelatedPage.objects.create(parent=salmon, page=budget, sort_order=0)
+        self.assertEqual(ArticlePage.objects.get(pk=salmon.pk).related_pages, [budget])
+
+    def test_publishing_updates_recommendations(self):
+        salmon = self.add_article("Salmon rivers", "Salmon return to the rivers")
+        rebuild_recommendations()
+        self.assertFalse(ArticleRecommendation.objects.exists())
+
+        trout = self.add_article("Trout rivers", "Trout and salmon in rivers")
+        with self.captureOnCommitCallbacks(execute=True):
+            trout.save_revision().publish()
+
+        self.assertEqual(ArticlePage.objects.get(pk=salmon.pk).related_pages, [trout])
+        self.assertEqual(ArticlePage.objects.get(pk=trout.pk).related_pages, [salmon])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trout.unpublish()
+
+        self.assertFalse(ArticleRecommendation.objects.exists())
+
+    def test_update_only_reads_the_published_article(self):
+        salmon = self.add_article("Salmon rivers", "Salmon return to the rivers")
+        self.add_article("Budget", "The annual budget and taxes")
+        rebuild_recommendations()
+        trout = self.add_article("Trout rivers", "Trout and salmon in rivers")
+
+        with mock.patch.object(
+            recommendations, "get_article_text", wraps=recommendations.get_article_text
+        ) as get_article_text:
+            update_recommendations(trout.pk)
+
+        get_article_text.assert_called_once()
+        self.assertTrue(ArticleTerm.objects.filter(page=trout, term="trout").exists())
+        self.assertEqual(ArticlePage.objects.get(pk=salmon.pk).related_pages[0], trout)
+
+    def test_update_stores_all_vectors_first(self):
+        salmon = self.add_article("Salmon rivers", "Salmon return to the rivers")
+        trout = self.add_article("Trout rivers", "Trout and salmon in rivers")
+
+        update_recommendations(trout.pk)
+
+        self.assertTrue(ArticleTerm.objects.filter(page=salmon).exists())
+        self.assertEqual(ArticlePage.objects.get(pk=trout.pk).related_pages, [salmon])
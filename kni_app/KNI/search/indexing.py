@@ -0,0 +1,260 @@
+"""
+Search and reference index maintenance.
+
+Saving an object queues Wagtail's tasks updating its search entries and its
+references, which run in the background worker, coalesced by the queue
+(see KNI.tasks.backend). The worker hands the calls due at once to
+`update_search_entries` and `update_references` (see TASK_BATCH_RUNNERS),
+which load the objects a model at a time, rather than a task and several
+queries per object.
+
+The `update_index` and `rebuild_references_index` commands rebuild the
+indexes in chunks of objects, each replaced with a bulk insert, in several
+processes at once. Only one process writes at a time, as SQLite only allows
+one writer, and the writes are short: loading objects and extracting their
+content is most of the work.
+
+The rebuilds rely on Wagtail internals, to check on upgrading Wagtail:
+the database search backends' IndexEntry model (its stale entries are
+deleted with `QuerySet._raw_delete()`), and
+`ReferenceIndex._extract_references_from_object()` and
+`ReferenceIndex._get_content_path_hash()`, to build references the way
+`ReferenceIndex.create_or_update_for_object()` does.
+"""
+
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from modelcluster.fields import ParentalKey
+from modelcluster.models import ClusterableModel, get_all_child_relations
+from wagtail.models import ReferenceIndex
+from wagtail.search.backends import get_search_backend, get_search_backends
+from wagtail.search.models import IndexEntry
+from wagtail.search.utils import get_content_type_pk
+
+# Held while writing, in rebuilds running in several processes
+write_lock = nullcontext()
+
+
+def get_pks_by_model(calls):
+    """
+    {model: {pk}} for calls of a task taking an (app_label, model_name, pk),
+    as Wagtail's index update tasks do.
+    """
+    pks_by_model = defaultdict(set)
+    for args, kwargs in calls:
+        app_label, model_name, pk = args
+        pks_by_model[apps.get_model(app_label, model_name)].add(pk)
+    return pks_by_model
+
+
+def update_search_entries(calls):
+    """
+    Batch runner for wagtail.search.tasks.insert_or_update_object_task.
+    """
+    pks_by_indexed_model = defaultdict(set)
+    for model, pks in get_pks_by_model(calls).items():
+        # Objects deleted since have been removed from the index already
+        for obj in model._default_manager.filter(pk__in=pks):
+            indexed_instance = obj.get_indexed_instance()
+            if indexed_instance is not None:
+                pks_by_indexed_model[indexed_instance._meta.model].add(indexed_instance.pk)
+
+    backends = list(get_search_backends(with_auto_update=True))
+    for model, pks in pks_by_indexed_model.items():
+        # Those still in the indexed objects, with their related fields
+        objs = list(model.get_indexed_objects().filter(pk__in=pks))
+        for backend in backends:
+            backend.add_bulk(model, objs)
+
+
+def get_child_relation_paths(model, prefix=""):
+    """
+    Lookups for prefetching the child relations of `model`, and theirs.
+    """
+    if not issubclass(model, ClusterableModel):
+        return
+    for relation in get_all_child_relations(model):
+        path = prefix + relation.get_accessor_name()
+        yield path
+        yield from get_child_relation_paths(relation.related_model, path + "__")
+
+
+def get_reference_queryset(model):
+    """
+    `model` objects, with the child relations references are extracted from
+    prefetched.
+    """
+    return model._default_manager.prefetch_related(*get_child_relation_paths(model))
+
+
+def update_references(calls):
+    """
+    Batch runner for wagtail.tasks.update_reference_index_task.
+    """
+    # Child objects' references are indexed with their parent's, as in the
+    # task: follow ParentalKeys up, a model at a time
+    pending = get_pks_by_model(calls)
+    pks_by_model = defaultdict(set)
+    while pending:
+        model, pks = pending.popitem()
+        parental_keys = [
+            field for field in model._meta.get_fields() if isinstance(field, ParentalKey)
+        ]
+        if not parental_keys:
+            pks_by_model[model] |= pks
+            continue
+        key = parental_keys[0]
+        parent_pks = (
+            model._default_manager.filter(pk__in=pks)
+            .exclude(**{key.attname: None})
+            .values_list(key.attname, flat=True)
+        )
+        pending.setdefault(key.related_model, set()).update(parent_pks)
+
+    with transaction.atomic():
+        for model, pks in pks_by_model.items():
+            if ReferenceIndex.is_indexed(model):
+                for instance in get_reference_queryset(model).filter(pk__in=pks):
+                    ReferenceIndex.create_or_update_for_object(instance)
+
+
+def get_index_entries(index):
+    """
+    The entries of `index` if it's one of Wagtail's database search
+    backends' indexes, else None.
+    """
+    entries = getattr(index, "entries", None)
+    return entries if getattr(entries, "model", None) is IndexEntry else None
+
+
+def get_pk_chunks(queryset, chunk_size):
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+    return [pks[i : i + chunk_size] for i in range(0, len(pks), chunk_size)]
+
+
+def index_search_chunk(backend_name, model_label, pks, index=None):
+    """
+    Replace the entries of the `model_label` objects `pks` in the
+    `backend_name` search backend's index (or `index`). Returns how many
+    objects are indexed.
+    """
+    model = apps.get_model(model_label)
+    if index is None:
+        index = get_search_backend(backend_name).get_index_for_model(model)
+    objs = list(model.get_indexed_objects().filter(pk__in=pks))
+
+    entries = get_index_entries(index)
+    with write_lock, transaction.atomic():
+        if entries is not None:
+            # Deleted first, so the backend inserts them all at once rather
+            # than updating them one at a time
+            stale = entries.filter(
+                content_type_id=get_content_type_pk(model),
+                object_id__in=[str(pk) for pk in pks],
+            )
+            stale._raw_delete(using=stale.db)
+        index.add_items(model, objs)
+    return len(objs)
+
+
+def delete_stale_references():
+    """
+    Delete the references of models no longer indexed, and of deleted
+    objects.
+    """
+    indexed_models = [model for model in apps.get_models() if ReferenceIndex.is_indexed(model)]
+    ReferenceIndex.objects.exclude(
+        content_type__in=[
+            ContentType.objects.get_for_model(model, for_concrete_model=False)
+            for model in indexed_models
+        ]
+    ).delete()
+
+    # Deleting roots' references deletes their subclasses'
+    for model in indexed_models:
+        if not model._meta.parents:
+            existing_pks = model._default_manager.annotate(
+                pk_string=Cast("pk", CharField(max_length=255))
+            ).values("pk_string")
+            ReferenceIndex.objects.filter(
+                base_content_type=ContentType.objects.get_for_model(
+                    model, for_concrete_model=False
+                )
+            ).exclude(object_id__in=existing_pks).delete()
+
+
+def index_references_chunk(model_label, pks):
+    """
+    Replace the references of the `model_label` objects `pks`. Returns how
+    many objects are indexed.
+    """
+    model = apps.get_model(model_label)
+    content_type, *parent_content_types = [
+        ContentType.objects.get_for_model(model_or_parent, for_concrete_model=False)
+        for model_or_parent in [model, *model._meta.get_parent_list()]
+    ]
+    base_content_type = parent_content_types[-1] if parent_content_types else content_type
+
+    references = []
+    instances = list(get_reference_queryset(model).filter(pk__in=pks))
+    for instance in instances:
+        references.extend(
+            ReferenceIndex(
+                content_type=content_type,
+                base_content_type=base_content_type,
+                object_id=instance.pk,
+                to_content_type_id=to_content_type_id,
+                to_object_id=to_object_id,
+                model_path=model_path,
+                content_path=content_path,
+                content_path_hash=ReferenceIndex._get_content_path_hash(content_path),
+            )
+            for to_content_type_id, to_object_id, model_path, content_path in set(
+                ReferenceIndex._extract_references_from_object(instance)
+            )
+        )
+
+    with write_lock, transaction.atomic():
+        ReferenceIndex.objects.filter(
+            content_type=content_type, object_id__in=[str(pk) for pk in pks]
+        ).delete()
+        # Those also found on a more or less specific model are kept once,
+        # as in ReferenceIndex.create_or_update_for_object()
+        ReferenceIndex.objects.bulk_create(
+            references, ignore_conflicts=connection.features.supports_ignore_conflicts
+        )
+    return len(instances)
+
+
+def init_process(lock):
+    global write_lock
+    write_lock = lock
+    if not apps.ready:
+        django.setup()
+
+
+def map_chunks(function, chunks, processes=1):
+    """
+    Yield `function(chunk)` for each of `chunks`, in order, in `processes`
+    processes at once if more than one.
+    """
+    if processes > 1 and len(chunks) > 1 and not (
+        connection.vendor == "sqlite" and connection.is_in_memory_db()
+    ):
+        # Children mustn't share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            processes, initializer=init_process, initargs=(multiprocessing.Lock(),)
+        ) as executor:
+            yield from executor.map(function, chunks)
+    else:
+        yield from map(function, chunks)
@@ -0,0 +1,70 @@
+import time
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from wagtail.models import ReferenceIndex
+
+from KNI.search.indexing import (
+    delete_stale_references,
+    get_pk_chunks,
+    index_references_chunk,
+    map_chunks,
+)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the reference index, a chunk of objects at a time, in several "
+        "processes at once. Saving objects updates their references in the "
+        "background already: this is for data loaded without signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="How many objects to index at a time.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=getattr(settings, "INDEX_REBUILD_PROCESSES", 1),
+            help="How many chunks to index at once. Defaults to INDEX_REBUILD_PROCESSES.",
+        )
+
+    def write(self, message):
+        if self.verbosity > 0:
+            self.stdout.write(message)
+
+    def handle(self, **options):
+        self.verbosity = options["verbosity"]
+        started = time.monotonic()
+
+        self.write("Rebuilding reference index")
+        delete_stale_references()
+
+        object_count = 0
+        # In the same order as Wagtail's command, so that references found on
+        # both a page and its specific page are kept under the same one
+        for model in apps.get_models():
+            if not ReferenceIndex.is_indexed(model):
+                continue
+            chunks = get_pk_chunks(model._default_manager.all(), options["chunk_size"])
+            index_chunk = partial(index_references_chunk, model._meta.label)
+            total = sum(len(chunk) for chunk in chunks)
+            done = 0
+            for chunk, count in zip(
+                chunks, map_chunks(index_chunk, chunks, options["processes"])
+            ):
+                done += len(chunk)
+                object_count += count
+                self.write(f"{model._meta.label} {done}/{total}")
+
+        self.write(
+            f"Indexed {object_count} objects in {time.monotonic() - started:.1f}s."
+        )
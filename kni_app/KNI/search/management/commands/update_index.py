@@ -0,0 +1,108 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+from wagtail.search.management.commands.update_index import group_models_by_index
+
+from KNI.search.indexing import get_index_entries, get_pk_chunks, index_search_chunk, map_chunks
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search indexes, a chunk of objects at a time, in several "
+        "processes at once. Saving objects updates their entries in the "
+        "background already: this is for new indexes and changed search fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            dest="backend_name",
+            help="Only update this search backend.",
+        )
+        parser.add_argument(
+            "--schema-only",
+            action="store_true",
+            dest="schema_only",
+            help="Prevents loading any data into the index",
+        )
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="How many objects to index at a time.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=getattr(settings, "INDEX_REBUILD_PROCESSES", 1),
+            help="How many chunks to index at once. Defaults to INDEX_REBUILD_PROCESSES.",
+        )
+
+    def write(self, message):
+        if self.verbosity > 0:
+            self.stdout.write(message)
+
+    def handle(self, **options):
+        self.verbosity = options["verbosity"]
+        started = time.monotonic()
+
+        if options["backend_name"]:
+            backend_names = [options["backend_name"]]
+        else:
+            backend_names = getattr(settings, "WAGTAILSEARCH_BACKENDS", {"default": {}}).keys()
+
+        for backend_name in backend_names:
+            self.update_backend(
+                backend_name,
+                schema_only=options["schema_only"],
+                chunk_size=options["chunk_size"],
+                processes=options["processes"],
+            )
+        self.write(f"Done in {time.monotonic() - started:.1f}s.")
+
+    def update_backend(self, backend_name, schema_only, chunk_size, processes):
+        backend = get_search_backend(backend_name)
+        if not backend.rebuilder_class:
+            self.write(f"{backend_name}: doesn't require rebuilding")
+            return
+
+        for index, models in group_models_by_index(backend, get_indexed_models()).items():
+            self.write(f"{backend_name}: rebuilding index {index.name}")
+            rebuilder = backend.rebuilder_class(index)
+            index = rebuilder.start()
+            for model in models:
+                index.add_model(model)
+
+            object_count = 0
+            if not schema_only:
+                for model in models:
+                    object_count += self.index_model(
+                        backend_name, index, model, chunk_size, processes
+                    )
+
+            rebuilder.finish()
+            self.write(f"{backend_name}: indexed {object_count} objects")
+
+    def index_model(self, backend_name, index, model, chunk_size, processes):
+        chunks = get_pk_chunks(model.get_indexed_objects(), chunk_size)
+        index_chunk = partial(index_search_chunk, backend_name, model._meta.label)
+        if get_index_entries(index) is None:
+            # Other backends' rebuilders may build a new index, which only
+            # this process knows of
+            index_chunk = partial(index_chunk, index=index)
+            processes = 1
+
+        label = f"{backend_name}: {model._meta.label}"
+        total = sum(len(chunk) for chunk in chunks)
+        done = object_count = 0
+        for chunk, count in zip(chunks, map_chunks(index_chunk, chunks, processes)):
+            done += len(chunk)
+            object_count += count
+            self.write(f"{label} {done}/{total}")
+        return object_count
@@ -0,0 +1,108 @@
+import os
+from contextlib import nullcontext
+from io import StringIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django_tasks import ResultStatus
+from wagtail.models import Page, ReferenceIndex
+from wagtail.search.models import IndexEntry
+
+from KNI.search import indexing
+from KNI.standardpages.models import StandardPage
+from KNI.tasks.models import QueuedTask
+from KNI.utils.models import PageRelatedPage
+
+
+def get_chunk_process(chunk):
+    # Run in the rebuild processes: where, and whether writes are locked
+    return os.getpid(), chunk, not isinstance(indexing.write_lock, nullcontext)
+
+
+class IndexingTests(TestCase):
+    def setUp(self):
+        root = Page.objects.get(depth=1)
+        self.salmon = root.add_child(instance=StandardPage(title="Salmon rivers", body=[]))
+        self.trout = root.add_child(instance=StandardPage(title="Trout rivers", body=[]))
+
+    def get_related_page_ids(self, page):
+        return set(
+            ReferenceIndex.get_references_for_object(page)
+            .filter(model_path="page_related_pages.item.page")
+            .values_list("to_object_id", flat=True)
+        )
+
+    def get_titles(self, page):
+        return set(
+            IndexEntry.objects.filter(object_id=str(page.pk)).values_list("title", flat=True)
+        )
+
+    @override_settings(TASKS={"default": {"BACKEND": "KNI.tasks.backend.DatabaseBackend"}})
+    def test_saves_are_indexed_in_batches_by_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salmon.title = "Salmon and rivers"
+            self.salmon.save()
+            PageRelatedPage.objects.create(parent=self.salmon, page=self.trout, sort_order=0)
+        self.assertEqual(self.get_related_page_ids(self.salmon), set())
+
+        call_command("run_worker", "--burst", stdout=StringIO())
+
+        self.assertEqual(self.get_titles(self.salmon), {"Salmon and rivers"})
+        self.assertEqual(self.get_related_page_ids(self.salmon), {str(self.trout.pk)})
+        self.assertFalse(QueuedTask.objects.exclude(status=ResultStatus.SUCCEEDED).exists())
+
+    def test_rebuild_commands(self):
+        PageRelatedPage.objects.create(parent=self.salmon, page=self.trout, sort_order=0)
+        ReferenceIndex.objects.all().delete()
+        IndexEntry.objects.all().delete()
+        # The references of a page since deleted
+        page_type = ContentType.objects.get_for_model(Page)
+        ReferenceIndex.objects.create(
+            content_type=page_type,
+            base_content_type=page_type,
+            object_id="0",
+            to_content_type=page_type,
+            to_object_id=str(self.trout.pk),
+            model_path="page_related_pages.item.page",
+            content_path="page_related_pages.1.page",
+            content_path_hash=ReferenceIndex._get_content_path_hash("page_related_pages.1.page"),
+        )
+
+        call_command("rebuild_references_index", stdout=StringIO())
+        call_command("update_index", stdout=StringIO())
+
+        self.assertEqual(self.get_related_page_ids(self.salmon), {str(self.trout.pk)})
+        self.assertFalse(ReferenceIndex.objects.filter(object_id="0").exists())
+        self.assertEqual(self.get_titles(self.trout), {"Trout rivers"})
+
+    def test_rebuild_chunks_in_processes(self):
+        # Tests run on an in-memory database, which the processes can't share
+        connection = mock.Mock(vendor="sqlite", **{"is_in_memory_db.return_value": False})
+        with (
+            mock.patch.object(indexing, "connection", connection),
+            mock.patch.object(indexing, "connections") as connections,
+        ):
+            results = list(indexing.map_chunks(get_chunk_process, [[1, 2], [3], [4]], 2))
+
+        connections.close_all.assert_called_once_with()
+        self.assertEqual([chunk for pid, chunk, locked in results], [[1, 2], [3], [4]])
+        self.assertNotIn(os.getpid(), {pid for pid, chunk, locked in results})
+        self.assertTrue(all(locked for pid, chunk, locked in results))
+
+    def test_rebuild_chunks_write_under_the_process_lock(self):
+        PageRelatedPage.objects.create(parent=self.salmon, page=self.trout, sort_order=0)
+        ReferenceIndex.objects.all().delete()
+        IndexEntry.objects.all().delete()
+        lock = mock.MagicMock()
+        self.addCleanup(setattr, indexing, "write_lock", indexing.write_lock)
+
+        # As run in each process
+        indexing.init_process(lock)
+        indexing.index_references_chunk("standardpages.StandardPage", [self.salmon.pk])
+        indexing.index_search_chunk("default", "standardpages.StandardPage", [self.trout.pk])
+
+        self.assertEqual(lock.__enter__.call_count, 2)
+        self.assertEqual(self.get_related_page_ids(self.salmon), {str(self.trout.pk)})
+        self.assertEqual(self.get_titles(self.trout), {"Trout rivers"})
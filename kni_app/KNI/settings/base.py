@@ -32,6 +32,7 @@ if "CSRF_TRUSTED_ORIGINS" in os.environ:
 # Application definition
 
 INSTALLED_APPS = [
+    "KNI.documents",
     "KNI.forms",
     "KNI.home",
     "KNI.images",
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
     "KNI.news",
     "KNI.search",
     "KNI.standardpages",
+    "KNI.tasks",
     "KNI.users",
     "KNI.utils",
     "wagtail.contrib.settings",
@@ -55,6 +57,7 @@ INSTALLED_APPS = [
     "wagtail",
     "modelcluster",
     "taggit",
+    "django_tasks",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -72,7 +75,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    "KNI.utils.middleware.RedirectMiddleware",
+    "KNI.utils.middleware.RouteCacheMiddleware",
+    "KNI.utils.middleware.UserbarCookieMiddleware",
 ]
 
 
@@ -162,6 +167,17 @@ STATIC_URL = "/static/"
 MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 MEDIA_URL = "/media/"
 
+# How `KNI.utils.views.serve_media` sends files in production: "direct" (from
+# the worker, using sendfile where the WSGI server supports it),
+# "x-accel-redirect" (nginx, via the internal MEDIA_ACCEL_REDIRECT_LOCATION)
+# or "x-sendfile" (Apache mod_xsendfile).
+MEDIA_SERVE_METHOD = os.environ.get("MEDIA_SERVE_METHOD", "direct")
+MEDIA_ACCEL_REDIRECT_LOCATION = os.environ.get(
+    "MEDIA_ACCEL_REDIRECT_LOCATION", "/protected-media/"
+)
+# Browser cache lifetime of media other than renditions (which are immutable)
+MEDIA_CACHE_MAX_AGE = 3600
+
 # Default storage settings, with the staticfiles storage updated.
 # See https://docs.djangoproject.com/en/4.2/ref/settings/#std-setting-STORAGES
 STORAGES = {
@@ -185,6 +201,84 @@ CACHES = {
     }
 }
 
+# Cache for `{% include_block_cached %}` output. Entries are keyed on the page
+# revision and checked against what they link to, so the timeout only bounds
+# how stale indirectly linked content (e.g. a linked page's listing image) gets.
+STREAMFIELD_RENDER_CACHE = "default"
+STREAMFIELD_RENDER_CACHE_TIMEOUT = int(os.environ.get("STREAMFIELD_RENDER_CACHE_TIMEOUT", 86400))
+
+# Breadcrumbs and page routes are cached in each process; this is how many
+# seconds a process may keep serving them after a page is published or moved
+# elsewhere.
+PROCESS_CACHE_CHECK_INTERVAL = int(os.environ.get("PROCESS_CACHE_CHECK_INTERVAL", 10))
+
+# Paths bots probe every site for, answered with a minimal 404 (unless a
+# redirect says otherwise) without rendering the site's 404 page.
+PROBE_PATH_PATTERNS = [
+    r"^/(?:wp-|wordpress/|xmlrpc\.php|phpmyadmin|cgi-bin/|\.env|\.git/)",
+    r"^/[^/]*\.(?:php|asp|aspx|jsp|cgi)$",
+]
+
+# How long browsers and proxies may reuse the 404 page shown to anonymous
+# visitors
+NOT_FOUND_CACHE_MAX_AGE = int(os.environ.get("NOT_FOUND_CACHE_MAX_AGE", 60))
+
+# Render pages without reading the session or setting cookies, so their HTML
+# is the same for everyone and can be cached whatever cookies visitors send.
+# The user bar and forms' CSRF tokens are then fetched by JavaScript; the user
+# bar only for browsers with USERBAR_COOKIE_NAME set, on visiting the admin.
+SESSION_FREE_PAGES = os.environ.get("SESSION_FREE_PAGES", "").lower() in ("1", "true")
+USERBAR_COOKIE_NAME = "userbar"
+
+# Background tasks (search and reference index updates, renditions, form
+# emails) are queued in the database and run by `manage.py run_worker`.
+# Failed tasks are tried TASK_MAX_ATTEMPTS times in all, waiting
+# TASK_RETRY_DELAY seconds after the first failure, doubling each time. A task
+# still running after TASK_LEASE seconds is assumed to have lost its worker,
+# and is run again. Finished tasks are deleted after TASK_RETENTION_DAYS.
+TASKS = {
+    "default": {
+        "BACKEND": "KNI.tasks.backend.DatabaseBackend",
+    }
+}
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_LEASE = 600
+TASK_RETENTION_DAYS = 7
+
+# Queued search and reference index updates due at once are run together,
+# TASK_BATCH_SIZE at most, a model at a time (see KNI.search.indexing)
+TASK_BATCH_RUNNERS = {
+    "wagtail.search.tasks.insert_or_update_object_task": (
+        "KNI.search.indexing.update_search_entries"
+    ),
+    "wagtail.tasks.update_reference_index_task": "KNI.search.indexing.update_references",
+}
+TASK_BATCH_SIZE = 100
+
+# How many chunks of objects `update_index` and `rebuild_references_index`
+# index at once, each in its own process
+INDEX_REBUILD_PROCESSES = int(os.environ.get("INDEX_REBUILD_PROCESSES", os.cpu_count() or 1))
+
+# Form submission emails are queued, and sent by a background task (or
+# `manage.py send_form_emails`, which must be run when TASKS runs tasks
+# immediately).
+# Failures are retried FORM_EMAIL_MAX_ATTEMPTS times in all, waiting
+# FORM_EMAIL_RETRY_DELAY seconds after the first, doubling each time.
+# A worker has FORM_EMAIL_LEASE seconds to send a batch before another one
+# may pick it up.
+FORM_EMAIL_MAX_ATTEMPTS = 8
+FORM_EMAIL_RETRY_DELAY = 60
+FORM_EMAIL_LEASE = 300
+
+# Form submission CSV and JSON Lines exports read this many rows at a time
+FORM_EXPORT_CHUNK_SIZE = 2000
+
+# Form pages' fields are cached per live revision, so this only bounds how
+# long old revisions' entries linger
+FORM_FIELDS_CACHE_TIMEOUT = 86400
+
+
 def get_first_env(*keys, default=None):
     """
     Return the first set environment variable (with a truthy value)
@@ -275,14 +369,57 @@ WAGTAILSEARCH_BACKENDS = {
 WAGTAILADMIN_BASE_URL = "http://example.com"
 WAGTAILADMIN_NOTIFICATION_INCLUDE_SUPERUSERS = False
 
+# Custom document model, storing file metadata at upload
+# https://docs.wagtail.org/en/stable/advanced_topics/documents/custom_document_model.html
+WAGTAILDOCS_DOCUMENT_MODEL = "documents.CustomDocument"
+
 # Custom image model
 # https://docs.wagtail.io/en/stable/advanced_topics/images/custom_image_model.html
 WAGTAILIMAGES_IMAGE_MODEL = "images.CustomImage"
 WAGTAILIMAGES_FEATURE_DETECTION_ENABLED = False
 
+# Originals larger than this (longest edge, px) get a scaled-down working copy
+# that renditions are generated from, keeping decode memory bounded.
+IMAGE_WORKING_MAX_EDGE = int(os.environ.get("IMAGE_WORKING_MAX_EDGE", 4000))
+
+# AVIF renditions
+# `avifquality-N` and `avifspeed-N` in a filter spec override these per rendition.
+# Speed runs from 0 (slowest, smallest files) to 10 (fastest).
+WAGTAILIMAGES_AVIF_QUALITY = int(os.environ.get("WAGTAILIMAGES_AVIF_QUALITY", 60))
+IMAGE_AVIF_SPEED = int(os.environ.get("IMAGE_AVIF_SPEED", 6))
+# Used for `format-avif` renditions when Pillow is built without an AVIF encoder
+IMAGE_AVIF_FALLBACK_FORMAT = "webp"
+
+# Renditions generated by the task worker whenever an image is uploaded or its
+# focal point changes (unless TASKS runs tasks immediately), and by the
+# `generate_renditions` command. Templates only
+# reference AVIF renditions once they exist (see `{% avif_rendition %}`).
+IMAGE_PREGENERATE_RENDITIONS = [
+    "format-avif|fill-800x600",
+    "format-avif|fill-1600x1200",
+    "format-avif|width-1000",
+    "format-avif|width-2000",
+]
+
+# Only one process generates a given rendition at a time, holding a lock in
+# this cache. Others wait up to IMAGE_RENDITION_LOCK_WAIT seconds for it, then
+# use the original image. The lock expires after IMAGE_RENDITION_LOCK_TIMEOUT
+# seconds in case its holder dies mid-generation.
+IMAGE_RENDITION_LOCK_CACHE = "default"
+IMAGE_RENDITION_LOCK_TIMEOUT = 60
+IMAGE_RENDITION_LOCK_WAIT = float(os.environ.get("IMAGE_RENDITION_LOCK_WAIT", 10))
+
+# Don't generate missing renditions while rendering pages: emit signed URLs to
+# the rendition serving view (`images/...`) instead, which generates them on
+# first fetch and serves them with immutable cache headers.
+IMAGE_DEFER_RENDITIONS = os.environ.get("IMAGE_DEFER_RENDITIONS", "").lower() in ("1", "true")
+
 # Pagination
 DEFAULT_PER_PAGE = 8
 
+# Related articles shown when editors haven't chosen any
+RELATED_ARTICLES_COUNT = 3
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('standardpages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexpage',
+            name='plain_introduction',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='standardpage',
+            name='plain_introduction',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:00
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def get_heading_id(text, block_id):
+    # As KNI.utils.blocks.get_heading_id() when this migration was written
+    return f"{slugify(text)}-{block_id[:8]}"
+
+
+def set_table_of_contents(apps, schema_editor):
+    StandardPage = apps.get_model("standardpages", "StandardPage")
+    for page in StandardPage.objects.only("body").iterator():
+        table_of_contents = [
+            (get_heading_id(child["value"]["heading"], child["id"]), child["value"]["heading"])
+            for child in page.body.raw_data
+            if child["type"] == "section" and child.get("id")
+        ]
+        if table_of_contents:
+            StandardPage.objects.filter(pk=page.pk).update(table_of_contents=table_of_contents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('standardpages', '0002_indexpage_plain_introduction_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='standardpage',
+            name='table_of_contents',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(set_table_of_contents, migrations.RunPython.noop),
+    ]
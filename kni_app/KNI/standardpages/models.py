@@ -16,6 +16,10 @@ class StandardPage(BasePage):
     body = StreamField(StoryBlock())
     featured_section_title = models.TextField(blank=True)
 
+    # [anchor ID, heading] for each section of the body. Set on save, see
+    # StoryBlock.get_table_of_contents().
+    table_of_contents = models.JSONField(default=list, blank=True, editable=False)
+
     search_fields = BasePage.search_fields + [index.SearchField("introduction")]
 
     content_panels = BasePage.content_panels + [
@@ -35,6 +39,15 @@ class StandardPage(BasePage):
         ),
     ]
 
+    def save(self, *args, **kwargs):
+        # Serialising the body gives new blocks the IDs their anchors use
+        self.body.get_prep_value()
+        self.table_of_contents = self.body.stream_block.get_table_of_contents(self.body)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "body" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "table_of_contents"}
+        return super().save(*args, **kwargs)
+
 
 class IndexPage(BasePage):
     template = "pages/index_page.html"
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    default_auto_field: str = "django.db.models.AutoField"
+    name = "KNI.tasks"
+    label = "tasks"
@@ -0,0 +1,138 @@
+"""
+A django_tasks backend keeping the queue in the project database, so tasks
+run outside the request on SQLite and Postgres alike, with no other service
+to deploy. `manage.py run_worker` runs them; see KNI.tasks.worker.
+
+Tasks are inserted once the enqueueing transaction commits (unless the task
+or backend sets `enqueue_on_commit` to False), so workers never pick up a
+task about data that was rolled back, or isn't visible to them yet.
+
+Enqueueing a task while an identical one (same task, queue and arguments,
+or the same `dedup_key`) is still waiting to run doesn't add another: the
+waiting one is brought forward if need be, and does the work of both. Saving
+a page several times while publishing it then updates its search entry once.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_tasks import ResultStatus, Task, TaskResult
+from django_tasks.backends.base import BaseTaskBackend
+from django_tasks.exceptions import ResultDoesNotExist
+from django_tasks.signals import task_enqueued
+
+
+@dataclass(frozen=True)
+class QueueTask(Task):
+    dedup_key: Optional[str] = None
+    """
+    Only one pending task with this key is kept. Defaults to one made of the
+    task, its queue and its arguments
+    """
+
+    def using(self, *, dedup_key=None, **kwargs):
+        task = super().using(**kwargs)
+        if dedup_key is not None:
+            task = replace(task, dedup_key=dedup_key)
+        return task
+
+
+def get_dedup_key(task, args, kwargs):
+    if getattr(task, "dedup_key", None):
+        return task.dedup_key
+    data = json.dumps([task.queue_name, args, kwargs], sort_keys=True)
+    return f"{task.module_path}:{hashlib.sha1(data.encode()).hexdigest()}"
+
+
+def get_task_result(queued, alias):
+    task = import_string(queued.task_path).using(
+        priority=queued.priority, queue_name=queued.queue_name, backend=alias
+    )
+    result = TaskResult(
+        task=task,
+        id=str(queued.pk),
+        status=ResultStatus(queued.status),
+        enqueued_at=queued.enqueued_at,
+        started_at=queued.started_at,
+        finished_at=queued.finished_at,
+        args=queued.args_kwargs["args"],
+        kwargs=queued.args_kwargs["kwargs"],
+        backend=alias,
+    )
+    if queued.status == ResultStatus.SUCCEEDED:
+        object.__setattr__(result, "_return_value", queued.return_value)
+    elif queued.status == ResultStatus.FAILED:
+        try:
+            exception_class = import_string(queued.exception_class_path)
+        except ImportError:
+            exception_class = None
+        object.__setattr__(result, "_exception_class", exception_class)
+        object.__setattr__(result, "_traceback", queued.traceback)
+    return result
+
+
+class DatabaseBackend(BaseTaskBackend):
+    task_class = QueueTask
+    supports_defer = True
+    supports_get_result = True
+
+    def enqueue(self, task, args, kwargs):
+        from KNI.tasks.models import QueuedTask
+
+        self.validate_task(task)
+
+        queued = QueuedTask(
+            task_path=task.module_path,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            args_kwargs={"args": args, "kwargs": kwargs},
+            dedup_key=get_dedup_key(task, args, kwargs),
+        )
+        if self._get_enqueue_on_commit_for_task(task):
+            transaction.on_commit(partial(self.insert, queued, task.run_after))
+        else:
+            self.insert(queued, task.run_after)
+        return get_task_result(queued, self.alias)
+
+    def insert(self, queued, run_after=None):
+        from KNI.tasks.models import QueuedTask
+
+        queued.enqueued_at = timezone.now()
+        queued.available_at = run_after or queued.enqueued_at
+        # Two tries: a pending duplicate may be picked up by a worker between
+        # the failed insert and the update, freeing its key
+        for _ in range(2):
+            try:
+                with transaction.atomic():
+                    queued.save(force_insert=True)
+            except IntegrityError:
+                if QueuedTask.objects.filter(
+                    dedup_key=queued.dedup_key, status=ResultStatus.NEW
+                ).update(
+                    available_at=Least(
+                        "available_at",
+                        models.Value(queued.available_at, models.DateTimeField()),
+                    ),
+                    priority=Greatest("priority", models.Value(queued.priority)),
+                ):
+                    return
+            else:
+                task_enqueued.send(type(self), task_result=get_task_result(queued, self.alias))
+                return
+
+    def get_result(self, result_id):
+        from KNI.tasks.models import QueuedTask
+
+        try:
+            queued = QueuedTask.objects.get(pk=result_id)
+        except (QueuedTask.DoesNotExist, ValidationError):
+            raise ResultDoesNotExist(result_id)
+        return get_task_result(queued, self.alias)
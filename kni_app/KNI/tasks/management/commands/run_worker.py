@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django_tasks import DEFAULT_TASK_BACKEND_ALIAS, tasks
+
+from KNI.tasks.backend import DatabaseBackend
+from KNI.tasks.worker import run_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background tasks queued in the database, retrying failed "
+        "ones with backoff. Runs until interrupted, finishing the current "
+        "tasks first, unless --burst is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="How many tasks to run at once.",
+        )
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Run tasks in processes rather than threads, for CPU-bound tasks.",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Only run tasks from this queue. May be given several times.",
+        )
+        parser.add_argument("--backend", default=DEFAULT_TASK_BACKEND_ALIAS)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="How many seconds to wait before checking for tasks again when none are due.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no tasks are due.",
+        )
+
+    def handle(self, **options):
+        if not isinstance(tasks[options["backend"]], DatabaseBackend):
+            raise CommandError(
+                f"The {options['backend']!r} task backend doesn't queue tasks in the database."
+            )
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        run_workers(
+            concurrency=options["concurrency"],
+            processes=options["processes"],
+            alias=options["backend"],
+            queues=options["queues"],
+            interval=options["interval"],
+            burst=options["burst"],
+        )
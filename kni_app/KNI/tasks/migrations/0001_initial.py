@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:28
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('task_path', models.CharField(max_length=255)),
+                ('queue_name', models.CharField(max_length=100)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('args_kwargs', models.JSONField()),
+                ('dedup_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('NEW', 'New'), ('RUNNING', 'Running'), ('FAILED', 'Failed'), ('SUCCEEDED', 'Succeeded')], default='NEW', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('enqueued_at', models.DateTimeField()),
+                ('available_at', models.DateTimeField()),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('return_value', models.JSONField(blank=True, null=True)),
+                ('exception_class_path', models.CharField(blank=True, max_length=255)),
+                ('traceback', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'NEW')), fields=['queue_name', '-priority', 'available_at'], name='queuedtask_pending_idx'), models.Index(fields=['finished_at'], name='queuedtask_finished_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'NEW')), fields=('dedup_key',), name='queuedtask_unique_pending_dedup_key')],
+            },
+        ),
+    ]
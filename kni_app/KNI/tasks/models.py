@@ -0,0 +1,56 @@
+import uuid
+
+from django.db import models
+from django_tasks import ResultStatus
+
+
+class QueuedTask(models.Model):
+    """
+    A task enqueued on `KNI.tasks.backend.DatabaseBackend`, run by the
+    `run_worker` command.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task_path = models.CharField(max_length=255)
+    queue_name = models.CharField(max_length=100)
+    priority = models.SmallIntegerField(default=0)
+    args_kwargs = models.JSONField()
+    # Only one pending task may have a given key: enqueueing another one
+    # leaves the pending one to do the work
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=ResultStatus.choices, default=ResultStatus.NEW
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    enqueued_at = models.DateTimeField()
+    # When the task is due: when it was enqueued, its `run_after`, or when
+    # it's next retried
+    available_at = models.DateTimeField()
+    # While running, when another worker may assume this one died and take
+    # the task over
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    return_value = models.JSONField(null=True, blank=True)
+    exception_class_path = models.CharField(max_length=255, blank=True)
+    traceback = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status=ResultStatus.NEW),
+                name="queuedtask_unique_pending_dedup_key",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["queue_name", "-priority", "available_at"],
+                condition=models.Q(status=ResultStatus.NEW),
+                name="queuedtask_pending_idx",
+            ),
+            models.Index(fields=["finished_at"], name="queuedtask_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_path} ({self.get_status_display()})"
@@ -0,0 +1,254 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_tasks import ResultStatus, task
+from django_tasks.exceptions import ResultDoesNotExist
+
+from KNI.tasks.backend import QueueTask
+from KNI.tasks.models import QueuedTask
+from KNI.tasks.worker import LeaseExpired, Worker, claim_task
+from KNI.users.models import User
+
+
+@task()
+def add(a, b):
+    return a + b
+
+
+@task()
+def fail():
+    raise ValueError("Broken")
+
+
+enqueued_again = []
+
+
+@task(enqueue_on_commit=False)
+def fail_and_enqueue_again():
+    # The first time, a duplicate is enqueued while it runs
+    if not enqueued_again:
+        enqueued_again.append(fail_and_enqueue_again.enqueue())
+        raise ValueError("Broken")
+
+
+batches = []
+
+
+def run_adds(calls):
+    batches.append(calls)
+
+
+def fail_batch(calls):
+    raise ValueError("Broken")
+
+
+def run_worker():
+    call_command("run_worker", "--burst", stdout=StringIO())
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+    TASKS={"default": {"BACKEND": "KNI.tasks.backend.DatabaseBackend"}},
+    TASK_MAX_ATTEMPTS=2,
+    TASK_RETRY_DELAY=60,
+)
+class DatabaseBackendTests(TestCase):
+    def test_enqueued_on_commit_and_run_by_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = add.enqueue(1, 2)
+            self.assertFalse(QueuedTask.objects.exists())
+
+        self.assertEqual(QueuedTask.objects.get().status, ResultStatus.NEW)
+
+        run_worker()
+
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.SUCCEEDED)
+        self.assertEqual(result.return_value, 3)
+
+    def test_pending_duplicates_are_coalesced(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            add.enqueue(1, 2)
+            add.using(run_after=timezone.now() - timedelta(minutes=1)).enqueue(1, 2)
+            add.enqueue(2, 2)
+
+        self.assertEqual(QueuedTask.objects.count(), 2)
+        # Brought forward to the earliest requested time
+        self.assertLess(
+            QueuedTask.objects.get(args_kwargs__args=[1, 2]).available_at,
+            QueuedTask.objects.get(args_kwargs__args=[2, 2]).available_at,
+        )
+
+        # Once one has run, the same task can be queued again
+        run_worker()
+        with self.captureOnCommitCallbacks(execute=True):
+            add.enqueue(1, 2)
+        self.assertEqual(QueuedTask.objects.filter(args_kwargs__args=[1, 2]).count(), 2)
+
+    def test_explicit_dedup_key(self):
+        keyed = QueueTask(priority=0, func=add.func, backend="default", dedup_key="sums")
+        with self.captureOnCommitCallbacks(execute=True):
+            keyed.enqueue(1, 2)
+            keyed.enqueue(3, 4)
+
+        self.assertEqual(QueuedTask.objects.get().dedup_key, "sums")
+
+    def test_failures_are_retried_with_backoff(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = fail.enqueue()
+
+        run_worker()
+
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.status, ResultStatus.NEW)
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.available_at, timezone.now() + timedelta(seconds=50))
+
+        # Not due yet
+        run_worker()
+        self.assertEqual(QueuedTask.objects.get().attempts, 1)
+
+        QueuedTask.objects.update(available_at=timezone.now())
+        run_worker()
+
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.FAILED)
+        self.assertEqual(result.exception_class, ValueError)
+        self.assertIn("Broken", result.traceback)
+
+    def test_failure_superseded_by_pending_duplicate(self):
+        enqueued_again.clear()
+        result = fail_and_enqueue_again.enqueue()
+
+        with self.assertNoLogs("KNI.tasks.worker", "ERROR"):
+            run_worker()
+
+        # Dropped for the duplicate, which has run since
+        with self.assertRaises(ResultDoesNotExist):
+            result.refresh()
+        self.assertEqual(QueuedTask.objects.get().status, ResultStatus.SUCCEEDED)
+
+    def test_expired_lease_is_taken_over(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = add.enqueue(1, 2)
+        QueuedTask.objects.update(
+            status=ResultStatus.RUNNING,
+            attempts=1,
+            lease_expires_at=timezone.now() + timedelta(minutes=1),
+        )
+
+        run_worker()
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.RUNNING)
+
+        QueuedTask.objects.update(lease_expires_at=timezone.now())
+        run_worker()
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.SUCCEEDED)
+
+    def test_expired_lease_on_last_attempt_fails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = add.enqueue(1, 2)
+        # Its worker was killed on each attempt
+        QueuedTask.objects.update(
+            status=ResultStatus.RUNNING, attempts=2, lease_expires_at=timezone.now()
+        )
+
+        with self.assertLogs("KNI.tasks.worker", "ERROR"):
+            run_worker()
+
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.FAILED)
+        self.assertEqual(result.exception_class, LeaseExpired)
+        self.assertEqual(QueuedTask.objects.get().attempts, 2)
+
+    @override_settings(TASK_BATCH_RUNNERS={add.module_path: f"{__name__}.run_adds"})
+    def test_batch_runner(self):
+        batches.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            first = add.enqueue(1, 2)
+            add.enqueue(3, 4)
+
+        run_worker()
+
+        self.assertEqual(batches, [[([1, 2], {}), ([3, 4], {})]])
+        first.refresh()
+        self.assertEqual(first.status, ResultStatus.SUCCEEDED)
+
+    @override_settings(TASK_BATCH_RUNNERS={add.module_path: f"{__name__}.fail_batch"})
+    def test_failed_batch_runs_tasks_one_at_a_time(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = add.enqueue(1, 2)
+            second = add.enqueue(3, 4)
+
+        run_worker()
+
+        first.refresh()
+        second.refresh()
+        self.assertEqual((first.return_value, second.return_value), (3, 7))
+
+    def test_worker_survives_database_errors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = add.enqueue(1, 2)
+        stop = threading.Event()
+        calls = []
+
+        def claim_task_when_unlocked(queues, alias):
+            calls.append(queues)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            if len(calls) == 3:
+                stop.set()
+            return claim_task(queues, alias)
+
+        with (
+            mock.patch("KNI.tasks.worker.claim_task", claim_task_when_unlocked),
+            mock.patch("KNI.tasks.worker.close_old_connections"),
+            mock.patch.object(stop, "wait") as wait,
+            self.assertLogs("KNI.tasks.worker", "ERROR"),
+        ):
+            Worker().run(stop)
+
+        self.assertEqual(wait.call_args_list[0], mock.call(5))
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.SUCCEEDED)
+
+    def test_old_tasks_are_pruned(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            add.enqueue(1, 2)
+        run_worker()
+        QueuedTask.objects.update(finished_at=timezone.now() - timedelta(days=8))
+
+        run_worker()
+
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_queue_report(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            add.enqueue(1, 2)
+            fail.enqueue()
+        run_worker()
+        url = reverse("task_queue")
+
+        user = User.objects.create_user("editor", password="password", is_staff=True)
+        self.client.force_login(user)
+        self.assertNotEqual(self.client.get(url).status_code, 200)
+
+        user.is_superuser = True
+        user.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        [queue] = response.context["queues"]
+        self.assertEqual((queue["due"], queue["scheduled"], queue["running"]), (0, 1, 0))
+        self.assertIsNotNone(queue["average_wait"])
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.exceptions import PermissionDenied
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q
+from django.utils import timezone
+from django.views.generic import TemplateView
+from django_tasks import ResultStatus
+from wagtail.admin.views.generic.base import WagtailAdminTemplateMixin
+
+from KNI.tasks.models import QueuedTask
+
+
+def get_queue_stats(now=None):
+    """
+    Per queue: how many tasks are due, scheduled for later, running, and
+    failed in the last day, how long the oldest due task has waited, and
+    how long tasks started in the last hour waited on average.
+    """
+    now = now or timezone.now()
+    due = Q(status=ResultStatus.NEW, available_at__lte=now)
+    stats = (
+        QueuedTask.objects.values("queue_name")
+        .annotate(
+            due=Count("pk", filter=due),
+            scheduled=Count("pk", filter=Q(status=ResultStatus.NEW, available_at__gt=now)),
+            running=Count("pk", filter=Q(status=ResultStatus.RUNNING)),
+            failed=Count(
+                "pk",
+                filter=Q(status=ResultStatus.FAILED, finished_at__gte=now - timedelta(days=1)),
+            ),
+            oldest_due_at=Min("available_at", filter=due),
+            average_wait=Avg(
+                ExpressionWrapper(F("started_at") - F("available_at"), DurationField()),
+                filter=Q(started_at__gte=now - timedelta(hours=1)),
+            ),
+        )
+        .order_by("queue_name")
+    )
+    for queue in stats:
+        queue["oldest_wait"] = queue["oldest_due_at"] and now - queue["oldest_due_at"]
+        yield queue
+
+
+class QueueView(WagtailAdminTemplateMixin, TemplateView):
+    page_title = "Task queue"
+    header_icon = "cogs"
+    template_name = "tasks/queue.html"
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_breadcrumbs_items(self):
+        return self.breadcrumbs_items + [{"url": "", "label": self.page_title}]
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            queues=list(get_queue_stats()),
+            failures=QueuedTask.objects.filter(status=ResultStatus.FAILED).order_by(
+                "-finished_at"
+            )[:20],
+            **kwargs,
+        )
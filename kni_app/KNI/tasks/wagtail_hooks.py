@@ -0,0 +1,15 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import AdminOnlyMenuItem
+
+from KNI.tasks.views import QueueView
+
+
+@hooks.register("register_admin_urls")
+def register_admin_urls():
+    return [path("reports/task-queue/", QueueView.as_view(), name="task_queue")]
+
+
+@hooks.register("register_reports_menu_item")
+def register_task_queue_menu_item():
+    return AdminOnlyMenuItem("Task queue", reverse("task_queue"), icon_name="cogs", order=1000)
@@ -0,0 +1,372 @@
+"""
+Runs the tasks queued by KNI.tasks.backend.DatabaseBackend.
+
+A worker claims the most urgent due task by marking it running, on
+condition that its status and attempt count haven't changed since it was
+read, so two workers never run the same task, even on SQLite where rows
+can't be locked. A running task is leased for TASK_LEASE seconds: if its
+worker dies, another one takes it over once the lease is over, unless that
+was its last attempt, in which case it has failed.
+
+Tasks listed in TASK_BATCH_RUNNERS are run in batches: a worker claiming
+one also claims up to TASK_BATCH_SIZE - 1 more due calls of the same task,
+and runs them all with one call of the batch runner.
+
+Failed tasks are retried TASK_MAX_ATTEMPTS times in all, with exponential
+backoff. Finished tasks are kept for TASK_RETENTION_DAYS, for the queue
+report in the admin.
+"""
+
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from datetime import timedelta
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_tasks import ResultStatus, tasks
+from django_tasks.signals import task_finished
+from django_tasks.utils import get_exception_traceback, get_module_path, json_normalize
+
+from KNI.tasks.backend import get_task_result
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 3600
+ERROR_DELAY = 5
+
+
+class LeaseExpired(Exception):
+    """
+    The worker running a task stopped before finishing it, such as when it
+    was killed for running out of memory.
+    """
+
+
+def get_max_attempts():
+    return getattr(settings, "TASK_MAX_ATTEMPTS", 5)
+
+
+def get_retry_delay(attempts):
+    """
+    How long to wait after the `attempts`th failure: TASK_RETRY_DELAY
+    seconds, doubled each time, up to an hour.
+    """
+    delay = getattr(settings, "TASK_RETRY_DELAY", 10) * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, 3600))
+
+
+def get_batch_runner(task_path):
+    """
+    The function running queued calls of the task `task_path` together,
+    given their [(args, kwargs)], if TASK_BATCH_RUNNERS has one.
+    """
+    path = getattr(settings, "TASK_BATCH_RUNNERS", {}).get(task_path)
+    return import_string(path) if path else None
+
+
+def claim(queued, now):
+    """
+    Mark `queued` as running in this worker, unless another worker did first.
+    """
+    from KNI.tasks.models import QueuedTask
+
+    lease_expires_at = now + timedelta(seconds=getattr(settings, "TASK_LEASE", 600))
+    if not QueuedTask.objects.filter(
+        pk=queued.pk, status=queued.status, attempts=queued.attempts
+    ).update(
+        status=ResultStatus.RUNNING,
+        attempts=F("attempts") + 1,
+        started_at=now,
+        lease_expires_at=lease_expires_at,
+    ):
+        return False
+    queued.status = ResultStatus.RUNNING
+    queued.attempts += 1
+    queued.started_at = now
+    queued.lease_expires_at = lease_expires_at
+    return True
+
+
+def claim_task(queues=None, alias="default"):
+    """
+    The next due task, marked as running in this worker, or None. Tasks
+    whose workers stopped on their last attempt are marked as failed.
+    """
+    from KNI.tasks.models import QueuedTask
+
+    now = timezone.now()
+    candidates = QueuedTask.objects.filter(
+        Q(status=ResultStatus.NEW, available_at__lte=now)
+        | Q(status=ResultStatus.RUNNING, lease_expires_at__lte=now)
+    )
+    if queues:
+        candidates = candidates.filter(queue_name__in=queues)
+
+    # A few candidates, in case other workers claim the first ones first
+    for queued in candidates.order_by("-priority", "available_at")[:10]:
+        if queued.status == ResultStatus.RUNNING and queued.attempts >= get_max_attempts():
+            # Not run again, as it might stop every worker running it
+            record_failure(
+                queued, LeaseExpired(f"No result after {queued.attempts} attempts"), alias
+            )
+        elif claim(queued, now):
+            return queued
+    return None
+
+
+def claim_batch(queued):
+    """
+    `queued`, and up to TASK_BATCH_SIZE - 1 other due calls of the same task
+    in its queue, marked as running in this worker.
+    """
+    from KNI.tasks.models import QueuedTask
+
+    now = timezone.now()
+    others = QueuedTask.objects.filter(
+        task_path=queued.task_path,
+        queue_name=queued.queue_name,
+        status=ResultStatus.NEW,
+        available_at__lte=now,
+    ).order_by("available_at")[: getattr(settings, "TASK_BATCH_SIZE", 100) - 1]
+    # One commit for all the claims
+    with transaction.atomic():
+        return [queued] + [other for other in others if claim(other, now)]
+
+
+def run_task(queued, alias):
+    args_kwargs = queued.args_kwargs
+    try:
+        return_value = json_normalize(
+            import_string(queued.task_path).call(*args_kwargs["args"], **args_kwargs["kwargs"])
+        )
+    except Exception as e:
+        record_failure(queued, e, alias)
+        return
+    record_success(queued, return_value, alias)
+
+
+def run_batch(batch, runner, alias):
+    """
+    Run the queued calls in `batch` with one call of `runner`. Should it
+    fail, they're run one at a time, so that each is retried or given up on
+    by itself.
+    """
+    try:
+        runner([(queued.args_kwargs["args"], queued.args_kwargs["kwargs"]) for queued in batch])
+    except Exception as e:
+        logger.warning(
+            "Batch of %s %s tasks failed, running them one at a time: %r",
+            len(batch),
+            batch[0].task_path,
+            e,
+        )
+        for queued in batch:
+            run_task(queued, alias)
+        return
+
+    with transaction.atomic():
+        for queued in batch:
+            record_success(queued, None, alias)
+
+
+def record_success(queued, return_value, alias):
+    from KNI.tasks.models import QueuedTask
+
+    queued.status = ResultStatus.SUCCEEDED
+    queued.finished_at = timezone.now()
+    queued.return_value = return_value
+    # Unless the lease ran out, and another worker took the task over
+    if QueuedTask.objects.filter(pk=queued.pk, attempts=queued.attempts).update(
+        status=queued.status,
+        finished_at=queued.finished_at,
+        lease_expires_at=None,
+        return_value=return_value,
+    ):
+        task_finished.send(type(tasks[alias]), task_result=get_task_result(queued, alias))
+
+
+def record_failure(queued, error, alias):
+    from KNI.tasks.models import QueuedTask
+
+    now = timezone.now()
+    current = QueuedTask.objects.filter(pk=queued.pk, attempts=queued.attempts)
+    queued.exception_class_path = get_module_path(type(error))
+    queued.traceback = get_exception_traceback(error)
+    if queued.attempts < get_max_attempts():
+        try:
+            with transaction.atomic():
+                retried = current.update(
+                    status=ResultStatus.NEW,
+                    available_at=now + get_retry_delay(queued.attempts),
+                    lease_expires_at=None,
+                    exception_class_path=queued.exception_class_path,
+                    traceback=queued.traceback,
+                )
+        except IntegrityError:
+            # The same task was enqueued again since this one started, and
+            # will do its work: this one isn't retried, nor has it failed
+            if current.delete()[0]:
+                logger.info(
+                    "Task %s (%s) failed, superseded by a pending duplicate: %r",
+                    queued.pk,
+                    queued.task_path,
+                    error,
+                )
+            return
+        else:
+            if retried:
+                logger.warning(
+                    "Task %s (%s) failed, attempt %s: %r",
+                    queued.pk,
+                    queued.task_path,
+                    queued.attempts,
+                    error,
+                )
+            return
+
+    queued.status = ResultStatus.FAILED
+    queued.finished_at = now
+    if current.update(
+        status=queued.status,
+        finished_at=now,
+        lease_expires_at=None,
+        exception_class_path=queued.exception_class_path,
+        traceback=queued.traceback,
+    ):
+        logger.error("Giving up on task %s (%s): %r", queued.pk, queued.task_path, error)
+        task_finished.send(type(tasks[alias]), task_result=get_task_result(queued, alias))
+
+
+def prune_tasks():
+    """
+    Delete tasks finished more than TASK_RETENTION_DAYS ago.
+    """
+    from KNI.tasks.models import QueuedTask
+
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "TASK_RETENTION_DAYS", 7))
+    return QueuedTask.objects.filter(finished_at__lt=cutoff).delete()[0]
+
+
+class Worker:
+    def __init__(self, alias="default", queues=None, interval=1, burst=False):
+        self.alias = alias
+        self.queues = queues
+        self.interval = interval
+        self.burst = burst
+        self.pruned_at = None
+
+    def run(self, stop):
+        """
+        Run due tasks one at a time (or one batch at a time) until `stop` is
+        set, or in burst mode until none are due. Errors outside tasks, such
+        as the database being locked, are logged and retried with backoff,
+        except in burst mode.
+        """
+        errors = 0
+        while not stop.is_set():
+            try:
+                ran = self.run_next()
+            except Exception:
+                if self.burst:
+                    raise
+                errors += 1
+                delay = min(ERROR_DELAY * 2 ** (errors - 1), 60)
+                logger.exception("Task worker error, trying again in %ss", delay)
+                close_old_connections()
+                stop.wait(delay)
+                continue
+            errors = 0
+            if ran:
+                continue
+            if self.burst:
+                break
+            # As at the end of a request: drop connections past their
+            # CONN_MAX_AGE, or broken
+            close_old_connections()
+            stop.wait(self.interval)
+
+    def run_next(self):
+        """
+        Run the next due task or batch, or prune old tasks if none is due
+        (every PRUNE_INTERVAL at most). Returns whether a task ran.
+        """
+        queued = claim_task(self.queues, self.alias)
+        if queued is not None:
+            runner = get_batch_runner(queued.task_path)
+            if runner is None:
+                run_task(queued, self.alias)
+            else:
+                run_batch(claim_batch(queued), runner, self.alias)
+            return True
+        if self.pruned_at is None or time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+            prune_tasks()
+            self.pruned_at = time.monotonic()
+        return False
+
+
+def run_in_thread(options, stop):
+    try:
+        Worker(**options).run(stop)
+    finally:
+        connections.close_all()
+
+
+def run_in_process(options, stop):
+    # The parent passes signals on through `stop`, letting the current task
+    # finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    if not apps.ready:
+        django.setup()
+    run_in_thread(options, stop)
+
+
+def run_workers(concurrency=1, processes=False, **options):
+    """
+    Run a `Worker(**options)` in this thread, or `concurrency` of them in
+    threads or processes, until interrupted, or in burst mode until no tasks
+    are due. Workers finish their current task before stopping.
+    """
+    if concurrency == 1:
+        stop = threading.Event()
+        runners = []
+    elif processes:
+        stop = multiprocessing.Event()
+        # Children mustn't share the parent's database connections
+        connections.close_all()
+        runners = [
+            multiprocessing.Process(target=run_in_process, args=(options, stop))
+            for _ in range(concurrency)
+        ]
+    else:
+        stop = threading.Event()
+        runners = [
+            threading.Thread(target=run_in_thread, args=(options, stop))
+            for _ in range(concurrency)
+        ]
+
+    def handle_signal(signum, frame):
+        logger.info("Stopping once the current tasks finish")
+        stop.set()
+
+    previous = {
+        signum: signal.signal(signum, handle_signal) for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        if not runners:
+            Worker(**options).run(stop)
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
@@ -2,20 +2,31 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import include, path, re_path
 from django.contrib import admin
-from django.views.static import serve as serve_static
 import re
 
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from KNI.images.views import RenditionServeView
 from KNI.search import views as search_views
+from KNI.utils import views as utils_views
+from KNI.utils.views import serve_media
+
+handler404 = "KNI.utils.views.page_not_found"
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("_util/userbar/<int:page_id>/", utils_views.userbar, name="userbar"),
+    path("_util/csrf-token/", utils_views.csrf_token, name="csrf_token"),
+    re_path(
+        r"^images/([^/]*)/(\d*)/([^/]*)/[^/]*$",
+        RenditionServeView.as_view(),
+        name="wagtailimages_serve",
+    ),
 ]
 
 
@@ -26,7 +37,7 @@ if settings.MEDIA_URL and settings.MEDIA_ROOT:
         urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     else:
         urlpatterns += [
-            re_path(r"^%s(?P<path>.*)$" % re.escape(media_prefix), serve_static, {"document_root": settings.MEDIA_ROOT}),
+            re_path(r"^%s(?P<path>.*)$" % re.escape(media_prefix), serve_media),
         ]
 
 if settings.DEBUG:
@@ -5,3 +5,8 @@ class UtilsConfig(AppConfig):
     default_auto_field: str = "django.db.models.AutoField"
     name = "KNI.utils"
     label = "utils"
+
+    def ready(self):
+        from KNI.utils.signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
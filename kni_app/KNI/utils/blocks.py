@@ -2,6 +2,7 @@ from collections import defaultdict
 
 from django.core.exceptions import ValidationError
 from django.forms.utils import ErrorList
+from django.template.defaultfilters import slugify
 from wagtail import blocks
 from wagtail.blocks.struct_block import StructBlockValidationError
 from wagtail.documents.blocks import DocumentChooserBlock
@@ -11,6 +12,14 @@ from wagtail.snippets.blocks import SnippetChooserBlock
 from KNI.utils.struct_values import CardStructValue, LinkStructValue
 
 
+def get_heading_id(text, block_id) -> str:
+    """
+    The anchor ID of a heading: its slugified text and the first 8 characters
+    of its block's ID, so it's unique on the page.
+    """
+    return f"{slugify(text)}-{block_id[:8]}"
+
+
 class AccordionBlock(blocks.StructBlock):
     title = blocks.CharBlock(max_length=255)
     content = blocks.RichTextBlock()
@@ -227,3 +236,13 @@ class StoryBlock(blocks.StreamBlock):
 
     class Meta:
         template = "components/streamfield/stream_block.html"
+
+    def get_table_of_contents(self, value) -> list[tuple[str, str]]:
+        """
+        (anchor ID, heading) for each section in `value`.
+        """
+        return [
+            (get_heading_id(child.value["heading"], child.id), child.value["heading"])
+            for child in value
+            if child.block_type == "section"
+        ]
@@ -1,4 +1,8 @@
+import time
+import uuid
+
 from django.conf import settings
+from django.core.cache import cache
 from django.views.decorators.cache import cache_control
 
 
@@ -27,3 +31,34 @@ def get_default_cache_control_decorator():
     """
     cache_control_kwargs = get_default_cache_control_kwargs()
     return cache_control(**cache_control_kwargs)
+
+
+class ProcessCache:
+    """
+    A dict kept in this process's memory, for data read on most requests and
+    rarely changed. Invalidating it bumps a generation key in the shared
+    cache, which other processes check every PROCESS_CACHE_CHECK_INTERVAL
+    seconds, so a warm process usually doesn't query anything.
+    """
+
+    def __init__(self, generation_key):
+        self.generation_key = generation_key
+        self.data = {}
+        self.generation = None
+        self.checked_at = None
+
+    def get_data(self):
+        now = time.monotonic()
+        interval = getattr(settings, "PROCESS_CACHE_CHECK_INTERVAL", 10)
+        if self.checked_at is None or now - self.checked_at >= interval:
+            self.checked_at = now
+            generation = cache.get(self.generation_key)
+            if generation != self.generation:
+                self.data = {}
+                self.generation = generation
+        return self.data
+
+    def invalidate(self):
+        self.data = {}
+        self.generation = uuid.uuid4().hex
+        cache.set(self.generation_key, self.generation, None)
@@ -0,0 +1,220 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from KNI.utils.storage import get_file_md5, get_storage_id, list_files
+
+
+def get_storage(value):
+    """
+    A storage from a STORAGES alias, a local folder or a storage class path
+    (instantiated with its settings, such as AWS_STORAGE_BUCKET_NAME).
+    """
+    if value in settings.STORAGES:
+        return storages[value]
+    if os.path.isabs(value) or value.startswith("."):
+        return FileSystemStorage(location=value)
+    try:
+        return import_string(value)()
+    except ImportError:
+        raise CommandError(
+            f"{value!r} is not a STORAGES alias, a folder path or a storage class."
+        )
+
+
+class Checkpoint:
+    """
+    The files copied or found unchanged so far, appended to a file as they
+    complete, so an interrupted sync can pick up where it stopped. The file
+    starts with the source and destination it's for, so it isn't used for
+    another sync.
+    """
+
+    def __init__(self, path, source, destination):
+        self.path = path
+        self.sync = {"source": source, "destination": destination}
+        self.sizes = {}
+        self.started = False
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Cut short when the sync was interrupted
+                        continue
+                    if not self.started:
+                        if entry != self.sync:
+                            raise CommandError(
+                                f"The checkpoint file {path} is not for syncing {source} "
+                                f"to {destination}. Pass --restart to delete it, or "
+                                "another --checkpoint."
+                            )
+                        self.started = True
+                        continue
+                    self.sizes[entry["name"]] = entry["size"]
+        self.file = None
+
+    def __contains__(self, file):
+        name, size = file
+        return self.sizes.get(name) == size
+
+    def add(self, name, size):
+        self.sizes[name] = size
+        if self.path:
+            if self.file is None:
+                self.file = open(self.path, "a")
+            if not self.started:
+                self.file.write(json.dumps(self.sync) + "\n")
+                self.started = True
+            self.file.write(json.dumps({"name": name, "size": size}) + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy media files from one storage to another, such as from the local "
+        "media folder to an S3 bucket, skipping files the destination already "
+        "has. Interrupted runs resume from the checkpoint file. To try it "
+        "against a local S3-compatible server such as MinIO, point "
+        "AWS_S3_ENDPOINT_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            help="A STORAGES alias (such as 'default'), a local folder path, or "
+            "a storage class path.",
+        )
+        parser.add_argument("destination", help="As for source.")
+        parser.add_argument(
+            "--prefix", default="", help="Only sync files under this folder."
+        )
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument(
+            "--checkpoint",
+            default="sync_media.checkpoint",
+            help="File recording progress, to resume from, for the same source "
+            "and destination only. Pass an empty string to disable.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint file, and check every file again.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be copied without copying anything.",
+        )
+
+    def handle(self, **options):
+        source = get_storage(options["source"])
+        destination = get_storage(options["destination"])
+        self.dry_run = options["dry_run"]
+
+        checkpoint_path = options["checkpoint"]
+        if options["restart"] and checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoint = Checkpoint(
+            checkpoint_path, get_storage_id(source), get_storage_id(destination)
+        )
+
+        # Both sides are listed up front, so deciding what to copy costs no
+        # request per file
+        self.destination_files = {
+            name: (size, md5) for name, size, md5 in list_files(destination, options["prefix"])
+        }
+        listed = list(list_files(source, options["prefix"]))
+        source_files = [file for file in listed if file[:2] not in checkpoint]
+        resumed = len(listed) - len(source_files)
+
+        counts = {"copied": 0, "unchanged": 0, "failed": 0, "bytes": 0}
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                futures = {
+                    executor.submit(self.sync_file, source, destination, *file): file
+                    for file in source_files
+                }
+                try:
+                    self.collect(futures, checkpoint, counts, len(source_files), started)
+                except KeyboardInterrupt:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise CommandError("Interrupted. Run the command again to resume.")
+        finally:
+            checkpoint.close()
+
+        self.report(counts, len(source_files), started)
+        if resumed:
+            self.stdout.write(f"{resumed} file(s) were already synced by a previous run.")
+        if counts["failed"]:
+            raise CommandError(
+                f"{counts['failed']} file(s) failed. Run the command again to retry them."
+            )
+
+    def collect(self, futures, checkpoint, counts, total, started):
+        last_report = started
+        for future in as_completed(futures):
+            name, size, _ = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # noqa: BLE001
+                # Not checkpointed, so retried on the next run
+                counts["failed"] += 1
+                self.stderr.write(f"{name}: {e}")
+                continue
+            counts[result] += 1
+            if result == "copied":
+                counts["bytes"] += size
+            if not self.dry_run:
+                checkpoint.add(name, size)
+
+            if time.monotonic() - last_report > 5:
+                last_report = time.monotonic()
+                self.report(counts, total, started)
+
+    def sync_file(self, source, destination, name, size, md5):
+        existing = self.destination_files.get(name)
+        if existing is not None:
+            existing_size, existing_md5 = existing
+            if existing_size == size:
+                # Equal sizes, so compare the contents. Hashes S3 reports for
+                # free are used, others are worked out.
+                md5 = md5 or get_file_md5(source, name)
+                if md5 == (existing_md5 or get_file_md5(destination, name)):
+                    return "unchanged"
+
+        if self.dry_run:
+            return "copied"
+
+        with source.open(name) as f:
+            if existing is not None:
+                # Storages pick a new name rather than overwrite
+                destination.delete(name)
+            saved_name = destination.save(name, f)
+        if saved_name != name:
+            raise ValueError(f"Saved as {saved_name}, as {name} exists.")
+        return "copied"
+
+    def report(self, counts, total, started):
+        elapsed = time.monotonic() - started
+        done = counts["copied"] + counts["unchanged"] + counts["failed"]
+        copied_bytes = counts["bytes"]
+        verb = "would copy" if self.dry_run else "copied"
+        self.stdout.write(
+            f"{done}/{total} file(s) checked: {counts['copied']} {verb} "
+            f"({copied_bytes / 1024 / 1024:.1f} MB), {counts['unchanged']} unchanged, "
+            f"{counts['failed']} failed. {done / elapsed if elapsed else 0:.1f} files/s, "
+            f"{copied_bytes / 1024 / 1024 / elapsed if elapsed else 0:.1f} MB/s."
+        )
@@ -0,0 +1,31 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from KNI.utils.models import BasePage
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the plain text introduction of pages saved before it was worked "
+        "out on save, or after changing how it is worked out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, **options):
+        updated = 0
+        for model in apps.get_models():
+            if not issubclass(model, BasePage):
+                continue
+            pages = model.objects.order_by("pk")
+            for page in pages.iterator(chunk_size=options["batch_size"]):
+                plain_introduction = page.get_plain_introduction()
+                if plain_introduction != page.plain_introduction:
+                    # Not saved, so no revision or log entry is created
+                    model.objects.filter(pk=page.pk).update(
+                        plain_introduction=plain_introduction
+                    )
+                    updated += 1
+
+        self.stdout.write(f"Updated {updated} page(s).")
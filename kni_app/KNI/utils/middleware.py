@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.http import (
+    HttpResponseNotFound,
+    HttpResponsePermanentRedirect,
+    HttpResponseRedirect,
+)
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from wagtail import views as wagtail_views
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Site
+
+from KNI.utils.cache import get_default_cache_control_kwargs
+from KNI.utils.redirects import find_redirect, is_probe_path
+from KNI.utils.routing import route_for_request
+
+PROBE_RESPONSE_BODY = b"Not found"
+
+
+class RouteCacheMiddleware:
+    """
+    Look up the page for Wagtail's serve view from the route table, rather
+    than letting it walk the tree.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if view_func is wagtail_views.serve and not hasattr(
+            request, "_wagtail_route_for_request"
+        ):
+            # Page.route_for_request, which the view calls, reuses this
+            request._wagtail_route_for_request = route_for_request(request, view_args[0])
+
+
+class RedirectMiddleware:
+    """
+    Wagtail's `RedirectMiddleware`, with redirects looked up from the
+    compiled table rather than queried on every 404.
+
+    Paths only bots ask for get a minimal 404 before anything else is done
+    for them, rather than the site's rendered 404 page.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path
+        if is_probe_path(path):
+            response = self.get_redirect_response(request)
+            if response is None:
+                response = HttpResponseNotFound(PROBE_RESPONSE_BODY, content_type="text/plain")
+                patch_cache_control(response, **get_default_cache_control_kwargs())
+            return response
+
+        response = self.get_response(request)
+        if response.status_code == 404:
+            return self.get_redirect_response(request) or response
+        return response
+
+    def get_redirect_response(self, request):
+        path = Redirect.normalise_path(request.get_full_path())
+        # URLs with null characters can't be stored as redirects
+        if "\0" in path:
+            return None
+        redirect = find_redirect(Site.find_for_request(request), path)
+        if redirect is None:
+            return None
+        if redirect.is_permanent:
+            return HttpResponsePermanentRedirect(redirect.link)
+        return HttpResponseRedirect(redirect.link)
+
+
+class UserbarCookieMiddleware:
+    """
+    With SESSION_FREE_PAGES, mark browsers signed in to the admin with a
+    cookie scripts can read, so pages only fetch the user bar for editors.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.SESSION_FREE_PAGES or not request.path.startswith(
+            reverse("wagtailadmin_home")
+        ):
+            return response
+
+        # The admin loads the user anyway
+        is_editor = request.user.has_perm("wagtailadmin.access_admin")
+        has_cookie = settings.USERBAR_COOKIE_NAME in request.COOKIES
+        if is_editor and not has_cookie:
+            response.set_cookie(
+                settings.USERBAR_COOKIE_NAME,
+                "1",
+                max_age=settings.SESSION_COOKIE_AGE,
+                secure=settings.SESSION_COOKIE_SECURE,
+                samesite="Lax",
+            )
+        elif has_cookie and not is_editor:
+            response.delete_cookie(settings.USERBAR_COOKIE_NAME, samesite="Lax")
+        return response
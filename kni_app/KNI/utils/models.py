@@ -4,7 +4,6 @@ from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.files.images import ImageFile
 from django.contrib.staticfiles.finders import find
 from django.db import models
-from django.db.models import QuerySet
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
 from modelcluster.fields import ParentalKey
@@ -17,9 +16,10 @@ from wagtail.models import Orderable, Page
 from wagtail.rich_text import expand_db_html
 from wagtail.snippets.models import register_snippet
 
+from KNI.images.deferred import defer_renditions_on_render
 from KNI.images.models import CustomImage
 from KNI.utils.cache import get_default_cache_control_decorator
-from KNI.utils.query import order_by_pk_position
+from KNI.utils.query import get_pages_in_order, prefetch_listing_images
 
 
 # Related pages
@@ -276,9 +276,13 @@ class SystemMessagesSettings(BaseSiteSetting):
             im = WillowImage.open(img_file)
             width, height = im.get_size()
 
-            new_default_image = CustomImage(title="Placeholder Image", file=img_file, width=width, height=height)
-            new_default_image.save()
-            new_default_image.tags.add("placeholder")
+            # Reuse the placeholder created for another site, or before this
+            # setting was cleared, rather than storing another copy
+            new_default_image, created = CustomImage.get_or_create_for_file(
+                img_file, title="Placeholder Image", width=width, height=height
+            )
+            if created:
+                new_default_image.tags.add("placeholder")
 
             self.placeholder_image = new_default_image
             self.save()  # Save to persist new image as placeholder
@@ -288,6 +292,7 @@ class SystemMessagesSettings(BaseSiteSetting):
 
 # Apply default cache headers on this page model's serve method.
 @method_decorator(get_default_cache_control_decorator(), name="serve")
+@method_decorator(defer_renditions_on_render, name="serve")
 class BasePage(SocialFields, ListingFields, Page):
     show_in_menus_default = True
 
@@ -297,6 +302,10 @@ class BasePage(SocialFields, ListingFields, Page):
         "If unchecked, the page will no longer be indexed by search engines.",
     )
 
+    # The introduction as plain text, for listings. Set on save, see
+    # get_plain_introduction().
+    plain_introduction = models.TextField(blank=True, editable=False)
+
     class Meta:
         abstract = True
 
@@ -310,48 +319,49 @@ class BasePage(SocialFields, ListingFields, Page):
     )
 
     @cached_property
-    def related_pages(self) -> QuerySet:
+    def related_pages(self) -> list[Page]:
         """
-        Return a `PageQuerySet` of items related to this page via the
-        `PageRelatedPage` through model, and are suitable for display.
-        The result is ordered to match that specified by editors using
-        the 'page_related_pages' `InlinePanel`.
+        Return a list of the specific pages related to this page via the
+        `PageRelatedPage` through model, and are suitable for display, with
+        their listing images prefetched. The result is ordered to match that
+        specified by editors using the 'page_related_pages' `InlinePanel`.
         """
 
         # NOTE: avoiding values_list() here for compatibility with preview
         # See: https://github.com/wagtail/django-modelcluster/issues/30
-        ordered_page_pks = tuple(item.page_id for item in self.page_related_pages.all())
-        return order_by_pk_position(
-            Page.objects.live().public().specific(),
-            pks=ordered_page_pks,
-            exclude_non_matches=True,
-        )
+        ordered_page_pks = [item.page_id for item in self.page_related_pages.all()]
+        pages = get_pages_in_order(Page.objects.live().public(), ordered_page_pks)
+        prefetch_listing_images(pages)
+        return pages
 
-    @property
-    def plain_introduction(self):
+    def get_plain_introduction(self) -> str:
         """
-        This property returns a plain text representation of a model's 'introduction' field.
-
-        If 'introduction' is a RichTextField, the method uses BeautifulSoup to filter and parse
-        the rich text content, returning the plain text. If 'introduction' is a standard TextField
-        or if it doesn't exist, the method returns the original text or an empty string.
+        A plain text representation of the page's 'introduction' field.
 
-        Returns:
-            str: Plain text representation of the 'introduction' field or none if the field
-            doesn't exist or is blank.
+        If 'introduction' is a RichTextField, BeautifulSoup is used to parse the
+        rich text content and return its text. If it is a standard TextField, its
+        value is returned as is, and if the page has no 'introduction' field, an
+        empty string is returned.
         """
         try:
             introduction_field = self._meta.get_field("introduction")
         except FieldDoesNotExist:
-            pass
-        else:
-            introduction_value = getattr(self, "introduction", None)
-            if introduction_value:
-                if isinstance(introduction_field, RichTextField):
-                    soup = BeautifulSoup(expand_db_html(introduction_value), "html.parser")
-                    return soup.text
-                else:
-                    return introduction_value
+            return ""
+
+        introduction_value = getattr(self, "introduction", None)
+        if introduction_value and isinstance(introduction_field, RichTextField):
+            soup = BeautifulSoup(expand_db_html(introduction_value), "html.parser")
+            return soup.text
+        return introduction_value or ""
+
+    def save(self, *args, **kwargs):
+        # Cards and search results show this for every page they list, so it's
+        # worked out once here rather than parsed on each render
+        self.plain_introduction = self.get_plain_introduction()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "introduction" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "plain_introduction"}
+        return super().save(*args, **kwargs)
 
 
 BasePage._meta.get_field("seo_title").verbose_name = "Title tag"
@@ -1,22 +1,31 @@
-from django.db.models import Case, IntegerField, QuerySet, When
+from django.db.models import Prefetch, prefetch_related_objects
+from wagtail.images import get_image_model
+from wagtail.models import Page
 
 
-def order_by_pk_position(
-    queryset: QuerySet,
-    pks,
-    exclude_non_matches = False,
-) -> QuerySet:
+def get_pages_in_order(queryset, pks) -> list[Page]:
     """
-    Returns the supplied `queryset` ordered according to the
-    PK's position in `pks` (a list or tuple of pk values).
+    Returns the specific pages from `queryset` with the given PKs, ordered
+    according to their position in `pks`. PKs not matching a page in
+    `queryset` are skipped.
 
-    Use the `exclude_non_matches` option to exclude items with
-    a PK value not in `pks`.
+    Fetched with one query for the pages and one per page type, and ordered
+    in Python, so the query doesn't grow with the number of PKs.
     """
-    if exclude_non_matches:
-        queryset = queryset.filter(pk__in=pks)
+    pages = {page.pk: page for page in queryset.filter(pk__in=pks).specific()}
+    return [pages[pk] for pk in pks if pk in pages]
 
-    cases = (When(pk=value, then=i) for i, value in enumerate(pks))
-    return queryset.annotate(
-        pk_pos_order=Case(*cases, default=len(pks), output_field=IntegerField())
-    ).order_by("pk_pos_order")
+
+def prefetch_listing_images(pages):
+    """
+    Fetch the listing images of `pages` and their renditions in one query
+    each per page type, rather than one per card.
+    """
+    pages_by_model = {}
+    for page in pages:
+        if hasattr(page, "listing_image_id"):
+            pages_by_model.setdefault(type(page), []).append(page)
+
+    images = get_image_model().objects.prefetch_renditions()
+    for model_pages in pages_by_model.values():
+        prefetch_related_objects(model_pages, Prefetch("listing_image", queryset=images))
@@ -0,0 +1,76 @@
+"""
+Wagtail's redirects, compiled into a per-process table, so 404s are
+looked up without a query.
+"""
+
+import re
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.utils.encoding import uri_to_iri
+from wagtail.contrib.redirects.models import Redirect
+
+from KNI.utils.cache import ProcessCache
+
+# Cleared whenever a redirect, or a page one may point to, changes
+redirect_cache = ProcessCache("redirects-generation")
+
+
+class CompiledRedirect(NamedTuple):
+    link: str
+    is_permanent: bool
+
+
+def invalidate_redirects():
+    redirect_cache.invalidate()
+
+
+def build_redirects() -> dict[tuple[int | None, str], CompiledRedirect]:
+    """
+    {(site ID, normalised old path): CompiledRedirect}, with a site ID of
+    None for redirects applying to all sites.
+    """
+    redirects = {}
+    for redirect in Redirect.objects.select_related("redirect_page"):
+        link = redirect.link
+        if link is not None:
+            redirects[(redirect.site_id, redirect.old_path)] = CompiledRedirect(
+                link, redirect.is_permanent
+            )
+    return redirects
+
+
+def get_redirects():
+    data = redirect_cache.get_data()
+    if "redirects" not in data:
+        data["redirects"] = build_redirects()
+    return data["redirects"]
+
+
+def find_redirect(site, path) -> CompiledRedirect | None:
+    """
+    The redirect for the normalised `path`, as `RedirectMiddleware` would
+    find it: site-specific redirects first, then undecoded paths, then the
+    path without its query string.
+    """
+    redirects = get_redirects()
+    site_id = site.pk if site else None
+    candidates = [path, uri_to_iri(path)]
+    path_without_query = urlparse(path).path
+    if path_without_query != path:
+        candidates += [path_without_query, uri_to_iri(path_without_query)]
+    for candidate in candidates:
+        redirect = redirects.get((site_id, candidate)) or redirects.get((None, candidate))
+        if redirect:
+            return redirect
+    return None
+
+
+def is_probe_path(path):
+    """
+    Whether `path` is one bots probe for on any site, such as WordPress's
+    login page, and will never be one of ours.
+    """
+    # re caches compiled patterns
+    return any(re.search(pattern, path) for pattern in settings.PROBE_PATH_PATTERNS)
@@ -0,0 +1,117 @@
+"""
+Resolve front-end URLs to pages from a per-process table of the pages'
+`url_path`s, rather than letting Wagtail walk the tree with one child lookup
+per URL segment and then fetch the specific page.
+"""
+
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError
+from django.http import Http404
+from wagtail.models import Page, Site
+
+from KNI.utils.cache import ProcessCache
+
+# Site ID -> SiteRoutes. Cleared whenever a page's URL may have changed
+route_cache = ProcessCache("routes-generation")
+
+
+class Route(NamedTuple):
+    page_id: int
+    content_type_id: int
+
+
+class SiteRoutes(NamedTuple):
+    root_url_path: str
+    # Page URL paths relative to the site's root page, like "news/article/"
+    routes: dict[str, Route]
+    # Paths of pages whose models route the URLs below them themselves, like
+    # those using RoutablePageMixin
+    custom_routes: frozenset[str]
+
+
+def invalidate_routes():
+    route_cache.invalidate()
+
+
+def has_custom_routing(model):
+    return model.route is not Page.route
+
+
+def get_page_model(content_type_id):
+    return ContentType.objects.get_for_id(content_type_id).model_class()
+
+
+def build_site_routes(site) -> SiteRoutes:
+    root = Page.objects.only("path", "url_path").get(pk=site.root_page_id)
+    routes = {}
+    custom_routes = set()
+    pages = Page.objects.filter(path__startswith=root.path).values_list(
+        "pk", "url_path", "content_type_id"
+    )
+    for page_id, url_path, content_type_id in pages:
+        path = url_path[len(root.url_path) :]
+        routes[path] = Route(page_id, content_type_id)
+        model = get_page_model(content_type_id)
+        if model is None or has_custom_routing(model):
+            custom_routes.add(path)
+    return SiteRoutes(root.url_path, routes, frozenset(custom_routes))
+
+
+def get_site_routes(site) -> SiteRoutes:
+    routes = route_cache.get_data()
+    if site.pk not in routes:
+        routes[site.pk] = build_site_routes(site)
+    return routes[site.pk]
+
+
+def warm_routes():
+    """
+    Build the route tables of every site, so a new process's first requests
+    don't pay for it. Skipped if the database isn't reachable yet.
+    """
+    try:
+        for site in Site.objects.all():
+            get_site_routes(site)
+    except DatabaseError:
+        pass
+
+
+def route_for_request(request, path):
+    """
+    The same result as `Page.route_for_request`: a `RouteResult`, or None if
+    no live page serves `path`. A page in the table is fetched, as its
+    specific model, in one query.
+    """
+    site = Site.find_for_request(request)
+    if site is None or getattr(settings, "WAGTAIL_I18N_ENABLED", False):
+        return Page.route_for_request(request, path)
+
+    site_routes = get_site_routes(site)
+    components = [component for component in path.split("/") if component]
+    *ancestor_paths, page_path = [
+        "".join(f"{component}/" for component in components[:length])
+        for length in range(len(components) + 1)
+    ]
+
+    # As in Page.route, pages with their own routes get the first say on
+    # anything below them, including their children's URLs
+    if site_routes.custom_routes.intersection(ancestor_paths):
+        return Page.route_for_request(request, path)
+
+    # The table is only a shortcut: anything it doesn't know, or that has
+    # moved since it was built, is routed as Wagtail would
+    route = site_routes.routes.get(page_path)
+    if route is None:
+        return Page.route_for_request(request, path)
+    model = get_page_model(route.content_type_id)
+    page = model.objects.filter(pk=route.page_id).first() if model else None
+    if page is None or page.url_path != site_routes.root_url_path + page_path:
+        return Page.route_for_request(request, path)
+
+    try:
+        return page.route(request, [])
+    except Http404:
+        return None
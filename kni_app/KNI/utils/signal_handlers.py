@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.contrib.settings.models import BaseGenericSetting, BaseSiteSetting
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+from wagtail.snippets.models import get_snippet_models
+
+from KNI.utils.redirects import invalidate_redirects
+from KNI.utils.routing import invalidate_routes
+from KNI.utils.stream_cache import invalidate_object
+from KNI.utils.views import invalidate_not_found_pages
+
+
+def invalidate_rendered_streams(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Snippets are only known once all apps are ready, so the models are
+    # checked here rather than connected to one by one
+    if sender in (get_image_model(), get_document_model()) or sender in get_snippet_models():
+        invalidate_object(sender, instance.pk)
+
+
+def invalidate_rendered_streams_for_page(sender, instance, **kwargs):
+    # Draft saves don't change what other pages show, so only these are handled
+    if isinstance(instance, Page):
+        invalidate_object(Page, instance.pk)
+
+
+def invalidate_routes_for_page(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        invalidate_routes()
+
+
+def invalidate_routes_for_site(sender, **kwargs):
+    invalidate_routes()
+    invalidate_redirects()
+
+
+def invalidate_compiled_redirects(sender, instance, **kwargs):
+    # Redirects pointing at a page link to its current URL
+    if isinstance(instance, (Page, Redirect)):
+        # After commit, so other processes don't rebuild from the old rows,
+        # such as while importing a file of redirects
+        transaction.on_commit(invalidate_redirects)
+
+
+def invalidate_rendered_not_found_pages(sender, **kwargs):
+    invalidate_not_found_pages()
+
+
+def invalidate_rendered_not_found_pages_for_settings(sender, instance, **kwargs):
+    if isinstance(instance, (Site, BaseGenericSetting, BaseSiteSetting)):
+        invalidate_not_found_pages()
+
+
+def register_signal_handlers():
+    post_save.connect(invalidate_rendered_streams)
+    post_delete.connect(invalidate_rendered_streams)
+    post_delete.connect(invalidate_rendered_streams_for_page)
+    page_published.connect(invalidate_rendered_streams_for_page)
+    page_unpublished.connect(invalidate_rendered_streams_for_page)
+    post_page_move.connect(invalidate_rendered_streams_for_page)
+
+    for signal in (page_published, page_unpublished, page_slug_changed, post_page_move):
+        signal.connect(invalidate_routes_for_page)
+    post_delete.connect(invalidate_routes_for_page)
+    post_save.connect(invalidate_routes_for_site, sender=Site)
+    post_delete.connect(invalidate_routes_for_site, sender=Site)
+
+    for signal in (page_published, page_unpublished, page_slug_changed, post_page_move):
+        signal.connect(invalidate_compiled_redirects)
+    post_save.connect(invalidate_compiled_redirects, sender=Redirect)
+    post_delete.connect(invalidate_compiled_redirects)
+
+    for signal in (page_published, page_unpublished, post_page_move):
+        signal.connect(invalidate_rendered_not_found_pages)
+    post_save.connect(invalidate_rendered_not_found_pages_for_settings)
+    post_delete.connect(invalidate_rendered_not_found_pages_for_settings)
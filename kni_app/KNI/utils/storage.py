@@ -0,0 +1,71 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+def walk_storage(storage, path):
+    """
+    Yield the names of all files under `path` in `storage`.
+    """
+    try:
+        dirs, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    for file_name in files:
+        yield posixpath.join(path, file_name)
+    for dir_name in dirs:
+        yield from walk_storage(storage, posixpath.join(path, dir_name))
+
+
+def list_files(storage, path=""):
+    """
+    Yield (name, size, md5) for all files under `path` in `storage`.
+
+    S3 buckets are listed a thousand objects per request, with their sizes,
+    rather than with a request per file and folder. The MD5 is their ETag,
+    for objects uploaded in a single part, and None otherwise.
+    """
+    bucket = getattr(storage, "bucket", None)
+    if bucket is None:
+        for name in walk_storage(storage, path):
+            yield name, storage.size(name), None
+        return
+
+    location = storage.location.strip("/")
+    prefix = "/".join(part.strip("/") for part in (location, path) if part)
+    if prefix:
+        prefix += "/"
+    for obj in bucket.objects.filter(Prefix=prefix):
+        if obj.key.endswith("/"):
+            # A folder placeholder
+            continue
+        etag = obj.e_tag.strip('"')
+        name = obj.key[len(location) + 1 :] if location else obj.key
+        yield name, obj.size, None if "-" in etag else etag
+
+
+def get_storage_id(storage):
+    """
+    Where `storage` keeps its files: its bucket and location for S3, its
+    folder for local storage, else its class and arguments.
+    """
+    bucket_name = getattr(storage, "bucket_name", None)
+    if bucket_name is not None:
+        storage_id = f"s3://{bucket_name}/{storage.location.strip('/')}"
+        if endpoint_url := getattr(storage, "endpoint_url", None):
+            storage_id += f" at {endpoint_url}"
+        return storage_id
+    if isinstance(storage, FileSystemStorage):
+        return os.path.abspath(storage.location)
+    path, args, kwargs = storage.deconstruct()
+    return f"{path}(*{args!r}, **{kwargs!r})"
+
+
+def get_file_md5(storage, name):
+    with storage.open(name) as f:
+        md5 = hashlib.md5(usedforsecurity=False)
+        while chunk := f.read(1024 * 1024):
+            md5.update(chunk)
+    return md5.hexdigest()
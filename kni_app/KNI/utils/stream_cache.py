@@ -0,0 +1,96 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from wagtail.blocks import StreamValue
+from wagtail.models import Page
+
+# Bumped whenever any page is published, unpublished, moved or deleted, as a
+# page's title, URL or listing fields can show in blocks linking to it
+PAGES_VERSION_KEY = "stream-render-version:pages"
+
+
+def get_stream_cache():
+    return caches[getattr(settings, "STREAMFIELD_RENDER_CACHE", "default")]
+
+
+def get_version_key(model, pk):
+    """
+    The cache key holding the current version of the object rendered stream
+    content refers to.
+    """
+    if issubclass(model, Page):
+        return PAGES_VERSION_KEY
+    return f"stream-render-version:{model._meta.label_lower}:{pk}"
+
+
+def get_render_cache_key(page, value):
+    """
+    The cache key for `value`, a stream or one of its children, rendered as
+    part of the live revision of `page`. None if it can't be cached.
+    """
+    if isinstance(value, StreamValue):
+        block_ids = [child.id for child in value]
+    elif isinstance(value, StreamValue.StreamChild):
+        block_ids = [value.id]
+    else:
+        return None
+    if None in block_ids or page is None or not page.live_revision_id:
+        return None
+
+    digest = hashlib.md5(
+        ",".join(block_ids).encode(), usedforsecurity=False
+    ).hexdigest()[:16]
+    return f"stream-render:{page.pk}:{page.live_revision_id}:{digest}"
+
+
+def get_version_keys(value):
+    """
+    The version keys of the pages, snippets, images and documents `value`
+    refers to.
+    """
+    if isinstance(value, StreamValue):
+        references = value.stream_block.extract_references(value)
+    else:
+        references = value.block.extract_references(value.value)
+    return {
+        get_version_key(model, object_id) for model, object_id, *_ in references
+    }
+
+
+def get_versions(cache, keys):
+    """
+    The current version of each key, starting a version for keys without one.
+    """
+    versions = cache.get_many(keys)
+    for key in keys - versions.keys():
+        version = uuid.uuid4().hex
+        versions[key] = version if cache.add(key, version, None) else cache.get(key)
+    return versions
+
+
+def get_cached_render(cache, key):
+    """
+    The rendered HTML stored under `key`, if none of the objects it refers to
+    have changed since.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    versions = entry["versions"]
+    if versions and cache.get_many(versions.keys()) != versions:
+        return None
+    return entry["html"]
+
+
+def set_cached_render(cache, key, html, versions):
+    cache.set(
+        key,
+        {"html": str(html), "versions": versions},
+        getattr(settings, "STREAMFIELD_RENDER_CACHE_TIMEOUT", 86400),
+    )
+
+
+def invalidate_object(model, pk):
+    get_stream_cache().delete(get_version_key(model, pk))
@@ -37,8 +37,10 @@ class LinkStructValue(blocks.StructValue):
         return "external"
 
     def get_file_size(self) -> str:
-        if document := self.get("document"):
-            return filesizeformat(document.file.size)
+        # Only the size stored at upload is used: asking the storage backend
+        # costs a request per link. See the backfill_document_metadata command.
+        if (document := self.get("document")) and document.file_size is not None:
+            return filesizeformat(document.file_size)
         return ""
 
     def get_extension_type(self) -> str:
@@ -2,9 +2,26 @@
 from typing import Optional
 
 from django import template
-from django.template.defaultfilters import slugify
+from django.conf import settings
 from django.db.models import Model
 from django.http.request import QueryDict
+from django.template.defaulttags import CsrfTokenNode
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from wagtail.admin.templatetags.wagtailuserbar import wagtailuserbar
+from wagtail.models import Page
+from wagtail.templatetags.wagtailcore_tags import IncludeBlockNode, include_block
+
+from KNI.utils.blocks import get_heading_id
+from KNI.utils.stream_cache import (
+    get_cached_render,
+    get_render_cache_key,
+    get_stream_cache,
+    get_version_keys,
+    get_versions,
+    set_cached_render,
+)
 
 register = template.Library()
 
@@ -19,25 +36,7 @@ register = template.Library()
 @register.simple_tag
 def format_heading_id(text, id) -> str:
     """Generate Unique IDs for page headings"""
-    # Get the first 8 characters of the ID
-    truncated_id = id[:8]
-
-    # Join slugified text and truncated ID
-    formatted_text = f"{slugify(text)}-{truncated_id}"
-
-    return formatted_text
-
-
-# Table of contents
-@register.filter(name="table_of_contents_array")
-def table_of_contents_array(streamfield_content):
-    h2_blocks = [
-        (format_heading_id(block.value, block.id), block.value)
-        for block in streamfield_content
-        if block.block_type == "h2"
-    ]
-
-    return h2_blocks
+    return get_heading_id(text, id)
 
 
 @register.simple_tag(takes_context=True)
@@ -208,3 +207,75 @@ def clean_querydict(querydict, remove_blanks=False, remove_utm=True):
             querydict.setlist(key, cleaned_values)
         else:
             del querydict[key]
+
+
+# StreamField render cache
+class CachedIncludeBlockNode(IncludeBlockNode):
+    def render(self, context):
+        try:
+            value = self.block_var.resolve(context)
+        except template.VariableDoesNotExist:
+            return ""
+
+        key = None
+        if not self.extra_context and not getattr(context.get("request"), "is_preview", False):
+            key = get_render_cache_key(context.get("page"), value)
+        if key is None:
+            return super().render(context)
+
+        cache = get_stream_cache()
+        if (html := get_cached_render(cache, key)) is not None:
+            return mark_safe(html)
+
+        # Versions are read before rendering, so changes made meanwhile are
+        # picked up next time
+        versions = get_versions(cache, get_version_keys(value))
+        html = super().render(context)
+        set_cached_render(cache, key, html, versions)
+        return html
+
+
+@register.tag
+def include_block_cached(parser, token):
+    """
+    Like `include_block`, for the current `page`'s own stream content, caching
+    the output until the page is published again or anything it links to
+    changes. The blocks rendered mustn't depend on the request or user.
+    Rendered normally in previews, or when passed extra context with `with`.
+    """
+    node = include_block(parser, token)
+    return CachedIncludeBlockNode(node.block_var, node.extra_context, node.use_parent_context)
+
+
+# Session-free pages
+@register.simple_tag(takes_context=True)
+def userbar(context):
+    """
+    Wagtail's user bar. With SESSION_FREE_PAGES, a placeholder the user bar
+    is fetched into for editors, so the page's HTML is the same for everyone.
+    """
+    request = context.get("request")
+    if not settings.SESSION_FREE_PAGES or getattr(request, "is_preview", False):
+        return wagtailuserbar(context)
+    page = context.get("page")
+    if not isinstance(page, Page) or not page.pk:
+        return ""
+    return format_html(
+        '<div data-lazy-userbar data-url="{}" data-cookie="{}"></div>',
+        reverse("userbar", args=[page.pk]),
+        settings.USERBAR_COOKIE_NAME,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def form_csrf_token(context):
+    """
+    The CSRF token field for a form. With SESSION_FREE_PAGES, the token is
+    fetched when the form is submitted, so the page doesn't set a cookie.
+    """
+    if not settings.SESSION_FREE_PAGES:
+        return CsrfTokenNode().render(context)
+    return format_html(
+        '<input type="hidden" name="csrfmiddlewaretoken" data-csrf-token data-url="{}">',
+        reverse("csrf_token"),
+    )
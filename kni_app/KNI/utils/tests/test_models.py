@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from wagtail.models import Page
+
+from KNI.images.models import CustomImage
+from KNI.images.tests.test_working_file import get_upload
+from KNI.standardpages.models import IndexPage, StandardPage
+from KNI.utils.models import PageRelatedPage
+
+
+class PlainIntroductionTests(TestCase):
+    def setUp(self):
+        self.root = Page.objects.get(depth=1)
+
+    def test_stored_on_save(self):
+        page = self.root.add_child(
+            instance=IndexPage(title="Index", introduction="<p>Hello <b>world</b></p>")
+        )
+
+        self.assertEqual(IndexPage.objects.get(pk=page.pk).plain_introduction, "Hello world")
+
+    def test_updated_on_publish(self):
+        page = self.root.add_child(instance=StandardPage(title="Page", introduction="Old"))
+        page.introduction = "New"
+        page.save_revision().publish()
+
+        self.assertEqual(StandardPage.objects.get(pk=page.pk).plain_introduction, "New")
+
+    def test_backfill(self):
+        page = self.root.add_child(instance=IndexPage(title="Index", introduction="<p>Hi</p>"))
+        IndexPage.objects.filter(pk=page.pk).update(plain_introduction="")
+
+        call_command("update_plain_introductions", stdout=StringIO())
+
+        self.assertEqual(IndexPage.objects.get(pk=page.pk).plain_introduction, "Hi")
+
+
+class TableOfContentsTests(TestCase):
+    def test_stored_on_save(self):
+        page = Page.objects.get(depth=1).add_child(
+            instance=StandardPage(
+                title="Page",
+                body=[
+                    ("section", {"heading": "First part", "content": []}),
+                    ("cta", {"heading": "Not a section", "link": [], "description": ""}),
+                    ("section", {"heading": "Second part", "content": []}),
+                ],
+            )
+        )
+        section_ids = [child.id for child in page.body if child.block_type == "section"]
+
+        page = StandardPage.objects.get(pk=page.pk)
+
+        self.assertEqual(
+            page.table_of_contents,
+            [
+                [f"first-part-{section_ids[0][:8]}", "First part"],
+                [f"second-part-{section_ids[1][:8]}", "Second part"],
+            ],
+        )
+        self.assertIn(f'id="first-part-{section_ids[0][:8]}"', page.body.render_as_block())
+
+
+@override_settings(IMAGE_PREGENERATE_RENDITIONS=[])
+class RelatedPagesTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def test_ordered_specific_pages(self):
+        image = CustomImage.objects.create(title="Image", file=get_upload(40, 30))
+        root = Page.objects.get(depth=1)
+        first = root.add_child(instance=IndexPage(title="First", listing_image=image))
+        second = root.add_child(instance=StandardPage(title="Second", listing_image=image))
+        draft = root.add_child(instance=StandardPage(title="Draft", live=False))
+        page = root.add_child(instance=StandardPage(title="Page"))
+        for sort_order, related in enumerate((second, draft, first)):
+            PageRelatedPage.objects.create(parent=page, page=related, sort_order=sort_order)
+
+        page = StandardPage.objects.get(pk=page.pk)
+        # The relations, view restrictions, the pages, then per page type the
+        # specific pages, listing images and their renditions
+        with self.assertNumQueries(9):
+            related_pages = page.related_pages
+
+        self.assertEqual(related_pages, [second, first])
+        self.assertIsInstance(related_pages[1], IndexPage)
+        with self.assertNumQueries(0):
+            related_pages[1].listing_image.renditions.all()
@@ -0,0 +1,82 @@
+from django.http import HttpResponse, HttpResponseNotFound
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Site
+
+from KNI.standardpages.models import StandardPage
+from KNI.utils.middleware import RedirectMiddleware
+from KNI.utils.redirects import invalidate_redirects
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PROCESS_CACHE_CHECK_INTERVAL=3600,
+)
+class RedirectMiddlewareTests(TestCase):
+    def setUp(self):
+        invalidate_redirects()
+        self.site = Site.objects.get(is_default_site=True)
+        self.middleware = RedirectMiddleware(lambda request: HttpResponseNotFound())
+
+    def get(self, path):
+        return self.middleware(RequestFactory().get(path))
+
+    def get_request(self, path):
+        request = RequestFactory().get(path)
+        # Finding the site is left to Wagtail
+        Site.find_for_request(request)
+        return request
+
+    def test_redirects_from_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.add_redirect("/old", "/everywhere")
+            Redirect.add_redirect("/old", "/here", is_permanent=False, site=self.site)
+            Redirect.add_redirect("/query?b=2&a=1", "/with-query")
+        self.get("/")
+
+        request = self.get_request("/old/?utm_source=feed")
+        with self.assertNumQueries(0):
+            response = self.middleware(request)
+        self.assertEqual((response.status_code, response["Location"]), (302, "/here"))
+
+        response = self.get("/query/?a=1&b=2")
+        self.assertEqual((response.status_code, response["Location"]), (301, "/with-query"))
+
+        request = self.get_request("/missing/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.middleware(request).status_code, 404)
+
+    def test_page_redirects_follow_the_page(self):
+        page = self.site.root_page.add_child(instance=StandardPage(title="Page"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.add_redirect("/old", page)
+        self.assertEqual(self.get("/old/")["Location"], "/page/")
+
+        page.slug = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+
+        self.assertEqual(self.get("/old/")["Location"], "/renamed/")
+
+    def test_only_404s_redirected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.add_redirect("/old", "/new")
+        middleware = RedirectMiddleware(lambda request: HttpResponse())
+
+        self.assertEqual(middleware(RequestFactory().get("/old/")).status_code, 200)
+
+    def test_probe_paths(self):
+        middleware = RedirectMiddleware(lambda request: self.fail("Not served"))
+
+        for path in ["/wp-login.php", "/wp-admin/setup.php", "/.env", "/index.php"]:
+            with self.subTest(path):
+                response = middleware(RequestFactory().get(path))
+
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.content, b"Not found")
+                self.assertIn("public", response["Cache-Control"])
+
+        # Unless someone wants them redirected
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.add_redirect("/index.php", "/")
+        self.assertEqual(middleware(RequestFactory().get("/index.php"))["Location"], "/")
@@ -0,0 +1,70 @@
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail import views as wagtail_views
+from wagtail.contrib.routable_page.models import RoutablePageMixin
+from wagtail.models import Page, Site
+
+from KNI.standardpages.models import IndexPage, StandardPage
+from KNI.utils.middleware import RouteCacheMiddleware
+from KNI.utils.routing import has_custom_routing, invalidate_routes, route_for_request
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PROCESS_CACHE_CHECK_INTERVAL=3600,
+)
+class RouteCacheTests(TestCase):
+    def setUp(self):
+        invalidate_routes()
+        self.home = Site.objects.get(is_default_site=True).root_page
+        self.section = self.home.add_child(instance=IndexPage(title="Section"))
+        self.page = self.section.add_child(instance=StandardPage(title="Page"))
+
+    def route(self, path, request=None):
+        return route_for_request(request or RequestFactory().get(path), path)
+
+    def test_one_query_when_warm(self):
+        self.route("/")
+        request = RequestFactory().get("/section/page/")
+        # Finding the site is left to Wagtail
+        Site.find_for_request(request)
+
+        with self.assertNumQueries(1):
+            page, args, kwargs = self.route("/section/page/", request)
+
+        self.assertEqual(page, self.page)
+        self.assertIsInstance(page, StandardPage)
+
+    def test_middleware(self):
+        request = RequestFactory().get("/section/page/")
+
+        RouteCacheMiddleware(lambda request: None).process_view(
+            request, wagtail_views.serve, ["section/page/"], {}
+        )
+
+        self.assertEqual(Page.route_for_request(request, "section/page/").page, self.page)
+
+    def test_moved_and_unpublished_pages(self):
+        self.route("/")
+
+        other = self.home.add_child(instance=IndexPage(title="Other"))
+        self.page.move(other, pos="last-child")
+
+        self.assertIsNone(self.route("/section/page/"))
+        self.assertEqual(self.route("/other/page/").page, self.page)
+
+        Page.objects.get(pk=self.page.pk).specific.unpublish()
+
+        self.assertIsNone(self.route("/other/page/"))
+
+    def test_pages_added_since_built(self):
+        self.route("/")
+
+        # Not published through a revision, so nothing clears the table
+        page = self.section.add_child(instance=StandardPage(title="New"))
+
+        self.assertEqual(self.route("/section/new/").page, page)
+        self.assertIsNone(self.route("/section/missing/"))
+
+    def test_custom_routing(self):
+        self.assertTrue(has_custom_routing(RoutablePageMixin))
+        self.assertFalse(has_custom_routing(StandardPage))
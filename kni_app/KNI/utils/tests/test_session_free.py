@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from wagtail.models import Site
+
+from KNI.forms.models import FormField, FormPage
+from KNI.standardpages.models import StandardPage
+
+
+@override_settings(
+    SESSION_FREE_PAGES=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class SessionFreePagesTests(TestCase):
+    def setUp(self):
+        self.home = Site.objects.get(is_default_site=True).root_page
+        self.page = self.home.add_child(instance=StandardPage(title="Page"))
+        self.editor = get_user_model().objects.create_superuser("editor", password="password")
+
+    def assertCacheable(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertEqual(response.cookies, {})
+
+    def test_pages_dont_depend_on_the_user(self):
+        response = self.client.get("/page/")
+        self.assertCacheable(response)
+        self.assertContains(response, f'data-url="/_util/userbar/{self.page.pk}/"')
+
+        self.client.force_login(self.editor)
+        signed_in_response = self.client.get("/page/")
+        self.assertCacheable(signed_in_response)
+        self.assertEqual(signed_in_response.content, response.content)
+
+    def test_forms_fetch_their_csrf_token(self):
+        form_page = self.home.add_child(instance=FormPage(title="Contact"))
+        FormField.objects.create(page=form_page, label="Name", field_type="singleline")
+
+        response = self.client.get("/contact/")
+
+        self.assertCacheable(response)
+        self.assertContains(response, 'data-csrf-token data-url="/_util/csrf-token/"')
+
+        response = self.client.get("/_util/csrf-token/")
+        self.assertTrue(response.json()["token"])
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_userbar(self):
+        url = f"/_util/userbar/{self.page.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 204)
+
+        self.client.force_login(self.editor)
+        response = self.client.get(url)
+
+        self.assertContains(response, "wagtail-userbar")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_editors_marked_by_the_admin(self):
+        self.client.force_login(self.editor)
+
+        response = self.client.get("/admin/")
+        self.assertEqual(response.cookies[settings.USERBAR_COOKIE_NAME].value, "1")
+
+        self.client.logout()
+        self.client.cookies[settings.USERBAR_COOKIE_NAME] = "1"
+        response = self.client.get("/admin/login/")
+        self.assertEqual(response.cookies[settings.USERBAR_COOKIE_NAME].value, "")
@@ -0,0 +1,73 @@
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.models import Page
+
+from KNI.standardpages.models import StandardPage
+from KNI.utils.models import Statistic
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class StreamRenderCacheTests(TestCase):
+    template = engines["django"].from_string(
+        "{% load util_tags %}{% include_block_cached page.body %}"
+    )
+
+    def setUp(self):
+        self.statistic = Statistic.objects.create(statistic="42%", description="Answer")
+        page = Page.objects.get(depth=1).add_child(
+            instance=StandardPage(
+                title="Page",
+                body=[
+                    (
+                        "statistics",
+                        {
+                            "heading": "Numbers",
+                            "statistics": [self.statistic, self.statistic, self.statistic],
+                        },
+                    )
+                ],
+            )
+        )
+        page.save_revision().publish()
+        self.page_pk = page.pk
+
+    def change_heading_in_place(self):
+        page = StandardPage.objects.get(pk=self.page_pk)
+        data = page.body.get_prep_value()
+        data[0]["value"]["heading"] = "Changed"
+        StandardPage.objects.filter(pk=self.page_pk).update(body=data)
+        return page
+
+    def render(self, request=None):
+        page = StandardPage.objects.get(pk=self.page_pk)
+        return self.template.render({"page": page, "request": request})
+
+    def test_cached_until_published(self):
+        self.assertIn("Numbers", self.render())
+
+        # Changes not made by publishing don't show...
+        page = self.change_heading_in_place()
+        self.assertNotIn("Changed", self.render())
+
+        # ...publishing a revision does
+        page.body = []
+        page.save_revision().publish()
+        self.assertNotIn("42%", self.render())
+
+    def test_snippet_change_invalidates(self):
+        self.assertIn("42%", self.render())
+
+        self.statistic.statistic = "43%"
+        self.statistic.save()
+
+        self.assertIn("43%", self.render())
+
+    def test_preview_not_cached(self):
+        self.render()
+        self.change_heading_in_place()
+        request = RequestFactory().get("/")
+        request.is_preview = True
+
+        self.assertIn("Changed", self.render(request))
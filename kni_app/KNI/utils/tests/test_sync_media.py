@@ -0,0 +1,160 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from KNI.utils.storage import list_files
+
+
+class FakeS3Storage:
+    """
+    The parts of S3Storage the command uses, with its objects in memory.
+    """
+
+    bucket_name = "media-bucket"
+    location = "media/"
+    objects = {}
+    etags = {}
+    opened = []
+
+    @property
+    def bucket(self):
+        return SimpleNamespace(objects=SimpleNamespace(filter=self.filter))
+
+    def filter(self, Prefix):
+        for key, content in sorted(self.objects.items()):
+            if key.startswith(Prefix):
+                etag = self.etags.get(key) or hashlib.md5(content).hexdigest()
+                yield SimpleNamespace(key=key, size=len(content), e_tag=f'"{etag}"')
+
+    def open(self, name):
+        self.opened.append(name)
+        return ContentFile(self.objects[f"media/{name}"])
+
+    def save(self, name, content):
+        self.objects[f"media/{name}"] = content.read()
+        return name
+
+    def delete(self, name):
+        del self.objects[f"media/{name}"]
+
+
+class SyncMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.source = FileSystemStorage(location=self.mkdtemp())
+        self.destination = FileSystemStorage(location=self.mkdtemp())
+        self.checkpoint = os.path.join(self.mkdtemp(), "sync.checkpoint")
+        self.source.save("images/a.jpg", ContentFile(b"aaaa"))
+        self.source.save("documents/nested/b.pdf", ContentFile(b"bbbbbb"))
+
+    def mkdtemp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        return path
+
+    def sync(self, *args, destination=None):
+        stdout = StringIO()
+        call_command(
+            "sync_media",
+            self.source.location,
+            destination or self.destination.location,
+            f"--checkpoint={self.checkpoint}",
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def read(self, name):
+        with self.destination.open(name) as f:
+            return f.read()
+
+    def test_copies_files(self):
+        output = self.sync()
+
+        self.assertIn("2/2 file(s) checked: 2 copied", output)
+        self.assertEqual(self.read("images/a.jpg"), b"aaaa")
+        self.assertEqual(self.read("documents/nested/b.pdf"), b"bbbbbb")
+
+    def test_skips_unchanged_and_replaces_changed(self):
+        self.destination.save("images/a.jpg", ContentFile(b"aaaa"))
+        # Same size, different contents
+        self.destination.save("documents/nested/b.pdf", ContentFile(b"cccccc"))
+
+        output = self.sync()
+
+        self.assertIn("1 copied", output)
+        self.assertIn("1 unchanged", output)
+        self.assertEqual(self.read("documents/nested/b.pdf"), b"bbbbbb")
+        self.assertEqual(self.destination.listdir("documents/nested")[1], ["b.pdf"])
+
+    def test_resumes_from_checkpoint(self):
+        self.sync()
+        self.source.save("images/c.jpg", ContentFile(b"c"))
+
+        output = self.sync()
+
+        self.assertIn("1/1 file(s) checked: 1 copied", output)
+        self.assertIn("2 file(s) were already synced", output)
+
+        output = self.sync("--restart")
+
+        self.assertIn("3/3 file(s) checked: 0 copied", output)
+
+    def test_checkpoint_of_another_sync_is_rejected(self):
+        self.sync()
+
+        with self.assertRaisesMessage(CommandError, "Pass --restart"):
+            self.sync(destination=self.mkdtemp())
+
+        output = self.sync("--restart", destination=self.mkdtemp())
+
+        self.assertIn("2/2 file(s) checked: 2 copied", output)
+
+
+class SyncMediaS3Tests(SimpleTestCase):
+    def setUp(self):
+        self.source = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source.location)
+        self.source.save("images/a.jpg", ContentFile(b"aaaa"))
+        self.source.save("documents/nested/b.pdf", ContentFile(b"bbbbbb"))
+        FakeS3Storage.objects = {
+            "media/images/": b"",
+            "media/images/a.jpg": b"aaaa",
+            # Same size, different contents
+            "media/documents/nested/b.pdf": b"cccccc",
+            "media/documents/large.pdf": b"dddd",
+            "other/images/a.jpg": b"aaaa",
+        }
+        FakeS3Storage.etags = {"media/documents/large.pdf": "abc-2"}
+        FakeS3Storage.opened = []
+
+    def test_list_files(self):
+        self.assertEqual(
+            list(list_files(FakeS3Storage(), "documents")),
+            [
+                ("documents/large.pdf", 4, None),
+                ("documents/nested/b.pdf", 6, hashlib.md5(b"cccccc").hexdigest()),
+            ],
+        )
+
+    def test_compares_with_etags(self):
+        output = StringIO()
+        call_command(
+            "sync_media",
+            self.source.location,
+            f"{__name__}.FakeS3Storage",
+            "--checkpoint=",
+            stdout=output,
+        )
+
+        self.assertIn("2/2 file(s) checked: 1 copied", output.getvalue())
+        self.assertEqual(FakeS3Storage.objects["media/documents/nested/b.pdf"], b"bbbbbb")
+        # Compared by ETag, without downloading
+        self.assertEqual(FakeS3Storage.opened, [])
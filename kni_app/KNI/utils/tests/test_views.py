@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from wagtail.models import Site
+
+from KNI.utils.views import invalidate_not_found_pages, serve_media
+
+
+class ServeMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        os.makedirs(os.path.join(self.media_root, "images"))
+        for path in ("documents.txt", "images/photo.fill-10x10.jpg"):
+            with open(os.path.join(self.media_root, path), "wb") as f:
+                f.write(b"0123456789")
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = serve_media(self.factory.get(f"/media/{path}", headers=headers), path)
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_whole_file(self):
+        response, content = self.get("documents.txt")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, b"0123456789")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_renditions_are_immutable(self):
+        response, _ = self.get("images/photo.fill-10x10.jpg")
+
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_not_modified(self):
+        response, _ = self.get("documents.txt")
+
+        response, content = self.get("documents.txt", if_none_match=response["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(content, b"")
+
+    def test_ranges(self):
+        for header, expected_range, expected_content in (
+            ("bytes=2-4", "bytes 2-4/10", b"234"),
+            ("bytes=7-", "bytes 7-9/10", b"789"),
+            ("bytes=-2", "bytes 8-9/10", b"89"),
+            ("bytes=8-20", "bytes 8-9/10", b"89"),
+        ):
+            with self.subTest(header):
+                response, content = self.get("documents.txt", range=header)
+
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], expected_range)
+                self.assertEqual(response["Content-Length"], str(len(expected_content)))
+                self.assertEqual(content, expected_content)
+
+    def test_unsatisfiable_range(self):
+        for path in ("documents.txt", "images/photo.fill-10x10.jpg"):
+            with self.subTest(path):
+                response, _ = self.get(path, range="bytes=20-")
+
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */10")
+                self.assertNotIn("Cache-Control", response)
+
+    def test_outdated_if_range_gets_whole_file(self):
+        response, content = self.get("documents.txt", range="bytes=2-4", if_range='"old"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, b"0123456789")
+
+    @override_settings(
+        MEDIA_SERVE_METHOD="x-accel-redirect",
+        MEDIA_ACCEL_REDIRECT_LOCATION="/protected-media/",
+    )
+    def test_accel_redirect(self):
+        response, content = self.get("images/photo.fill-10x10.jpg")
+
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/images/photo.fill-10x10.jpg"
+        )
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(content, b"")
+
+    def test_path_outside_media_root(self):
+        with self.assertRaises(Http404):
+            self.get("../etc/passwd")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PROCESS_CACHE_CHECK_INTERVAL=3600,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+class PageNotFoundTests(TestCase):
+    def setUp(self):
+        invalidate_not_found_pages()
+
+    def test_rendered_once_for_anonymous_visitors(self):
+        response = self.client.get("/missing/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn(b"Page not found", response.content)
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertNotIn("Vary", response)
+
+        with patch("KNI.utils.views.render_to_string") as render_to_string:
+            response = self.client.get("/other/")
+        render_to_string.assert_not_called()
+        self.assertEqual(response.status_code, 404)
+
+    def test_rendered_again_after_settings_change(self):
+        self.client.get("/missing/")
+
+        site = Site.objects.get(is_default_site=True)
+        site.site_name = "Renamed"
+        site.save()
+
+        self.assertIn(b"Renamed", self.client.get("/missing/").content)
+
+    def test_visitors_with_sessions(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+
+        response = self.client.get("/missing/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("Cache-Control", response)
@@ -0,0 +1,222 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotFound,
+    JsonResponse,
+)
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views import defaults
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+from wagtail.admin.templatetags.wagtailuserbar import wagtailuserbar
+from wagtail.models import Page, Site
+
+from KNI.utils.cache import ProcessCache
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Files under these MEDIA_ROOT folders never change once written. Wagtail
+# names renditions after the filter spec and focal point they were made with.
+IMMUTABLE_MEDIA_PREFIXES = ("images/",)
+
+# Site ID -> the rendered 404 page. Cleared when settings or pages change
+not_found_cache = ProcessCache("not-found-generation")
+
+
+class FileRange:
+    """
+    `length` bytes of the open file `f`, from its current position.
+
+    Keeps `fileno()`, so WSGI servers with a sendfile-capable
+    `wsgi.file_wrapper` (such as gunicorn's sync workers) can still send the
+    range from the kernel without copying it through Python.
+    """
+
+    def __init__(self, f, length):
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def get_byte_range(request, size, etag, last_modified):
+    """
+    The (start, end) byte positions, inclusive, requested by the Range
+    header, None to send the whole file, or False if the range can't be
+    satisfied. Multiple ranges aren't supported, so get the whole file.
+    """
+    match = RANGE_RE.match(request.headers.get("Range", ""))
+    if not match:
+        return None
+
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != int(last_modified):
+        # The client's copy is outdated, so it needs the whole file
+        return None
+
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        # The last `end` bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def get_file_response(request, path, full_path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    serve_method = getattr(settings, "MEDIA_SERVE_METHOD", "direct")
+
+    if serve_method == "x-accel-redirect":
+        # nginx serves the file (and any range) from an internal location
+        response = HttpResponse(content_type=content_type)
+        location = settings.MEDIA_ACCEL_REDIRECT_LOCATION.rstrip("/")
+        response["X-Accel-Redirect"] = quote(f"{location}/{path}")
+        return response
+    elif serve_method == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+
+    byte_range = get_byte_range(request, size, etag, last_modified)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    f = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(
+            FileRange(f, end - start + 1), status=206, content_type=content_type
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT, in production.
+
+    Supports conditional and range requests. Set MEDIA_SERVE_METHOD to
+    "x-accel-redirect" (nginx) or "x-sendfile" (Apache) to have the web
+    server send the file instead of a worker.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    etag = quote_etag(f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}")
+    last_modified = stat_result.st_mtime
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    ) or get_file_response(
+        request, path, full_path, stat_result.st_size, etag, last_modified
+    )
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Not 412 or 416 responses, which caches would then keep serving
+    if response.status_code not in (200, 206, 304):
+        return response
+    if path.startswith(IMMUTABLE_MEDIA_PREFIXES):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=getattr(settings, "MEDIA_CACHE_MAX_AGE", 3600)
+        )
+    return response
+
+
+def invalidate_not_found_pages():
+    not_found_cache.invalidate()
+
+
+def page_not_found(request, exception, template_name="404.html"):
+    """
+    Django's 404 view, but anonymous visitors get a copy of the page rendered
+    once per site, until settings or pages change. Neither their session nor
+    their user is loaded, so the response doesn't vary on cookies.
+    """
+    if settings.SESSION_COOKIE_NAME in request.COOKIES and not settings.SESSION_FREE_PAGES:
+        # Possibly signed in, and shown the user bar
+        return defaults.page_not_found(request, exception, template_name)
+
+    site = Site.find_for_request(request)
+    site_id = site.pk if site else None
+    pages = not_found_cache.get_data()
+    if site_id not in pages:
+        # Without a session cookie the user can only be anonymous; setting it
+        # keeps the template from loading the session to find out
+        request.user = AnonymousUser()
+        pages[site_id] = render_to_string(template_name, request=request).encode()
+
+    response = HttpResponseNotFound(pages[site_id])
+    patch_cache_control(
+        response, public=True, max_age=getattr(settings, "NOT_FOUND_CACHE_MAX_AGE", 60)
+    )
+    return response
+
+
+@never_cache
+def userbar(request, page_id):
+    """
+    Wagtail's user bar for a page, fetched by pages served with
+    SESSION_FREE_PAGES. Empty for users who can't access the admin.
+    """
+    page = get_object_or_404(Page, pk=page_id).specific
+    html = wagtailuserbar({"request": request, "page": page})
+    return HttpResponse(html) if html else HttpResponse(status=204)
+
+
+@never_cache
+def csrf_token(request):
+    """
+    A CSRF token for forms on pages served with SESSION_FREE_PAGES.
+    """
+    return JsonResponse({"token": get_token(request)})
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "KNI.settings.production")
 
 application = get_wsgi_application()
+
+from KNI.utils.routing import warm_routes  # noqa: E402
+
+warm_routes()
@@ -0,0 +1,45 @@
+#!/bin/sh
+# Container entrypoint: migrates, then runs the background task worker next
+# to gunicorn. They share one container as they share the SQLite database on
+# the volume. The worker is restarted whenever it exits, and SIGTERM/SIGINT
+# are passed on to both, so each finishes its current requests or task
+# before the container stops.
+
+set -e
+python manage.py createcachetable
+python manage.py migrate --noinput
+set +e
+
+(
+    # Sent by the script below on stopping
+    trap 'kill -TERM "$worker" 2>/dev/null; wait "$worker"; exit 0' TERM
+    while true; do
+        python manage.py run_worker &
+        worker=$!
+        wait "$worker"
+        echo "Task worker exited with status $?, restarting in 5s" >&2
+        sleep 5 &
+        wait $!
+    done
+) &
+supervisor=$!
+
+gunicorn KNI.wsgi:application &
+server=$!
+
+stop() {
+    kill -TERM "$server" "$supervisor" 2>/dev/null
+}
+trap stop TERM INT
+
+# Returns once gunicorn exits, or a signal arrives: either way, stop both
+# and wait for them to finish
+wait "$server"
+status=$?
+stop
+if [ "$status" -gt 128 ]; then
+    wait "$server"
+    status=$?
+fi
+wait "$supervisor"
+exit "$status"
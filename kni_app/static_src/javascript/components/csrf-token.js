@@ -0,0 +1,34 @@
+/**
+ * Fills in a form's CSRF token when it's submitted, for pages rendered with
+ * SESSION_FREE_PAGES.
+ */
+class CsrfToken {
+    static selector() {
+        return '[data-csrf-token]';
+    }
+
+    constructor(node) {
+        this.input = node;
+        this.form = node.form;
+
+        if (this.form) {
+            this.form.addEventListener('submit', (event) => this.handleSubmit(event));
+        }
+    }
+
+    async handleSubmit(event) {
+        if (this.input.value) {
+            return;
+        }
+        event.preventDefault();
+
+        const response = await fetch(this.input.dataset.url, {
+            credentials: 'same-origin',
+        });
+        const { token } = await response.json();
+        this.input.value = token;
+        this.form.requestSubmit();
+    }
+}
+
+export default CsrfToken;
@@ -0,0 +1,41 @@
+/**
+ * Fetches Wagtail's user bar into pages rendered with SESSION_FREE_PAGES,
+ * for browsers marked as signed in to the admin.
+ */
+class LazyUserbar {
+    static selector() {
+        return '[data-lazy-userbar]';
+    }
+
+    constructor(node) {
+        this.node = node;
+        const cookie = `${node.dataset.cookie}=`;
+
+        if (document.cookie.split('; ').some((item) => item.startsWith(cookie))) {
+            this.load();
+        }
+    }
+
+    async load() {
+        const response = await fetch(this.node.dataset.url, {
+            credentials: 'same-origin',
+        });
+        if (response.status !== 200) {
+            return;
+        }
+
+        this.node.innerHTML = await response.text();
+
+        // Scripts inserted as HTML don't run, so they're recreated
+        this.node.querySelectorAll('script').forEach((oldScript) => {
+            const script = document.createElement('script');
+            [...oldScript.attributes].forEach(({ name, value }) => {
+                script.setAttribute(name, value);
+            });
+            script.textContent = oldScript.textContent;
+            oldScript.replaceWith(script);
+        });
+    }
+}
+
+export default LazyUserbar;
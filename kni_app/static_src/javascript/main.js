@@ -2,6 +2,8 @@ import ThemeToggle from "./components/theme-toggle";
 import HeaderSearchPanel from "./components/header-search-panel";
 import MobileMenu from "./components/mobile-menu";
 import SkipLink from './components/skip-link';
+import LazyUserbar from './components/lazy-userbar';
+import CsrfToken from './components/csrf-token';
 
 import '../sass/main.scss';
 
@@ -17,4 +19,6 @@ document.addEventListener('DOMContentLoaded', () => {
     initComponent(SkipLink);
     initComponent(HeaderSearchPanel);
     initComponent(MobileMenu);
+    initComponent(LazyUserbar);
+    initComponent(CsrfToken);
 });